@@ -150,6 +150,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Fichiers stockés par l'application (réponses API volumineuses, etc.)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -234,6 +238,9 @@ try:
     CELERY_TASK_SERIALIZER = 'json'
     CELERY_RESULT_SERIALIZER = 'json'
     CELERY_TIMEZONE = TIME_ZONE
+    # Un seul message réservé à la fois par processus worker : les analyses
+    # longues vont au prochain worker libre (lancer le worker avec -Ofair)
+    CELERY_WORKER_PREFETCH_MULTIPLIER = 1
     
     # Configuration des tâches périodiques
     from .celery_beat_schedule import CELERY_BEAT_SCHEDULE
@@ -244,6 +251,30 @@ except ImportError:
 # Configuration des URLs externes
 ALERTE_EXTERNE_URL = os.getenv('ALERTE_EXTERNE_URL', 'http://192.168.100.168:8000/alertes')
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://192.168.100.168:8000/alertes')
+
+# Taille des lots pour les insertions groupées (bulk_create)
+BULK_CREATE_BATCH_SIZE = int(os.getenv('BULK_CREATE_BATCH_SIZE', '500'))
+
+# Caches : 'predictions' garde les résultats de prédiction ML. Il est partagé
+# entre processus web et workers Celery via Redis si REDIS_CACHE_URL est
+# défini, sinon local au processus
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'predictions': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+    } if REDIS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'predictions',
+    },
+}
+
+# Durée de validité (secondes) d'un résultat de prédiction ML en cache
+ML_PREDICTION_CACHE_TIMEOUT = int(os.getenv('ML_PREDICTION_CACHE_TIMEOUT', '86400'))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'API Surveillance Érosion Côtière',
     'DESCRIPTION': 'API REST pour la surveillance et la prédiction de l\'érosion côtière avec données géospatiales PostGIS',
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erosion', '0011_remove_alerte_date_resolution_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logapicall',
+            name='parametres_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='Empreinte SHA-256 des paramètres de la requête', max_length=64),
+        ),
+    ]
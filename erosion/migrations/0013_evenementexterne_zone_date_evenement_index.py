@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erosion', '0012_logapicall_parametres_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evenementexterne',
+            index=models.Index(fields=['zone', 'date_evenement'], name='erosion_eve_zone_id_a0caaa_idx'),
+        ),
+    ]
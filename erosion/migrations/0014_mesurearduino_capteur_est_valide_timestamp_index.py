@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erosion', '0013_evenementexterne_zone_date_evenement_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mesurearduino',
+            index=models.Index(fields=['capteur', 'est_valide', '-timestamp'], name='erosion_mes_capteur_aab376_idx'),
+        ),
+    ]
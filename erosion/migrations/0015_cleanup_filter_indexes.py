@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erosion', '0014_mesurearduino_capteur_est_valide_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evenementexterne',
+            index=models.Index(fields=['is_simulation', 'date_evenement'], name='erosion_eve_is_simu_001dcc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evenementexterne',
+            index=models.Index(fields=['is_valide', 'date_evenement'], name='erosion_eve_is_vali_76c9b7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evenementexterne',
+            index=models.Index(fields=['is_traite', 'date_evenement'], name='erosion_eve_is_trai_c5bee7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fusiondonnees',
+            index=models.Index(fields=['statut', 'date_creation'], name='erosion_fus_statut_40581b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='predictionenrichie',
+            index=models.Index(fields=['date_prediction'], name='erosion_pre_date_pr_f12e9e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alerteenrichie',
+            index=models.Index(fields=['est_resolue', 'date_creation'], name='erosion_ale_est_res_695288_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alerteenrichie',
+            index=models.Index(fields=['est_resolue', 'date_resolution'], name='erosion_ale_est_res_6cea88_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedonnees',
+            index=models.Index(fields=['est_disponible', 'date_archivage'], name='erosion_arc_est_dis_d60b30_idx'),
+        ),
+    ]
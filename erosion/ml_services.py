@@ -9,58 +9,52 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from django.conf import settings
 from django.utils import timezone
+from django.db import transaction
 from django.contrib.gis.geos import Point, Polygon
 from .models import CleAPI, LogAPICall, DonneesEnvironnementales, DonneesCartographiques
 
 logger = logging.getLogger(__name__)
 
+# Taille des lots pour les insertions groupées
+TAILLE_LOT = getattr(settings, 'BULK_CREATE_BATCH_SIZE', 500)
+
 
 class APIServiceBase:
     """Classe de base pour tous les services API"""
     
-    def __init__(self, service_name: str):
+    def __init__(self, service_name: str, cle_api: Optional[str] = None, url_base: Optional[str] = None):
         self.service_name = service_name
-        self.cle_api = self._get_api_key()
-        self.url_base = self._get_base_url()
+        if cle_api is None and url_base is None:
+            # Utilisation autonome : une seule requête pour la clé et l'URL
+            cle_obj = self._get_cle_api()
+            cle_api = cle_obj.cle_api if cle_obj else None
+            url_base = cle_obj.url_base if cle_obj else ""
+        self.cle_api = cle_api
+        self.url_base = url_base or ""
     
-    def _get_api_key(self) -> Optional[str]:
-        """Récupère la clé API pour ce service"""
+    def _get_cle_api(self) -> Optional[CleAPI]:
+        """Récupère la clé API et l'URL de base pour ce service"""
         try:
-            cle_obj = CleAPI.objects.get(service=self.service_name, actif=True)
-            return cle_obj.cle_api
+            return CleAPI.objects.only('cle_api', 'url_base').get(service=self.service_name, actif=True)
         except CleAPI.DoesNotExist:
             logger.warning(f"Aucune clé API trouvée pour {self.service_name}")
             return None
     
-    def _get_base_url(self) -> str:
-        """Récupère l'URL de base pour ce service"""
-        try:
-            cle_obj = CleAPI.objects.get(service=self.service_name, actif=True)
-            return cle_obj.url_base
-        except CleAPI.DoesNotExist:
-            return ""
-    
     def _log_api_call(self, endpoint: str, params: Dict, status: str, 
                      response_code: int = None, response_time: int = None,
                      data: Dict = None, error: str = None):
         """Enregistre l'appel API dans les logs"""
-        LogAPICall.objects.create(
-            service_api=self.service_name,
-            endpoint_appele=endpoint,
-            parametres_requete=params,
-            statut_reponse=status,
-            code_reponse_http=response_code,
-            temps_reponse_ms=response_time,
-            donnees_recues=data or {},
-            message_erreur=error or ""
+        LogAPICall.enregistrer(
+            self.service_name, endpoint, params, status,
+            response_code, response_time, data, error
         )
 
 
 class OpenMeteoService(APIServiceBase):
     """Service pour l'API Open-Meteo (météo)"""
     
-    def __init__(self):
-        super().__init__('open_meteo')
+    def __init__(self, **kwargs):
+        super().__init__('open_meteo', **kwargs)
         self.url_base = "https://api.open-meteo.com/v1"
     
     def get_weather_data(self, latitude: float, longitude: float, 
@@ -144,8 +138,8 @@ class OpenMeteoService(APIServiceBase):
 class OpenElevationService(APIServiceBase):
     """Service pour l'API Open-Elevation (topographie)"""
     
-    def __init__(self):
-        super().__init__('open_elevation')
+    def __init__(self, **kwargs):
+        super().__init__('open_elevation', **kwargs)
         self.url_base = "https://api.open-elevation.com/api/v1"
     
     def get_elevation_data(self, points: List[Tuple[float, float]]) -> Dict:
@@ -187,13 +181,15 @@ class OpenElevationService(APIServiceBase):
                 elevations = [result['elevation'] for result in data['results'] if 'elevation' in result]
                 
                 if elevations:
+                    elevation_min = min(elevations)
+                    elevation_max = max(elevations)
                     processed['elevation_moyenne'] = sum(elevations) / len(elevations)
-                    processed['elevation_min'] = min(elevations)
-                    processed['elevation_max'] = max(elevations)
+                    processed['elevation_min'] = elevation_min
+                    processed['elevation_max'] = elevation_max
                     
                     # Calcul simple de la pente (différence max-min)
                     if len(elevations) > 1:
-                        elevation_range = max(elevations) - min(elevations)
+                        elevation_range = elevation_max - elevation_min
                         # Approximation de la pente en degrés
                         processed['pente_moyenne'] = elevation_range / len(elevations)
                         
@@ -206,8 +202,8 @@ class OpenElevationService(APIServiceBase):
 class NOAATidesService(APIServiceBase):
     """Service pour l'API NOAA Tides and Currents (marées)"""
     
-    def __init__(self):
-        super().__init__('noaa_tides')
+    def __init__(self, **kwargs):
+        super().__init__('noaa_tides', **kwargs)
         self.url_base = "https://api.tidesandcurrents.noaa.gov/api/prod/datagetter"
     
     def get_tide_data(self, station_id: str, start_date: str, end_date: str) -> Dict:
@@ -263,10 +259,12 @@ class NOAATidesService(APIServiceBase):
                             continue
                 
                 if levels:
+                    niveau_min = min(levels)
+                    niveau_max = max(levels)
                     processed['niveau_mer_moyen'] = sum(levels) / len(levels)
-                    processed['niveau_mer_min'] = min(levels)
-                    processed['niveau_mer_max'] = max(levels)
-                    processed['amplitude_maree'] = max(levels) - min(levels)
+                    processed['niveau_mer_min'] = niveau_min
+                    processed['niveau_mer_max'] = niveau_max
+                    processed['amplitude_maree'] = niveau_max - niveau_min
                     
         except Exception as e:
             logger.error(f"Erreur traitement données marées: {e}")
@@ -277,8 +275,8 @@ class NOAATidesService(APIServiceBase):
 class NASAGIBSService(APIServiceBase):
     """Service pour l'API NASA GIBS (images satellites)"""
     
-    def __init__(self):
-        super().__init__('nasa_gibs')
+    def __init__(self, **kwargs):
+        super().__init__('nasa_gibs', **kwargs)
         self.url_base = "https://gibs.earthdata.nasa.gov/wmts/epsg4326/best"
     
     def get_satellite_image(self, layer: str, bbox: Tuple[float, float, float, float], 
@@ -333,8 +331,8 @@ class NASAGIBSService(APIServiceBase):
 class CopernicusMarineService(APIServiceBase):
     """Service pour l'API Copernicus Marine (courants marins)"""
     
-    def __init__(self):
-        super().__init__('copernicus_marine')
+    def __init__(self, **kwargs):
+        super().__init__('copernicus_marine', **kwargs)
         self.url_base = "https://nrt.cmems-du.eu/motu-web/Motu"
     
     def get_ocean_data(self, latitude: float, longitude: float, 
@@ -400,20 +398,39 @@ class CopernicusMarineService(APIServiceBase):
 class DataConsolidationService:
     """Service de consolidation des données environnementales"""
     
+    SERVICES = ['open_meteo', 'open_elevation', 'noaa_tides', 'nasa_gibs', 'copernicus_marine']
+    
     def __init__(self):
-        self.meteo_service = OpenMeteoService()
-        self.elevation_service = OpenElevationService()
-        self.tides_service = NOAATidesService()
-        self.nasa_service = NASAGIBSService()
-        self.marine_service = CopernicusMarineService()
+        # Charger toutes les clés API en une seule requête
+        cles = CleAPI.objects.filter(
+            service__in=self.SERVICES, actif=True
+        ).only('service', 'cle_api', 'url_base').in_bulk(field_name='service')
+        
+        def parametres(service: str) -> Dict:
+            cle_obj = cles.get(service)
+            if cle_obj is None:
+                logger.warning(f"Aucune clé API trouvée pour {service}")
+                return {'cle_api': None, 'url_base': ""}
+            return {'cle_api': cle_obj.cle_api, 'url_base': cle_obj.url_base}
+        
+        self.meteo_service = OpenMeteoService(**parametres('open_meteo'))
+        self.elevation_service = OpenElevationService(**parametres('open_elevation'))
+        self.tides_service = NOAATidesService(**parametres('noaa_tides'))
+        self.nasa_service = NASAGIBSService(**parametres('nasa_gibs'))
+        self.marine_service = CopernicusMarineService(**parametres('copernicus_marine'))
     
     def collect_all_data(self, zone, start_date: str, end_date: str) -> Dict:
         """Collecte toutes les données pour une zone"""
         logger.info(f"Collecte des données pour la zone {zone.nom}")
         
-        # Coordonnées de la zone
-        if zone.geometrie:
-            bbox = zone.geometrie.extent
+        # Coordonnées de la zone (emprise calculée une seule fois, centroïde
+        # fourni par PostGIS si le queryset a été annoté avec Centroid)
+        geom = zone.geometrie
+        bbox = geom.extent if geom else None
+        centroide = getattr(zone, 'centroide', None)
+        if centroide is not None:
+            center_lon, center_lat = centroide.x, centroide.y
+        elif bbox:
             center_lon = (bbox[0] + bbox[2]) / 2
             center_lat = (bbox[1] + bbox[3]) / 2
         else:
@@ -466,8 +483,7 @@ class DataConsolidationService:
         
         # Collecte des images satellites
         try:
-            if zone.geometrie:
-                bbox = zone.geometrie.extent
+            if bbox:
                 satellite_data = self.nasa_service.get_satellite_image(
                     "MODIS_Terra_CorrectedReflectance_TrueColor", 
                     bbox, 
@@ -482,6 +498,34 @@ class DataConsolidationService:
     
     def save_consolidated_data(self, zone, consolidated_data: Dict) -> DonneesEnvironnementales:
         """Sauvegarde les données consolidées"""
+        donnees_env = self.build_donnees_env(zone, consolidated_data)
+        donnees_env.save()
+        return donnees_env
+    
+    def save_donnees_env_bulk(self, objs: List[DonneesEnvironnementales]) -> List[DonneesEnvironnementales]:
+        """
+        Sauvegarde en une insertion groupée des DonneesEnvironnementales déjà
+        construites. Si la base rejette le lot, chaque ligne est réessayée
+        seule : une ligne invalide ne fait perdre que sa zone
+        """
+        try:
+            with transaction.atomic():
+                return DonneesEnvironnementales.objects.bulk_create(objs, batch_size=TAILLE_LOT)
+        except Exception as e:
+            logger.error(f"Insertion groupée des données environnementales rejetée: {e}")
+        
+        enregistrees = []
+        for donnees_env in objs:
+            try:
+                with transaction.atomic():
+                    donnees_env.save()
+                enregistrees.append(donnees_env)
+            except Exception as e:
+                logger.error(f"Erreur sauvegarde données environnementales zone {donnees_env.zone_id}: {e}")
+        return enregistrees
+    
+    def build_donnees_env(self, zone, consolidated_data: Dict) -> DonneesEnvironnementales:
+        """Construit (sans l'enregistrer) l'objet DonneesEnvironnementales d'une zone"""
         
         # Extraire les données météorologiques
         meteo = consolidated_data.get('meteo', {})
@@ -489,7 +533,7 @@ class DataConsolidationService:
         marine = consolidated_data.get('marines', {})
         
         # Créer l'objet DonneesEnvironnementales
-        donnees_env = DonneesEnvironnementales.objects.create(
+        return DonneesEnvironnementales(
             zone=zone,
             periode_debut=datetime.fromisoformat(consolidated_data['periode_debut'].replace('Z', '+00:00')),
             periode_fin=datetime.fromisoformat(consolidated_data['periode_fin'].replace('Z', '+00:00')),
@@ -519,8 +563,6 @@ class DataConsolidationService:
             # Données complètes
             donnees_completes=consolidated_data
         )
-        
-        return donnees_env
 
 
 # ============================================================================
@@ -535,10 +577,13 @@ from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.preprocessing import StandardScaler
+import hashlib
+import json
 import os
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from django.conf import settings
+from django.core.cache import caches
 from django.utils import timezone
 from django.db.models import Avg, Min, Max, Count
 from datetime import datetime, timedelta
@@ -548,6 +593,10 @@ from .models import (
     CapteurArduino, MesureArduino, DonneesEnvironnementales
 )
 
+# Estimateur chargé par chemin de fichier : {chemin: (date de modification, modèle)}.
+# Un seul modèle est actif à la fois, le cache n'en garde qu'un
+_MODELES_CHARGES = {}
+
 
 class MLPredictionService:
     """Service de prédiction d'érosion basé sur Machine Learning"""
@@ -556,8 +605,12 @@ class MLPredictionService:
         self.models_dir = Path(settings.BASE_DIR) / 'ml_models'
         self.models_dir.mkdir(exist_ok=True)
         self.scaler = StandardScaler()
+        # Modèle actif mémorisé pour la durée de vie du service (une tâche,
+        # une requête), partagé par toutes les prédictions qu'il calcule
+        self._modele_actif = None
     
-    def predire_erosion(self, zone_id: int, features: Dict = None, horizon_jours: int = 30) -> Prediction:
+    def predire_erosion(self, zone_id: int, features: Dict = None, horizon_jours: int = 30,
+                        enregistrer: bool = True) -> Prediction:
         """
         Prédit l'érosion pour une zone donnée
         
@@ -565,6 +618,9 @@ class MLPredictionService:
             zone_id: ID de la zone
             features: Features supplémentaires (optionnel)
             horizon_jours: Horizon de prédiction en jours
+            enregistrer: Si False, la prédiction est retournée sans être
+                sauvegardée et les statistiques du modèle ne sont pas mises
+                à jour (à la charge de l'appelant, ex. insertion groupée)
             
         Returns:
             Objet Prediction créé
@@ -580,21 +636,29 @@ class MLPredictionService:
             if not modele_ml:
                 raise ValueError("Aucun modèle ML actif trouvé")
             
-            # Charger le modèle
-            model = self._load_model(modele_ml)
-            if not model:
-                raise ValueError(f"Impossible de charger le modèle {modele_ml.nom}")
-            
-            # Préparer les features
+            # Préparer les features (toujours recalculées : elles suivent les
+            # nouvelles mesures, l'historique et l'état de la zone)
             features_prepared = self._prepare_features(zone, features, modele_ml)
             
-            # Calculer la prédiction
-            prediction_result = self._calculate_prediction(
-                model, features_prepared, horizon_jours, modele_ml
-            )
+            # Le résultat ne dépend que de la zone, de l'horizon, des features
+            # préparées et du modèle : il est réutilisé depuis le cache partagé
+            cle_cache = self._cle_cache(zone.id, horizon_jours, features_prepared, modele_ml)
+            prediction_result = self._lire_cache(cle_cache)
+            
+            if not prediction_result:
+                # Charger le modèle
+                model = self._load_model(modele_ml)
+                if not model:
+                    raise ValueError(f"Impossible de charger le modèle {modele_ml.nom}")
+                
+                # Calculer la prédiction
+                prediction_result = self._calculate_prediction(
+                    model, features_prepared, horizon_jours, modele_ml
+                )
+                self._ecrire_cache(cle_cache, prediction_result)
             
             # Créer l'objet Prediction
-            prediction = Prediction.objects.create(
+            prediction = Prediction(
                 zone=zone,
                 modele_ml=modele_ml,
                 horizon_jours=horizon_jours,
@@ -611,6 +675,9 @@ class MLPredictionService:
                 },
                 commentaires=f"Prédiction générée par {modele_ml.nom} v{modele_ml.version}"
             )
+            if not enregistrer:
+                return prediction
+            prediction.save()
             
             # Mettre à jour les statistiques du modèle
             modele_ml.nombre_predictions += 1
@@ -624,23 +691,62 @@ class MLPredictionService:
             logger.error(f"Erreur lors de la prédiction: {e}")
             raise
     
-    def _get_active_model(self) -> Optional[ModeleML]:
-        """Récupère le modèle ML actif"""
+    def _cle_cache(self, zone_id: int, horizon_jours: int, features: Dict, modele_ml: ModeleML) -> str:
+        """Clé de cache d'un résultat de prédiction (empreinte SHA-1 des entrées)"""
+        empreinte = hashlib.sha1("|".join((
+            str(zone_id),
+            str(horizon_jours),
+            json.dumps(features, sort_keys=True, default=str),
+            modele_ml.version
+        )).encode()).hexdigest()
+        return f"ml:prediction:{empreinte}"
+    
+    def _lire_cache(self, cle: str):
+        """Lit un résultat de prédiction en cache (None si absent ou cache indisponible)"""
         try:
-            return ModeleML.objects.get(statut='actif')
-        except ModeleML.DoesNotExist:
-            logger.warning("Aucun modèle ML actif trouvé")
+            return caches['predictions'].get(cle)
+        except Exception as e:
+            logger.warning(f"Cache des prédictions indisponible: {e}")
             return None
     
+    def _ecrire_cache(self, cle: str, valeur) -> None:
+        """Met en cache un résultat de prédiction (sans effet si le cache est indisponible)"""
+        try:
+            caches['predictions'].set(cle, valeur, settings.ML_PREDICTION_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Cache des prédictions indisponible: {e}")
+    
+    def _get_active_model(self) -> Optional[ModeleML]:
+        """Récupère le modèle ML actif (une requête par instance du service)"""
+        if self._modele_actif is None:
+            try:
+                self._modele_actif = ModeleML.objects.get(statut='actif')
+            except ModeleML.DoesNotExist:
+                logger.warning("Aucun modèle ML actif trouvé")
+                return None
+        return self._modele_actif
+    
     def _load_model(self, modele_ml: ModeleML):
-        """Charge le modèle depuis le fichier"""
+        """
+        Charge le modèle depuis le fichier. L'estimateur désérialisé est gardé
+        en cache dans le processus et rechargé seulement si le fichier change
+        """
         try:
             model_path = self.models_dir / modele_ml.chemin_fichier
-            if not model_path.exists():
+            try:
+                date_modification = model_path.stat().st_mtime_ns
+            except FileNotFoundError:
                 logger.error(f"Fichier modèle non trouvé: {model_path}")
                 return None
             
+            cle = str(model_path)
+            en_cache = _MODELES_CHARGES.get(cle)
+            if en_cache and en_cache[0] == date_modification:
+                return en_cache[1]
+            
             model = joblib.load(model_path)
+            _MODELES_CHARGES.clear()
+            _MODELES_CHARGES[cle] = (date_modification, model)
             logger.info(f"Modèle {modele_ml.nom} chargé avec succès")
             return model
             
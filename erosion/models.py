@@ -2,8 +2,15 @@ from django.contrib.gis.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from datetime import timedelta
+import hashlib
 import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
 
 
 class Utilisateur(AbstractUser):
@@ -586,9 +593,13 @@ class LogAPICall(models.Model):
         ('quota_depasse', 'Quota dépassé'),
     ]
     
+    # Au-delà de cette taille, les réponses API sont stockées hors base
+    TAILLE_MAX_DONNEES = 16 * 1024
+    
     service_api = models.CharField(max_length=50)
     endpoint_appele = models.URLField()
     parametres_requete = models.JSONField(default=dict)
+    parametres_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="Empreinte SHA-256 des paramètres de la requête")
     statut_reponse = models.CharField(max_length=20, choices=STATUT_CHOICES)
     code_reponse_http = models.PositiveIntegerField(null=True, blank=True)
     temps_reponse_ms = models.PositiveIntegerField(null=True, blank=True)
@@ -608,6 +619,42 @@ class LogAPICall(models.Model):
     
     def __str__(self):
         return f"{self.service_api} - {self.statut_reponse} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+    
+    @classmethod
+    def enregistrer(cls, service_api: str, endpoint: str, params, statut: str,
+                    code_http: int = None, temps_ms: int = None, donnees=None, erreur: str = None):
+        """
+        Journalise un appel API. Seule l'empreinte SHA-256 des paramètres est
+        conservée (détection des doublons) ; les réponses de plus de
+        TAILLE_MAX_DONNEES octets sont écrites dans le stockage de fichiers et
+        remplacées par leur chemin. Un échec de cet écrit ne fait pas échouer
+        la journalisation : la réponse est alors remplacée par un marqueur
+        """
+        params_hash = hashlib.sha256(
+            json.dumps(params, sort_keys=True, separators=(',', ':'), default=str).encode()
+        ).hexdigest()
+        
+        donnees = donnees or {}
+        if donnees:
+            contenu = json.dumps(donnees, separators=(',', ':'), default=str).encode()
+            if len(contenu) > cls.TAILLE_MAX_DONNEES:
+                try:
+                    chemin = default_storage.save(f"api_logs/{uuid.uuid4()}.json", ContentFile(contenu))
+                    donnees = {'path': chemin}
+                except Exception as e:
+                    logger.warning(f"Réponse API non archivée ({service_api}): {e}")
+                    donnees = {'tronque': True, 'taille_octets': len(contenu)}
+        
+        return cls.objects.create(
+            service_api=service_api,
+            endpoint_appele=endpoint,
+            parametres_hash=params_hash,
+            statut_reponse=statut,
+            code_reponse_http=code_http,
+            temps_reponse_ms=temps_ms,
+            donnees_recues=donnees,
+            message_erreur=erreur or ""
+        )
 
 
 # ============================================================================
@@ -806,6 +853,7 @@ class MesureArduino(models.Model):
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['capteur', 'timestamp']),
+            models.Index(fields=['capteur', 'est_valide', '-timestamp']),
             models.Index(fields=['timestamp']),
             models.Index(fields=['qualite_donnee', 'est_valide']),
             models.Index(fields=['source_donnee']),
@@ -1052,11 +1100,15 @@ class EvenementExterne(models.Model):
         verbose_name_plural = "Événements externes"
         ordering = ['-date_evenement']
         indexes = [
+            models.Index(fields=['zone', 'date_evenement']),
             models.Index(fields=['type_evenement', 'intensite']),
             models.Index(fields=['date_evenement', 'statut']),
             models.Index(fields=['source', 'date_reception']),
             models.Index(fields=['niveau_risque', 'zone_erosion']),
             models.Index(fields=['is_traite', 'is_valide']),
+            models.Index(fields=['is_simulation', 'date_evenement']),
+            models.Index(fields=['is_valide', 'date_evenement']),
+            models.Index(fields=['is_traite', 'date_evenement']),
         ]
     
     def save(self, *args, **kwargs):
@@ -1176,6 +1228,7 @@ class FusionDonnees(models.Model):
         indexes = [
             models.Index(fields=['zone', 'date_creation']),
             models.Index(fields=['statut', 'score_erosion']),
+            models.Index(fields=['statut', 'date_creation']),
         ]
     
     def __str__(self):
@@ -1248,21 +1301,25 @@ class PredictionEnrichie(models.Model):
             models.Index(fields=['zone', 'date_prediction']),
             models.Index(fields=['erosion_predite', 'niveau_erosion']),
             models.Index(fields=['confiance_pourcentage']),
+            models.Index(fields=['date_prediction']),
         ]
     
     def save(self, *args, **kwargs):
         # Calculer automatiquement le niveau de confiance
-        if self.confiance_pourcentage < 60:
-            self.niveau_confiance = 'faible'
-        elif self.confiance_pourcentage < 80:
-            self.niveau_confiance = 'moyenne'
-        elif self.confiance_pourcentage < 95:
-            self.niveau_confiance = 'elevee'
-        else:
-            self.niveau_confiance = 'tres_elevee'
-        
+        self.niveau_confiance = self.calculer_niveau_confiance(self.confiance_pourcentage)
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def calculer_niveau_confiance(confiance_pourcentage: float) -> str:
+        """Catégorie de confiance (aussi utilisée pour les créations en lot, qui n'appellent pas save())"""
+        if confiance_pourcentage < 60:
+            return 'faible'
+        elif confiance_pourcentage < 80:
+            return 'moyenne'
+        elif confiance_pourcentage < 95:
+            return 'elevee'
+        return 'tres_elevee'
+    
     def __str__(self):
         return f"{self.zone.nom} - Érosion: {'OUI' if self.erosion_predite else 'NON'} ({self.confiance_pourcentage:.1f}%) - {self.date_prediction.strftime('%Y-%m-%d')}"
 
@@ -1338,6 +1395,8 @@ class AlerteEnrichie(models.Model):
             models.Index(fields=['zone', 'date_creation']),
             models.Index(fields=['niveau', 'est_active']),
             models.Index(fields=['type', 'est_resolue']),
+            models.Index(fields=['est_resolue', 'date_creation']),
+            models.Index(fields=['est_resolue', 'date_resolution']),
         ]
     
     def __str__(self):
@@ -1394,6 +1453,7 @@ class ArchiveDonnees(models.Model):
             models.Index(fields=['type_donnees', 'zone']),
             models.Index(fields=['periode_debut', 'periode_fin']),
             models.Index(fields=['date_archivage']),
+            models.Index(fields=['est_disponible', 'date_archivage']),
         ]
     
     def __str__(self):
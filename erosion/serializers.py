@@ -420,7 +420,7 @@ class LogAPICallSerializer(serializers.ModelSerializer):
     class Meta:
         model = LogAPICall
         fields = [
-            'id', 'service_api', 'endpoint_appele', 'parametres_requete',
+            'id', 'service_api', 'endpoint_appele', 'parametres_hash',
             'statut_reponse', 'code_reponse_http', 'temps_reponse_ms',
             'donnees_recues', 'message_erreur', 'timestamp', 'utilisateur', 'utilisateur_nom'
         ]
@@ -5,23 +5,90 @@ NOTE: Cette analyse dérive des DERNIÈRES mesures capteurs disponibles et des
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
+from datetime import datetime, timedelta, timezone as dt_timezone
 from typing import Dict, List, Tuple, Optional
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Q, Avg, Max, Min, Count
-import json
+from django.db import transaction, connection
+from django.db.models import Q, F, Avg, Max, Min, Count, TextField
+from django.db.models.functions import Cast, JSONObject
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 
 from ..models import (
-    EvenementExterne, MesureArduino, Zone, FusionDonnees, 
-    PredictionEnrichie, AlerteEnrichie, HistoriqueErosion
+    EvenementExterne, MesureArduino, CapteurArduino, Zone, FusionDonnees, 
+    PredictionEnrichie, AlerteEnrichie, HistoriqueErosion, ArchiveDonnees
 )
 
 logger = logging.getLogger(__name__)
 
 
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Taille des lots pour les insertions groupées
+TAILLE_LOT = getattr(settings, 'BULK_CREATE_BATCH_SIZE', 500)
+
+# Fenêtre d'analyse : 7 jours avant et après chaque événement
+FENETRE_ANALYSE = timedelta(days=7)
+
+# Niveaux d'érosion et seuils de score correspondants
+NIVEAUX_EROSION = np.array(['faible', 'modere', 'eleve', 'critique'])
+SEUILS_NIVEAU_EROSION = np.array([40, 60, 80])
+
+# Modificateurs de score selon le type d'événement : chaque type reçoit un
+# identifiant stable qui indexe directement la table MODIFICATEURS_EVENEMENT
+TYPE_EVENEMENT_ID = {
+    'tempete': 0,
+    'ouragan': 1,
+    'cyclone': 2,
+    'tsunami': 3,
+    'vague': 4,
+    'vent_fort': 5,
+    'pluie': 6,
+    'maree_exceptionnelle': 7,
+    'secheresse': 8,
+    'inondation': 9,
+    'autre': 10
+}
+MODIFICATEURS_EVENEMENT = np.array(
+    [1.2, 1.5, 1.5, 2.0, 1.1, 1.0, 0.8, 1.3, 0.6, 1.1, 1.0], dtype=np.float64
+)
+
+# Poids de chaque type de capteur dans le score des mesures
+POIDS_CAPTEUR = {
+    'temperature': 0.8,
+    'humidite': 0.6,
+    'pression': 0.7,
+    'vent_vitesse': 1.2,
+    'vent_direction': 0.9,
+    'pluviometrie': 1.1,
+    'niveau_mer': 1.5,
+    'salinite': 1.0,
+    'ph': 0.8,
+    'turbidite': 1.0,
+    'gps': 0.5,
+    'accelerometre': 0.7,
+    'gyroscope': 0.6
+}
+
+# Même table sous forme de tableaux triés par type, le dernier poids (1.0)
+# s'appliquant aux types de capteur inconnus
+TYPES_CAPTEUR = np.array(sorted(POIDS_CAPTEUR))
+POIDS_CAPTEUR_LUT = np.array([POIDS_CAPTEUR[t] for t in TYPES_CAPTEUR] + [1.0])
+
+# Types de données archivables
+TYPES_ARCHIVE = ('mesures_arduino', 'evenements_externes', 'fusions', 'predictions', 'alertes')
+
+
+def _en_microsecondes(date: datetime) -> int:
+    """Convertir une date (aware) en entier de microsecondes depuis l'epoch"""
+    return (date - EPOCH) // timedelta(microseconds=1)
+
+
 class AnalyseFusionService:
     """Service principal pour l'analyse de fusion des données"""
     
@@ -30,36 +97,39 @@ class AnalyseFusionService:
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.is_trained = False
     
-    def analyser_evenement(self, evenement_id: int) -> Dict:
+    def analyser_evenement(self, evenement_id: int,
+                           historique_cache: Optional[Dict[int, List[Dict]]] = None,
+                           contexte_cache: Optional[Dict[int, Dict]] = None) -> Dict:
         """
-        Analyser un événement externe spécifique et créer une fusion de données
+        Analyser un événement externe spécifique et créer une fusion de données.
+        
+        historique_cache : historiques d'érosion par zone_id, partagés entre
+        plusieurs appels (complété au besoin).
+        contexte_cache : événements de zone déjà chargés par zone_id (voir
+        _charger_evenements_zone), couvrant la fenêtre de l'événement.
         """
         try:
-            evenement = EvenementExterne.objects.get(id=evenement_id)
-            zone = evenement.zone
+            evenement = EvenementExterne.objects.select_related('zone').get(id=evenement_id)
             
-            logger.info(f"Analyse de l'événement {evenement_id}: {evenement.type_evenement}")
+            logger.info("Analyse de l'événement %s: %s", evenement_id, evenement.type_evenement)
             
-            # Définir la période d'analyse (7 jours avant et après l'événement)
-            periode_debut = evenement.date_evenement - timedelta(days=7)
-            periode_fin = evenement.date_evenement + timedelta(days=7)
+            historique_erosion = None
+            if historique_cache is not None:
+                if evenement.zone_id not in historique_cache:
+                    historique_cache[evenement.zone_id] = self._recuperer_historique_erosion(evenement.zone)
+                historique_erosion = historique_cache[evenement.zone_id]
+            contexte_zone = contexte_cache.get(evenement.zone_id) if contexte_cache else None
             
-            # Récupérer les données de la zone
-            mesures_arduino = self._recuperer_mesures_arduino(zone, periode_debut, periode_fin)
-            evenements_contexte = self._recuperer_evenements_contexte(zone, periode_debut, periode_fin)
-            historique_erosion = self._recuperer_historique_erosion(zone)
-            
-            # Créer la fusion de données
-            fusion = self._creer_fusion_donnees(
-                evenement, zone, periode_debut, periode_fin,
-                mesures_arduino, evenements_contexte, historique_erosion
+            fusions = self._fusionner_evenements(
+                [evenement], evenement.zone,
+                contexte_zone=contexte_zone, historique_erosion=historique_erosion
             )
-            
-            # Analyser et prédire
-            prediction = self._generer_prediction(fusion)
-            
-            # Créer des alertes si nécessaire
-            alertes = self._creer_alertes(fusion, prediction)
+            if not fusions:
+                return {'success': False, 'message': "Fusion impossible pour l'événement"}
+            fusion = fusions[0]
+            resultats = self._finaliser_fusions(fusions)
+            self._enregistrer_resultats(resultats)
+            _, prediction, alertes = resultats[0]
             
             return {
                 'success': True,
@@ -87,36 +157,50 @@ class AnalyseFusionService:
             periode_fin = timezone.now()
             periode_debut = periode_fin - timedelta(days=periode_jours)
             
-            logger.info(f"Analyse de la zone {zone.nom} sur {periode_jours} jours")
+            logger.info("Analyse de la zone %s sur %s jours", zone.nom, periode_jours)
             
-            # Récupérer tous les événements de la période
-            evenements = EvenementExterne.objects.filter(
+            # Récupérer tous les événements de la période (une seule requête,
+            # limitée aux colonnes utilisées par l'analyse)
+            evenements = list(EvenementExterne.objects.filter(
                 zone=zone,
                 date_evenement__gte=periode_debut,
                 date_evenement__lte=periode_fin,
                 is_valide=True
-            ).order_by('date_evenement')
-            
-            fusions_creees = []
-            predictions_creees = []
-            alertes_creees = []
-            
-            for evenement in evenements:
-                # Analyser chaque événement
-                resultat = self.analyser_evenement(evenement.id)
-                
-                if resultat['success']:
-                    fusions_creees.append(resultat['fusion_id'])
-                    if resultat['prediction_id']:
-                        predictions_creees.append(resultat['prediction_id'])
-                    alertes_creees.extend(resultat.get('alertes_crees', []))
+            ).only(
+                'id', 'zone_id', 'type_evenement', 'intensite', 'date_evenement', 'duree'
+            ).order_by('date_evenement'))
+            
+            # Charger une seule fois les données couvrant toutes les fenêtres
+            # d'analyse (±7 jours autour de chaque événement)
+            fenetre_debut = periode_debut - FENETRE_ANALYSE
+            fenetre_fin = periode_fin + FENETRE_ANALYSE
+            mesures_zone = self._charger_mesures_zone(zone, fenetre_debut, fenetre_fin)
+            contexte_zone = self._charger_evenements_zone(zone, fenetre_debut, fenetre_fin)
+            historique_erosion = self._recuperer_historique_erosion(zone)
+            
+            # Statistiques des capteurs sur la fenêtre de chaque événement
+            mesures_par_evenement = self._statistiques_glissantes(
+                mesures_zone, [evenement.date_evenement for evenement in evenements]
+            )
+            
+            # Analyser tous les événements à partir des données déjà chargées
+            fusions = self._fusionner_evenements(
+                evenements, zone, mesures_par_evenement, contexte_zone, historique_erosion,
+                maintenant=periode_fin
+            )
+            
+            # Probabilités et niveaux calculés en une fois pour tout le lot
+            resultats = self._finaliser_fusions(fusions)
+            
+            # Enregistrer tous les résultats en une insertion par table
+            fusions_creees, predictions_creees, alertes_creees = self._enregistrer_resultats(resultats)
             
             return {
                 'success': True,
                 'zone_id': zone_id,
                 'zone_nom': zone.nom,
                 'periode_jours': periode_jours,
-                'evenements_analyses': evenements.count(),
+                'evenements_analyses': len(evenements),
                 'fusions_creees': len(fusions_creees),
                 'predictions_creees': len(predictions_creees),
                 'alertes_creees': len(alertes_creees),
@@ -130,51 +214,291 @@ class AnalyseFusionService:
             logger.error(f"Erreur lors de l'analyse de la zone {zone_id}: {e}")
             return {'success': False, 'message': f'Erreur: {str(e)}'}
     
+    def _fusionner_evenements(self, evenements: List[EvenementExterne], zone: Zone,
+                              mesures_par_evenement: Optional[List[List[Dict]]] = None,
+                              contexte_zone: Optional[Dict] = None,
+                              historique_erosion: Optional[List[Dict]] = None,
+                              maintenant: Optional[datetime] = None) -> List[FusionDonnees]:
+        """
+        Construire (sans les enregistrer) les fusions de données d'un lot
+        d'événements d'une même zone. Les données de zone déjà chargées
+        (analyse par lot) sont réutilisées, sinon elles sont récupérées en base.
+        """
+        if maintenant is None:
+            maintenant = timezone.now()
+        if mesures_par_evenement is None:
+            mesures_par_evenement = [None] * len(evenements)
+        if historique_erosion is None:
+            historique_erosion = self._recuperer_historique_erosion(zone)
+        
+        # Rassembler les données de la fenêtre d'analyse de chaque événement
+        evenements_retenus = []
+        fenetres = []
+        for evenement, mesures_arduino in zip(evenements, mesures_par_evenement):
+            try:
+                fenetres.append(self._donnees_fenetre(evenement, zone, mesures_arduino, contexte_zone))
+                evenements_retenus.append(evenement)
+            except Exception as e:
+                logger.error("Erreur lors de l'analyse de l'événement %s: %s", evenement.id, e)
+        
+        if not fenetres:
+            return []
+        
+        # Scores de chaque facteur pour tout le lot, puis combinaison vectorisée
+        nombre = len(fenetres)
+        scores_evenements = self._calculer_scores_evenements(evenements_retenus)
+        scores_mesures = np.fromiter(
+            (self._calculer_score_mesures(f['mesures_arduino']) for f in fenetres),
+            dtype=np.float64, count=nombre
+        )
+        scores_contexte = np.fromiter(
+            (self._calculer_score_contexte(f['evenements_contexte'], f['intensites_contexte']) for f in fenetres),
+            dtype=np.float64, count=nombre
+        )
+        score_historique = self._calculer_score_historique(historique_erosion)
+        scores = self._calculer_scores_erosion(
+            scores_evenements, scores_mesures, scores_contexte, score_historique
+        )
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for evenement, score_evenement, score_mesures, score_contexte, score in zip(
+                evenements_retenus, scores_evenements, scores_mesures, scores_contexte, scores
+            ):
+                logger.debug("Scores événement %s: événement=%.2f, mesures=%.2f, contexte=%.2f, "
+                             "historique=%.2f, total=%.2f", evenement.id, score_evenement,
+                             score_mesures, score_contexte, score_historique, score)
+        
+        return [
+            self._creer_fusion_donnees(evenement, zone, fenetre, float(score), maintenant)
+            for evenement, fenetre, score in zip(evenements_retenus, fenetres, scores)
+        ]
+    
+    def _donnees_fenetre(self, evenement: EvenementExterne, zone: Zone,
+                         mesures_arduino: Optional[List[Dict]] = None,
+                         contexte_zone: Optional[Dict] = None) -> Dict:
+        """
+        Données de la fenêtre d'analyse d'un événement (7 jours avant et après)
+        """
+        periode_debut = evenement.date_evenement - FENETRE_ANALYSE
+        periode_fin = evenement.date_evenement + FENETRE_ANALYSE
+        
+        if mesures_arduino is None:
+            mesures_arduino = self._recuperer_mesures_arduino(zone, periode_debut, periode_fin)
+        if contexte_zone is not None:
+            fenetre = self._fenetre(contexte_zone['timestamps'], periode_debut, periode_fin)
+            evenements_contexte = contexte_zone['evenements'][fenetre]
+            intensites_contexte = contexte_zone['intensites'][fenetre]
+        else:
+            evenements_contexte = self._recuperer_evenements_contexte(zone, periode_debut, periode_fin)
+            intensites_contexte = None
+        
+        return {
+            'periode_debut': periode_debut,
+            'periode_fin': periode_fin,
+            'mesures_arduino': mesures_arduino,
+            'evenements_contexte': evenements_contexte,
+            'intensites_contexte': intensites_contexte
+        }
+    
+    def _finaliser_fusions(self, fusions: List[FusionDonnees]) -> List[Tuple]:
+        """
+        Compléter un lot de fusions (probabilité d'érosion) et construire
+        les prédictions et alertes associées
+        """
+        nombre = len(fusions)
+        scores = np.fromiter((f.score_erosion for f in fusions), dtype=np.float64, count=nombre)
+        probabilites, niveaux = self._calculer_probabilites_et_niveaux(scores)
+        
+        # Analyser et prédire
+        predictions = []
+        for fusion, probabilite, niveau_erosion in zip(fusions, probabilites, niveaux):
+            fusion.probabilite_erosion = float(probabilite)
+            predictions.append(self._generer_prediction(fusion, str(niveau_erosion)))
+        
+        # Créer des alertes si nécessaire
+        alertes = self._creer_alertes(fusions, predictions, probabilites, niveaux)
+        
+        return list(zip(fusions, predictions, alertes))
+    
+    def _enregistrer_resultats(self, resultats: List[Tuple]) -> Tuple[List, List, List]:
+        """
+        Enregistrer en lot, dans une seule transaction, les fusions, prédictions
+        et alertes construites par _finaliser_fusions
+        """
+        fusions = [fusion for fusion, _, _ in resultats]
+        predictions = [prediction for _, prediction, _ in resultats if prediction]
+        alertes = [alerte for _, _, alertes_evenement in resultats for alerte in alertes_evenement]
+        
+        with transaction.atomic():
+            # Les clés primaires des parents sont renseignées par bulk_create
+            # avant l'insertion des prédictions et alertes qui les référencent
+            FusionDonnees.objects.bulk_create(fusions, batch_size=TAILLE_LOT)
+            PredictionEnrichie.objects.bulk_create(predictions, batch_size=TAILLE_LOT)
+            AlerteEnrichie.objects.bulk_create(alertes, batch_size=TAILLE_LOT)
+        
+        logger.info("Enregistré %d fusions, %d prédictions et %d alertes", len(fusions), len(predictions), len(alertes))
+        return fusions, predictions, alertes
+    
+    def _charger_mesures_zone(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> Dict:
+        """
+        Charger en une requête les mesures Arduino valides de la zone, triées par
+        capteur puis par date, avec les sommes cumulées de chaque capteur
+        """
+        capteurs_zone = self._charger_capteurs_zone(zone)
+        # Filtrer sur les identifiants de capteur (sans jointure) pour parcourir
+        # l'index (capteur, timestamp) capteur par capteur, déjà dans l'ordre voulu
+        lignes = list(MesureArduino.objects.filter(
+            capteur_id__in=list(capteurs_zone),
+            timestamp__gte=periode_debut,
+            timestamp__lte=periode_fin,
+            est_valide=True
+        ).order_by('capteur_id', 'timestamp').values_list('capteur_id', 'valeur', 'timestamp'))
+        
+        nombre = len(lignes)
+        if not nombre:
+            return {'lignes': lignes, 'capteurs': []}
+        
+        capteur_ids = np.fromiter((ligne[0] for ligne in lignes), dtype=np.int64, count=nombre)
+        valeurs = np.fromiter((ligne[1] for ligne in lignes), dtype=np.float64, count=nombre)
+        timestamps = np.fromiter((_en_microsecondes(ligne[2]) for ligne in lignes), dtype=np.int64, count=nombre)
+        
+        # Découper les tableaux en un bloc contigu par capteur
+        bornes = np.flatnonzero(np.diff(capteur_ids)) + 1
+        capteurs = []
+        for debut, fin in zip(np.concatenate(([0], bornes)), np.concatenate((bornes, [nombre]))):
+            valeurs_capteur = valeurs[debut:fin]
+            # Sommes cumulées des écarts à la moyenne (limite les erreurs d'arrondi sur la variance)
+            centre = valeurs_capteur.mean()
+            ecarts = valeurs_capteur - centre
+            capteur_id = lignes[debut][0]
+            capteur_nom, capteur_type = capteurs_zone[capteur_id]
+            capteurs.append({
+                'capteur_id': capteur_id,
+                'capteur_nom': capteur_nom,
+                'capteur_type': capteur_type,
+                'debut': int(debut),
+                'timestamps': timestamps[debut:fin],
+                'valeurs': valeurs_capteur,
+                'centre': centre,
+                'sommes': np.concatenate(([0.0], np.cumsum(ecarts))),
+                'sommes_carres': np.concatenate(([0.0], np.cumsum(ecarts * ecarts)))
+            })
+        
+        return {'lignes': lignes, 'capteurs': capteurs}
+    
+    def _charger_capteurs_zone(self, zone: Zone) -> Dict[int, Tuple[str, str]]:
+        """
+        Nom et type de chaque capteur Arduino de la zone, indexés par identifiant
+        """
+        return {
+            capteur_id: (nom, type_capteur)
+            for capteur_id, nom, type_capteur in CapteurArduino.objects.filter(
+                zone=zone
+            ).values_list('id', 'nom', 'type_capteur')
+        }
+    
+    def _statistiques_glissantes(self, mesures_zone: Dict, dates_evenements: List[datetime]) -> List[List[Dict]]:
+        """
+        Statistiques par capteur sur la fenêtre de ±7 jours de chaque événement.
+        Les bornes de toutes les fenêtres sont trouvées en une recherche dichotomique
+        par capteur, et moyenne/écart-type se déduisent des sommes cumulées sans
+        reparcourir les mesures pour chaque événement.
+        """
+        nombre_evenements = len(dates_evenements)
+        centres = np.fromiter(
+            (_en_microsecondes(d) for d in dates_evenements), dtype=np.int64, count=nombre_evenements
+        )
+        demi_fenetre = FENETRE_ANALYSE // timedelta(microseconds=1)
+        lignes = mesures_zone['lignes']
+        
+        resultats = [[] for _ in range(nombre_evenements)]
+        for capteur in mesures_zone['capteurs']:
+            bas = np.searchsorted(capteur['timestamps'], centres - demi_fenetre, side='left')
+            hauts = np.searchsorted(capteur['timestamps'], centres + demi_fenetre, side='right')
+            nombres = hauts - bas
+            diviseurs = np.maximum(nombres, 1)
+            
+            moyennes_ecarts = (capteur['sommes'][hauts] - capteur['sommes'][bas]) / diviseurs
+            variances = (capteur['sommes_carres'][hauts] - capteur['sommes_carres'][bas]) / diviseurs - moyennes_ecarts ** 2
+            ecarts_types = np.sqrt(np.maximum(variances, 0.0))
+            
+            for i in np.flatnonzero(nombres):
+                b, h = bas[i], hauts[i]
+                valeurs = capteur['valeurs'][b:h]
+                resultats[i].append({
+                    'capteur_id': capteur['capteur_id'],
+                    'capteur_nom': capteur['capteur_nom'],
+                    'capteur_type': capteur['capteur_type'],
+                    'nombre_mesures': int(nombres[i]),
+                    'valeur_moyenne': float(capteur['centre'] + moyennes_ecarts[i]),
+                    'valeur_min': float(valeurs.min()),
+                    'valeur_max': float(valeurs.max()),
+                    'valeur_std': float(ecarts_types[i]),
+                    'periode_debut': lignes[capteur['debut'] + b][2],
+                    'periode_fin': lignes[capteur['debut'] + h - 1][2]
+                })
+        
+        return resultats
+    
+    def _charger_evenements_zone(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> Dict:
+        """
+        Charger en une requête les événements de contexte de la zone, triés par date
+        """
+        evenements = self._recuperer_evenements_contexte(zone, periode_debut, periode_fin)
+        
+        return {
+            'evenements': evenements,
+            'timestamps': np.fromiter(
+                (_en_microsecondes(e['date_evenement']) for e in evenements), dtype=np.int64, count=len(evenements)
+            ),
+            'intensites': np.fromiter(
+                (e['intensite'] for e in evenements), dtype=np.float64, count=len(evenements)
+            )
+        }
+    
+    def _fenetre(self, timestamps: np.ndarray, periode_debut: datetime, periode_fin: datetime) -> slice:
+        """
+        Bornes (incluses) d'une période dans un tableau de timestamps trié
+        """
+        debut = np.searchsorted(timestamps, _en_microsecondes(periode_debut), side='left')
+        fin = np.searchsorted(timestamps, _en_microsecondes(periode_fin), side='right')
+        return slice(int(debut), int(fin))
+    
     def _recuperer_mesures_arduino(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> List[Dict]:
         """
         Récupérer les mesures Arduino de la zone pour la période donnée
         """
-        mesures = MesureArduino.objects.filter(
-            capteur__zone=zone,
+        # Filtre sur les identifiants de capteur : l'index (capteur, timestamp)
+        # couvre directement la plage de dates de chaque capteur
+        capteurs_zone = self._charger_capteurs_zone(zone)
+        mesures = list(MesureArduino.objects.filter(
+            capteur_id__in=list(capteurs_zone),
             timestamp__gte=periode_debut,
             timestamp__lte=periode_fin,
             est_valide=True
-        ).select_related('capteur').order_by('timestamp')
-        
-        # Grouper par capteur et calculer des statistiques
-        mesures_par_capteur = {}
-        for mesure in mesures:
-            capteur_id = mesure.capteur.id
-            if capteur_id not in mesures_par_capteur:
-                mesures_par_capteur[capteur_id] = {
-                    'capteur_id': capteur_id,
-                    'capteur_nom': mesure.capteur.nom,
-                    'capteur_type': mesure.capteur.type_capteur,
-                    'valeurs': [],
-                    'timestamps': []
-                }
-            
-            mesures_par_capteur[capteur_id]['valeurs'].append(mesure.valeur)
-            mesures_par_capteur[capteur_id]['timestamps'].append(mesure.timestamp)
-        
-        # Calculer les statistiques pour chaque capteur
+        ).order_by('timestamp').values_list('capteur_id', 'valeur', 'timestamp'))
+        
+        # Grouper par capteur et calculer des statistiques (agrégations pandas)
         mesures_analysees = []
-        for capteur_data in mesures_par_capteur.values():
-            if capteur_data['valeurs']:
-                mesures_analysees.append({
-                    'capteur_id': capteur_data['capteur_id'],
-                    'capteur_nom': capteur_data['capteur_nom'],
-                    'capteur_type': capteur_data['capteur_type'],
-                    'nombre_mesures': len(capteur_data['valeurs']),
-                    'valeur_moyenne': np.mean(capteur_data['valeurs']),
-                    'valeur_min': np.min(capteur_data['valeurs']),
-                    'valeur_max': np.max(capteur_data['valeurs']),
-                    'valeur_std': np.std(capteur_data['valeurs']),
-                    'periode_debut': min(capteur_data['timestamps']),
-                    'periode_fin': max(capteur_data['timestamps'])
-                })
+        if mesures:
+            df = pd.DataFrame(mesures, columns=['capteur_id', 'valeur', 'timestamp'])
+            groupes = df.groupby('capteur_id', sort=False)
+            stats = groupes.agg(
+                nombre_mesures=('valeur', 'count'),
+                valeur_moyenne=('valeur', 'mean'),
+                valeur_min=('valeur', 'min'),
+                valeur_max=('valeur', 'max'),
+                periode_debut=('timestamp', 'min'),
+                periode_fin=('timestamp', 'max')
+            )
+            stats['valeur_std'] = groupes['valeur'].std(ddof=0)  # Écart-type de population, comme np.std
+            mesures_analysees = stats.reset_index().to_dict('records')
+            
+            # Métadonnées du capteur, lues une fois par capteur
+            for mesure in mesures_analysees:
+                mesure['capteur_nom'], mesure['capteur_type'] = capteurs_zone[mesure['capteur_id']]
         
-        logger.info(f"Récupéré {len(mesures_analysees)} capteurs avec mesures pour la zone {zone.nom}")
+        logger.info("Récupéré %d capteurs avec mesures pour la zone %s", len(mesures_analysees), zone.nom)
         return mesures_analysees
     
     def _recuperer_evenements_contexte(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> List[Dict]:
@@ -200,125 +524,93 @@ class AnalyseFusionService:
                 'niveau_risque': evenement.niveau_risque
             })
         
-        logger.info(f"Récupéré {len(evenements_analysees)} événements de contexte pour la zone {zone.nom}")
+        logger.info("Récupéré %d événements de contexte pour la zone %s", len(evenements_analysees), zone.nom)
         return evenements_analysees
     
     def _recuperer_historique_erosion(self, zone: Zone) -> List[Dict]:
         """
         Récupérer l'historique d'érosion de la zone
         """
-        historique = HistoriqueErosion.objects.filter(
+        historique_analyse = list(HistoriqueErosion.objects.filter(
             zone=zone
-        ).order_by('-date_mesure')[:12]  # Derniers 12 mois
-        
-        historique_analyse = []
-        for h in historique:
-            historique_analyse.append({
-                'date_mesure': h.date_mesure,
-                'taux_erosion_m_an': h.taux_erosion_m_an,
-                'methode_mesure': h.methode_mesure,
-                'precision_m': h.precision_m
-            })
+        ).order_by('-date_mesure').values(
+            'date_mesure', 'taux_erosion_m_an', 'methode_mesure', 'precision_m'
+        )[:12])  # Derniers 12 mois
         
-        logger.info(f"Récupéré {len(historique_analyse)} mesures d'historique pour la zone {zone.nom}")
+        logger.info("Récupéré %d mesures d'historique pour la zone %s", len(historique_analyse), zone.nom)
         return historique_analyse
     
-    def _creer_fusion_donnees(self, evenement: EvenementExterne, zone: Zone, 
-                            periode_debut: datetime, periode_fin: datetime,
-                            mesures_arduino: List[Dict], evenements_contexte: List[Dict],
-                            historique_erosion: List[Dict]) -> FusionDonnees:
+    def _creer_fusion_donnees(self, evenement: EvenementExterne, zone: Zone,
+                            fenetre: Dict, score_erosion: float, date_fin: datetime) -> FusionDonnees:
         """
-        Créer une fusion de données à partir des informations collectées
+        Construire (sans l'enregistrer) une fusion de données à partir des
+        informations collectées sur la fenêtre de l'événement
         """
-        # Calculer le score d'érosion basé sur les données
-        score_erosion = self._calculer_score_erosion(
-            evenement, mesures_arduino, evenements_contexte, historique_erosion
-        )
-        
-        # Calculer la probabilité d'érosion
-        probabilite_erosion = self._calculer_probabilite_erosion(score_erosion)
+        mesures_arduino = fenetre['mesures_arduino']
+        evenements_contexte = fenetre['evenements_contexte']
         
         # Identifier les facteurs dominants
         facteurs_dominants = self._identifier_facteurs_dominants(
             evenement, mesures_arduino, evenements_contexte
         )
         
-        # Créer la fusion
-        fusion = FusionDonnees.objects.create(
+        # Construire la fusion
+        fusion = FusionDonnees(
             zone=zone,
             evenement_externe=evenement,
-            periode_debut=periode_debut,
-            periode_fin=periode_fin,
+            periode_debut=fenetre['periode_debut'],
+            periode_fin=fenetre['periode_fin'],
             mesures_arduino_count=len(mesures_arduino),
             evenements_externes_count=len(evenements_contexte),
             score_erosion=score_erosion,
-            probabilite_erosion=probabilite_erosion,
             facteurs_dominants=facteurs_dominants,
             statut='terminee',
-            date_fin=timezone.now(),
+            date_fin=date_fin,
             commentaires=f"Fusion créée automatiquement pour l'événement {evenement.type_evenement}"
         )
         
-        logger.info(f"Fusion créée: {fusion.id} avec score {score_erosion:.2f}")
+        logger.debug("Fusion construite pour l'événement %s avec score %.2f", evenement.id, score_erosion)
         return fusion
     
-    def _calculer_score_erosion(self, evenement: EvenementExterne, mesures_arduino: List[Dict],
-                              evenements_contexte: List[Dict], historique_erosion: List[Dict]) -> float:
+    def _calculer_scores_erosion(self, scores_evenements: np.ndarray, scores_mesures: np.ndarray,
+                                 scores_contexte: np.ndarray, score_historique: float) -> np.ndarray:
         """
-        Calculer un score d'érosion basé sur tous les facteurs
+        Combiner les scores de chaque facteur en scores d'érosion (0-100) pour un lot d'événements
         """
-        score = 0.0
-        
-        # Facteur événement principal (40% du score)
-        score_evenement = self._calculer_score_evenement(evenement)
-        score += score_evenement * 0.4
-        
-        # Facteur mesures Arduino (30% du score)
-        score_mesures = self._calculer_score_mesures(mesures_arduino)
-        score += score_mesures * 0.3
-        
-        # Facteur événements de contexte (20% du score)
-        score_contexte = self._calculer_score_contexte(evenements_contexte)
-        score += score_contexte * 0.2
-        
-        # Facteur historique (10% du score)
-        score_historique = self._calculer_score_historique(historique_erosion)
-        score += score_historique * 0.1
+        # Événement principal 40%, mesures Arduino 30%, événements de contexte 20%, historique 10%
+        scores = (scores_evenements * 0.4 + scores_mesures * 0.3
+                  + scores_contexte * 0.2 + score_historique * 0.1)
         
         # Normaliser entre 0 et 100
-        score = max(0, min(100, score))
-        
-        logger.debug(f"Scores: événement={score_evenement:.2f}, mesures={score_mesures:.2f}, "
-                    f"contexte={score_contexte:.2f}, historique={score_historique:.2f}, total={score:.2f}")
-        
-        return score
+        return np.clip(scores, 0, 100)
     
-    def _calculer_score_evenement(self, evenement: EvenementExterne) -> float:
-        """
-        Calculer le score basé sur l'événement principal
-        """
-        score = evenement.intensite
-        
-        # Modificateurs selon le type d'événement
-        modificateurs = {
-            'tempete': 1.2,
-            'ouragan': 1.5,
-            'cyclone': 1.5,
-            'tsunami': 2.0,
-            'vague': 1.1,
-            'vent_fort': 1.0,
-            'pluie': 0.8,
-            'maree_exceptionnelle': 1.3,
-            'secheresse': 0.6,
-            'inondation': 1.1,
-            'autre': 1.0
-        }
+    def _calculer_scores_evenements(self, evenements) -> np.ndarray:
+        """
+        Calculer en une passe vectorisée le score de plusieurs événements principaux
+        """
+        nombre = len(evenements)
+        intensites = np.fromiter((e.intensite for e in evenements), dtype=np.float64, count=nombre)
         
-        modificateur = modificateurs.get(evenement.type_evenement, 1.0)
-        score *= modificateur
+        # Modificateurs selon le type d'événement (types inconnus traités comme 'autre')
+        id_autre = TYPE_EVENEMENT_ID['autre']
+        types_ids = np.fromiter(
+            (TYPE_EVENEMENT_ID.get(e.type_evenement, id_autre) for e in evenements),
+            dtype=np.int8, count=nombre
+        )
+        scores = intensites * MODIFICATEURS_EVENEMENT[types_ids]
         
         # Bonus pour durée
-        duree_txt = getattr(evenement, 'duree', '') or ''
+        scores += np.fromiter(
+            (self._bonus_duree(getattr(e, 'duree', '')) for e in evenements),
+            dtype=np.float64, count=nombre
+        )
+        
+        return np.minimum(scores, 100)
+    
+    def _bonus_duree(self, duree_txt) -> float:
+        """
+        Bonus de score selon la durée de l'événement (plafonné à 10)
+        """
         try:
             # Support formats simples: "2h", "90min"
             minutes = 0
@@ -329,11 +621,10 @@ class AnalyseFusionService:
                 elif s.endswith('min'):
                     minutes = float(s[:-3])
             if minutes > 0:
-                score += min(minutes / 60, 10)
+                return min(minutes / 60, 10)
         except Exception:
             pass
-        
-        return min(score, 100)
+        return 0.0
     
     def _calculer_score_mesures(self, mesures_arduino: List[Dict]) -> float:
         """
@@ -342,59 +633,45 @@ class AnalyseFusionService:
         if not mesures_arduino:
             return 50.0  # Score neutre si pas de mesures
         
-        score_total = 0.0
-        poids_total = 0.0
-        
-        for mesure in mesures_arduino:
-            # Poids selon le type de capteur
-            poids_capteur = {
-                'temperature': 0.8,
-                'humidite': 0.6,
-                'pression': 0.7,
-                'vent_vitesse': 1.2,
-                'vent_direction': 0.9,
-                'pluviometrie': 1.1,
-                'niveau_mer': 1.5,
-                'salinite': 1.0,
-                'ph': 0.8,
-                'turbidite': 1.0,
-                'gps': 0.5,
-                'accelerometre': 0.7,
-                'gyroscope': 0.6
-            }
-            
-            poids = poids_capteur.get(mesure['capteur_type'], 1.0)
-            
-            # Score basé sur les valeurs anormales
-            if mesure['capteur_type'] == 'vent_vitesse':
-                # Vent fort = risque élevé
-                score_capteur = min(mesure['valeur_max'] * 2, 100)
-            elif mesure['capteur_type'] == 'niveau_mer':
-                # Niveau de mer élevé = risque élevé
-                score_capteur = min(mesure['valeur_max'] * 20, 100)
-            elif mesure['capteur_type'] == 'pluviometrie':
-                # Pluie intense = risque élevé
-                score_capteur = min(mesure['valeur_max'] * 0.5, 100)
-            else:
-                # Score basé sur la variabilité
-                score_capteur = min(mesure['valeur_std'] * 10, 100)
-            
-            score_total += score_capteur * poids
-            poids_total += poids
+        nombre = len(mesures_arduino)
+        types = np.array([m['capteur_type'] for m in mesures_arduino])
+        valeurs_max = np.fromiter((m['valeur_max'] for m in mesures_arduino), dtype=np.float64, count=nombre)
+        valeurs_std = np.fromiter((m['valeur_std'] for m in mesures_arduino), dtype=np.float64, count=nombre)
         
-        return score_total / poids_total if poids_total > 0 else 50.0
+        # Poids selon le type de capteur
+        codes = np.searchsorted(TYPES_CAPTEUR, types)
+        connus = TYPES_CAPTEUR[np.minimum(codes, len(TYPES_CAPTEUR) - 1)] == types
+        poids = POIDS_CAPTEUR_LUT[np.where(connus, codes, len(TYPES_CAPTEUR))]
+        
+        # Score basé sur les valeurs anormales : vent fort, niveau de mer élevé
+        # et pluie intense = risque élevé, sinon score basé sur la variabilité
+        scores = np.minimum(np.select(
+            [types == 'vent_vitesse', types == 'niveau_mer', types == 'pluviometrie'],
+            [valeurs_max * 2, valeurs_max * 20, valeurs_max * 0.5],
+            default=valeurs_std * 10
+        ), 100)
+        
+        poids_total = poids.sum()
+        return float(np.dot(scores, poids) / poids_total) if poids_total > 0 else 50.0
     
-    def _calculer_score_contexte(self, evenements_contexte: List[Dict]) -> float:
+    def _calculer_score_contexte(self, evenements_contexte: List[Dict],
+                                 intensites: Optional[np.ndarray] = None) -> float:
         """
         Calculer le score basé sur les événements de contexte
+        (intensites : tableau des intensités déjà extrait, s'il est disponible)
         """
         if not evenements_contexte:
             return 50.0
         
+        if intensites is None:
+            intensites = np.fromiter(
+                (e['intensite'] for e in evenements_contexte), dtype=np.float64, count=len(evenements_contexte)
+            )
+        
         # Compter les événements par intensité
-        evenements_forts = sum(1 for e in evenements_contexte if e['intensite'] > 70)
-        evenements_moderes = sum(1 for e in evenements_contexte if 40 <= e['intensite'] <= 70)
-        evenements_faibles = sum(1 for e in evenements_contexte if e['intensite'] < 40)
+        evenements_forts = np.count_nonzero(intensites > 70)
+        evenements_moderes = np.count_nonzero((intensites >= 40) & (intensites <= 70))
+        evenements_faibles = np.count_nonzero(intensites < 40)
         
         # Score basé sur la fréquence et l'intensité
         score = (evenements_forts * 20 + evenements_moderes * 10 + evenements_faibles * 5)
@@ -422,15 +699,17 @@ class AnalyseFusionService:
         else:
             return 20.0
     
-    def _calculer_probabilite_erosion(self, score_erosion: float) -> float:
+    def _calculer_probabilites_et_niveaux(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Convertir le score d'érosion en probabilité (0-1)
+        Convertir des scores d'érosion en probabilités (0-1) et en niveaux d'érosion
         """
-        # Fonction sigmoïde pour convertir le score en probabilité
-        import math
-        x = (score_erosion - 50) / 20  # Normaliser autour de 50
-        probabilite = 1 / (1 + math.exp(-x))
-        return probabilite
+        # Fonction sigmoïde normalisée autour de 50
+        probabilites = 1 / (1 + np.exp(-(scores - 50) / 20))
+        
+        # > 80 : critique, > 60 : élevé, > 40 : modéré, sinon faible
+        niveaux = NIVEAUX_EROSION[np.digitize(scores, SEUILS_NIVEAU_EROSION, right=True)]
+        
+        return probabilites, niveaux
     
     def _identifier_facteurs_dominants(self, evenement: EvenementExterne, 
                                      mesures_arduino: List[Dict], 
@@ -438,47 +717,37 @@ class AnalyseFusionService:
         """
         Identifier les facteurs dominants dans l'analyse
         """
-        facteurs = []
-        
-        # Facteur événement principal
-        if evenement.intensite > 80:
-            facteurs.append(f"Événement {evenement.type_evenement} extrême")
-        elif evenement.intensite > 60:
-            facteurs.append(f"Événement {evenement.type_evenement} fort")
-        
-        # Facteurs mesures Arduino
-        for mesure in mesures_arduino:
-            if mesure['capteur_type'] == 'vent_vitesse' and mesure['valeur_max'] > 50:
-                facteurs.append("Vent très fort détecté")
-            elif mesure['capteur_type'] == 'niveau_mer' and mesure['valeur_max'] > 2:
-                facteurs.append("Niveau de mer élevé")
-            elif mesure['capteur_type'] == 'pluviometrie' and mesure['valeur_max'] > 50:
-                facteurs.append("Précipitations intenses")
-        
-        # Facteurs contexte
-        if len(evenements_contexte) > 5:
-            facteurs.append("Multiples événements climatiques")
+        def facteurs():
+            # Facteur événement principal
+            if evenement.intensite > 80:
+                yield f"Événement {evenement.type_evenement} extrême"
+            elif evenement.intensite > 60:
+                yield f"Événement {evenement.type_evenement} fort"
+            
+            # Facteurs mesures Arduino
+            for mesure in mesures_arduino:
+                if mesure['capteur_type'] == 'vent_vitesse' and mesure['valeur_max'] > 50:
+                    yield "Vent très fort détecté"
+                elif mesure['capteur_type'] == 'niveau_mer' and mesure['valeur_max'] > 2:
+                    yield "Niveau de mer élevé"
+                elif mesure['capteur_type'] == 'pluviometrie' and mesure['valeur_max'] > 50:
+                    yield "Précipitations intenses"
+            
+            # Facteurs contexte
+            if len(evenements_contexte) > 5:
+                yield "Multiples événements climatiques"
         
-        return facteurs[:5]  # Limiter à 5 facteurs principaux
+        # Limiter à 5 facteurs principaux (le parcours s'arrête dès le cinquième)
+        return list(islice(facteurs(), 5))
     
-    def _generer_prediction(self, fusion: FusionDonnees) -> Optional[PredictionEnrichie]:
+    def _generer_prediction(self, fusion: FusionDonnees, niveau_erosion: str) -> Optional[PredictionEnrichie]:
         """
-        Générer une prédiction d'érosion basée sur la fusion de données
+        Construire (sans l'enregistrer) une prédiction d'érosion basée sur la fusion de données
         """
         try:
             # Déterminer si l'érosion est prédite
             erosion_predite = fusion.probabilite_erosion > 0.6
             
-            # Déterminer le niveau d'érosion
-            if fusion.score_erosion > 80:
-                niveau_erosion = 'critique'
-            elif fusion.score_erosion > 60:
-                niveau_erosion = 'eleve'
-            elif fusion.score_erosion > 40:
-                niveau_erosion = 'modere'
-            else:
-                niveau_erosion = 'faible'
-            
             # Calculer la confiance
             confiance_pourcentage = min(fusion.probabilite_erosion * 100, 95)
             
@@ -491,13 +760,14 @@ class AnalyseFusionService:
             # Générer les actions urgentes
             actions_urgentes = self._generer_actions_urgentes(fusion, niveau_erosion)
             
-            # Créer la prédiction
-            prediction = PredictionEnrichie.objects.create(
+            # Construire la prédiction
+            prediction = PredictionEnrichie(
                 zone=fusion.zone,
                 fusion_donnees=fusion,
                 erosion_predite=erosion_predite,
                 niveau_erosion=niveau_erosion,
                 confiance_pourcentage=confiance_pourcentage,
+                niveau_confiance=PredictionEnrichie.calculer_niveau_confiance(confiance_pourcentage),
                 horizon_jours=7,  # Prédiction sur 7 jours
                 taux_erosion_pred_m_an=taux_erosion_pred,
                 facteur_evenements=fusion.score_erosion * 0.4,
@@ -514,7 +784,7 @@ class AnalyseFusionService:
                 commentaires=f"Prédiction générée automatiquement pour l'événement {fusion.evenement_externe.type_evenement}"
             )
             
-            logger.info(f"Prédiction créée: {prediction.id} - Érosion: {erosion_predite} ({confiance_pourcentage:.1f}%)")
+            logger.debug("Prédiction construite - Érosion: %s (%.1f%%)", erosion_predite, confiance_pourcentage)
             return prediction
             
         except Exception as e:
@@ -586,59 +856,72 @@ class AnalyseFusionService:
         
         return actions
     
-    def _creer_alertes(self, fusion: FusionDonnees, prediction: Optional[PredictionEnrichie]) -> List[AlerteEnrichie]:
+    def _creer_alertes(self, fusions: List[FusionDonnees], predictions: List[Optional[PredictionEnrichie]],
+                       probabilites: np.ndarray, niveaux: np.ndarray) -> List[List[AlerteEnrichie]]:
         """
-        Créer des alertes basées sur la fusion et la prédiction
+        Construire (sans les enregistrer) les alertes d'un lot de fusions et de
+        leurs prédictions, les conditions étant évaluées pour tout le lot
         """
-        alertes = []
+        nombre = len(fusions)
+        intensites = np.fromiter(
+            (f.evenement_externe.intensite for f in fusions), dtype=np.float64, count=nombre
+        )
         
-        try:
-            # Alerte pour événement extrême
-            if fusion.evenement_externe.intensite > 90:
-                alerte = AlerteEnrichie.objects.create(
-                    zone=fusion.zone,
-                    evenement_externe=fusion.evenement_externe,
-                    type='evenement_extreme',
-                    niveau='critique',
-                    titre=f"Événement {fusion.evenement_externe.type_evenement} extrême détecté",
-                    description=f"Intensité de {fusion.evenement_externe.intensite}% - Surveillance maximale requise",
-                    actions_requises=[
-                        "Surveillance 24h/24",
-                        "Préparation évacuation",
-                        "Alerte autorités"
-                    ],
-                    donnees_contexte={
-                        'score_erosion': fusion.score_erosion,
-                        'probabilite_erosion': fusion.probabilite_erosion,
-                        'facteurs_dominants': fusion.facteurs_dominants
-                    }
-                )
-                alertes.append(alerte)
-            
-            # Alerte pour prédiction d'érosion
-            if prediction and prediction.erosion_predite and prediction.niveau_erosion in ['eleve', 'critique']:
-                alerte = AlerteEnrichie.objects.create(
-                    zone=fusion.zone,
-                    prediction_enrichie=prediction,
-                    type='erosion_predite',
-                    niveau='alerte' if prediction.niveau_erosion == 'eleve' else 'critique',
-                    titre=f"Érosion prédite - Niveau {prediction.niveau_erosion}",
-                    description=f"Probabilité d'érosion: {prediction.confiance_pourcentage:.1f}% - Horizon: {prediction.horizon_jours} jours",
-                    actions_requises=prediction.actions_urgentes,
-                    donnees_contexte={
-                        'confiance_prediction': prediction.confiance_pourcentage,
-                        'taux_erosion_pred': prediction.taux_erosion_pred_m_an,
-                        'recommandations': prediction.recommandations
-                    }
-                )
-                alertes.append(alerte)
-            
-            logger.info(f"Créé {len(alertes)} alertes pour la fusion {fusion.id}")
-            
-        except Exception as e:
-            logger.error(f"Erreur lors de la création des alertes: {e}")
+        # Événement extrême / érosion prédite (même seuil que _generer_prediction) de niveau élevé
+        masque_extreme = intensites > 90
+        masque_erosion = (probabilites > 0.6) & np.isin(niveaux, ['eleve', 'critique'])
+        
+        alertes = [[] for _ in range(nombre)]
+        for i in np.flatnonzero(masque_extreme):
+            alertes[i].append(self._alerte_evenement_extreme(fusions[i]))
+        for i in np.flatnonzero(masque_erosion):
+            if predictions[i]:
+                alertes[i].append(self._alerte_erosion_predite(fusions[i], predictions[i]))
         
+        logger.debug("Construit %d alertes pour %d fusions", sum(map(len, alertes)), nombre)
         return alertes
+    
+    def _alerte_evenement_extreme(self, fusion: FusionDonnees) -> AlerteEnrichie:
+        """
+        Alerte pour événement extrême
+        """
+        return AlerteEnrichie(
+            zone=fusion.zone,
+            evenement_externe=fusion.evenement_externe,
+            type='evenement_extreme',
+            niveau='critique',
+            titre=f"Événement {fusion.evenement_externe.type_evenement} extrême détecté",
+            description=f"Intensité de {fusion.evenement_externe.intensite}% - Surveillance maximale requise",
+            actions_requises=[
+                "Surveillance 24h/24",
+                "Préparation évacuation",
+                "Alerte autorités"
+            ],
+            donnees_contexte={
+                'score_erosion': fusion.score_erosion,
+                'probabilite_erosion': fusion.probabilite_erosion,
+                'facteurs_dominants': fusion.facteurs_dominants
+            }
+        )
+    
+    def _alerte_erosion_predite(self, fusion: FusionDonnees, prediction: PredictionEnrichie) -> AlerteEnrichie:
+        """
+        Alerte pour prédiction d'érosion
+        """
+        return AlerteEnrichie(
+            zone=fusion.zone,
+            prediction_enrichie=prediction,
+            type='erosion_predite',
+            niveau='alerte' if prediction.niveau_erosion == 'eleve' else 'critique',
+            titre=f"Érosion prédite - Niveau {prediction.niveau_erosion}",
+            description=f"Probabilité d'érosion: {prediction.confiance_pourcentage:.1f}% - Horizon: {prediction.horizon_jours} jours",
+            actions_requises=prediction.actions_urgentes,
+            donnees_contexte={
+                'confiance_prediction': prediction.confiance_pourcentage,
+                'taux_erosion_pred': prediction.taux_erosion_pred_m_an,
+                'recommandations': prediction.recommandations
+            }
+        )
 
 
 class ArchiveService:
@@ -653,7 +936,8 @@ class ArchiveService:
             periode_fin = timezone.now()
             periode_debut = periode_fin - timedelta(days=periode_jours)
             
-            # Récupérer les données selon le type
+            # Récupérer les données selon le type (requêtes non évaluées renvoyant
+            # chaque ligne déjà sérialisée en JSON par PostgreSQL)
             if type_donnees == 'mesures_arduino':
                 donnees = self._archiver_mesures_arduino(zone, periode_debut, periode_fin)
             elif type_donnees == 'evenements_externes':
@@ -673,8 +957,7 @@ class ArchiveService:
             import os
             os.makedirs(os.path.dirname(chemin_fichier), exist_ok=True)
             
-            with open(chemin_fichier, 'w', encoding='utf-8') as f:
-                json.dump(donnees, f, ensure_ascii=False, indent=2, default=str)
+            nombre_elements = self._ecrire_archive_json(chemin_fichier, donnees.iterator(chunk_size=2000))
             
             # Créer l'enregistrement d'archive
             taille_fichier = os.path.getsize(chemin_fichier) / (1024 * 1024)  # MB
@@ -684,7 +967,7 @@ class ArchiveService:
                 zone=zone,
                 periode_debut=periode_debut,
                 periode_fin=periode_fin,
-                nombre_elements=len(donnees),
+                nombre_elements=nombre_elements,
                 taille_fichier_mb=taille_fichier,
                 chemin_fichier=chemin_fichier,
                 description=f"Archive automatique {type_donnees} pour {zone.nom}"
@@ -693,7 +976,7 @@ class ArchiveService:
             return {
                 'success': True,
                 'archive_id': archive.id,
-                'nombre_elements': len(donnees),
+                'nombre_elements': nombre_elements,
                 'taille_fichier_mb': taille_fichier,
                 'chemin_fichier': chemin_fichier
             }
@@ -702,113 +985,115 @@ class ArchiveService:
             logger.error(f"Erreur lors de la création de l'archive: {e}")
             return {'success': False, 'message': f'Erreur: {str(e)}'}
     
-    def _archiver_mesures_arduino(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> List[Dict]:
-        """Archiver les mesures Arduino"""
-        mesures = MesureArduino.objects.filter(
-            capteur__zone=zone,
-            timestamp__gte=periode_debut,
-            timestamp__lte=periode_fin
-        ).select_related('capteur')
-        
-        return [
-            {
-                'id': m.id,
-                'capteur_id': m.capteur.id,
-                'capteur_nom': m.capteur.nom,
-                'capteur_type': m.capteur.type_capteur,
-                'valeur': m.valeur,
-                'unite': m.unite,
-                'timestamp': m.timestamp,
-                'qualite_donnee': m.qualite_donnee,
-                'source_donnee': m.source_donnee,
-                'est_valide': m.est_valide
+    def creer_archives_zone(self, zone_id: int, periode_jours: int,
+                            types_donnees: Tuple[str, ...] = TYPES_ARCHIVE) -> Dict[str, Dict]:
+        """
+        Créer les archives de plusieurs types de données d'une zone en
+        parallèle : chaque archive est indépendante et limitée par la base,
+        elles sont donc lancées dans des threads (une connexion chacun)
+        """
+        with ThreadPoolExecutor(max_workers=len(types_donnees) or 1) as executeur:
+            futures = {
+                type_donnees: executeur.submit(self._creer_archive_thread, type_donnees, zone_id, periode_jours)
+                for type_donnees in types_donnees
             }
-            for m in mesures
-        ]
+            return {type_donnees: future.result() for type_donnees, future in futures.items()}
+    
+    def _creer_archive_thread(self, type_donnees: str, zone_id: int, periode_jours: int) -> Dict:
+        """Créer une archive depuis un thread, puis fermer la connexion du thread"""
+        try:
+            return self.creer_archive(type_donnees, zone_id, periode_jours)
+        finally:
+            connection.close()
     
-    def _archiver_evenements_externes(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> List[Dict]:
+    def _ecrire_archive_json(self, chemin_fichier: str, lignes) -> int:
+        """
+        Écrire les lignes JSON (texte produit par la base) dans un tableau JSON
+        au fil de l'eau et retourner le nombre d'éléments écrits
+        """
+        nombre_elements = 0
+        with open(chemin_fichier, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for ligne in lignes:
+                if nombre_elements:
+                    f.write(',\n')
+                f.write(ligne)
+                nombre_elements += 1
+            f.write(']')
+        return nombre_elements
+    
+    def _lignes_json(self, queryset, *champs: str, **alias):
+        """
+        Sérialiser chaque ligne du queryset en JSON côté PostgreSQL
+        (jsonb_build_object) : les champs donnés, plus les alias (expressions).
+        Les dates sont écrites au format ISO 8601 par la base.
+        """
+        objet = JSONObject(**{champ: F(champ) for champ in champs}, **alias)
+        return queryset.annotate(
+            ligne_json=Cast(objet, output_field=TextField())
+        ).values_list('ligne_json', flat=True)
+    
+    def _archiver_mesures_arduino(self, zone: Zone, periode_debut: datetime, periode_fin: datetime):
+        """Archiver les mesures Arduino"""
+        # Seules les colonnes archivées sont lues (pas d'instances de modèle)
+        return self._lignes_json(
+            MesureArduino.objects.filter(
+                capteur__zone=zone,
+                timestamp__gte=periode_debut,
+                timestamp__lte=periode_fin
+            ),
+            'id', 'capteur_id', 'valeur', 'unite', 'timestamp',
+            'qualite_donnee', 'source_donnee', 'est_valide',
+            capteur_nom=F('capteur__nom'),
+            capteur_type=F('capteur__type_capteur')
+        )
+    
+    def _archiver_evenements_externes(self, zone: Zone, periode_debut: datetime, periode_fin: datetime):
         """Archiver les événements externes"""
-        evenements = EvenementExterne.objects.filter(
-            zone=zone,
-            date_evenement__gte=periode_debut,
-            date_evenement__lte=periode_fin
+        return self._lignes_json(
+            EvenementExterne.objects.filter(
+                zone=zone,
+                date_evenement__gte=periode_debut,
+                date_evenement__lte=periode_fin
+            ),
+            'id', 'type_evenement', 'intensite', 'date_evenement',
+            'source', 'is_valide', 'is_traite',
+            description=F('commentaires'),
+            metadata=F('donnees_meteo')
         )
-        
-        return [
-            {
-                'id': e.id,
-                'type_evenement': e.type_evenement,
-                'intensite': e.intensite,
-                'description': e.description,
-                'date_evenement': e.date_evenement,
-                'source': e.source,
-                'metadata': e.metadata,
-                'is_valide': e.is_valide,
-                'is_traite': e.is_traite
-            }
-            for e in evenements
-        ]
     
-    def _archiver_fusions(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> List[Dict]:
+    def _archiver_fusions(self, zone: Zone, periode_debut: datetime, periode_fin: datetime):
         """Archiver les fusions de données"""
-        fusions = FusionDonnees.objects.filter(
-            zone=zone,
-            date_creation__gte=periode_debut,
-            date_creation__lte=periode_fin
+        return self._lignes_json(
+            FusionDonnees.objects.filter(
+                zone=zone,
+                date_creation__gte=periode_debut,
+                date_creation__lte=periode_fin
+            ),
+            'id', 'evenement_externe_id', 'score_erosion', 'probabilite_erosion',
+            'facteurs_dominants', 'statut', 'date_creation'
         )
-        
-        return [
-            {
-                'id': f.id,
-                'evenement_externe_id': f.evenement_externe.id,
-                'score_erosion': f.score_erosion,
-                'probabilite_erosion': f.probabilite_erosion,
-                'facteurs_dominants': f.facteurs_dominants,
-                'statut': f.statut,
-                'date_creation': f.date_creation
-            }
-            for f in fusions
-        ]
     
-    def _archiver_predictions(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> List[Dict]:
+    def _archiver_predictions(self, zone: Zone, periode_debut: datetime, periode_fin: datetime):
         """Archiver les prédictions"""
-        predictions = PredictionEnrichie.objects.filter(
-            zone=zone,
-            date_prediction__gte=periode_debut,
-            date_prediction__lte=periode_fin
+        return self._lignes_json(
+            PredictionEnrichie.objects.filter(
+                zone=zone,
+                date_prediction__gte=periode_debut,
+                date_prediction__lte=periode_fin
+            ),
+            'id', 'erosion_predite', 'niveau_erosion', 'confiance_pourcentage',
+            'taux_erosion_pred_m_an', 'recommandations', 'date_prediction'
         )
-        
-        return [
-            {
-                'id': p.id,
-                'erosion_predite': p.erosion_predite,
-                'niveau_erosion': p.niveau_erosion,
-                'confiance_pourcentage': p.confiance_pourcentage,
-                'taux_erosion_pred_m_an': p.taux_erosion_pred_m_an,
-                'recommandations': p.recommandations,
-                'date_prediction': p.date_prediction
-            }
-            for p in predictions
-        ]
     
-    def _archiver_alertes(self, zone: Zone, periode_debut: datetime, periode_fin: datetime) -> List[Dict]:
+    def _archiver_alertes(self, zone: Zone, periode_debut: datetime, periode_fin: datetime):
         """Archiver les alertes"""
-        alertes = AlerteEnrichie.objects.filter(
-            zone=zone,
-            date_creation__gte=periode_debut,
-            date_creation__lte=periode_fin
+        return self._lignes_json(
+            AlerteEnrichie.objects.filter(
+                zone=zone,
+                date_creation__gte=periode_debut,
+                date_creation__lte=periode_fin
+            ),
+            'id', 'type', 'niveau', 'titre', 'description',
+            'est_active', 'est_resolue', 'date_creation'
         )
-        
-        return [
-            {
-                'id': a.id,
-                'type': a.type,
-                'niveau': a.niveau,
-                'titre': a.titre,
-                'description': a.description,
-                'est_active': a.est_active,
-                'est_resolue': a.est_resolue,
-                'date_creation': a.date_creation
-            }
-            for a in alertes
-        ]
@@ -4,18 +4,66 @@ Service d'analyse automatique des données capteurs Arduino
 Se déclenche automatiquement quand de nouvelles données arrivent
 """
 import logging
+import numpy as np
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Avg, Min, Max, Count
 
 from .models import (
-    CapteurArduino, MesureArduino, Zone, EvenementExterne,
+    CapteurArduino, MesureArduino, EvenementExterne,
     FusionDonnees, PredictionEnrichie, AlerteEnrichie
 )
 
 logger = logging.getLogger(__name__)
 
+# Taille des lots pour les insertions groupées
+TAILLE_LOT = getattr(settings, 'BULK_CREATE_BATCH_SIZE', 500)
+
+# Rang de chaque niveau de risque (comparaison entière) et correspondance inverse
+RANG_NIVEAU_RISQUE = {'faible': 0, 'modere': 1, 'eleve': 2, 'critique': 3}
+NIVEAU_RISQUE_PAR_RANG = {rang: niveau for niveau, rang in RANG_NIVEAU_RISQUE.items()}
+
+# Seuils de score d'érosion et niveaux de risque correspondants (par rang)
+SEUILS_NIVEAU_RISQUE = (30, 60, 80)
+NIVEAUX_RISQUE = ('faible', 'modere', 'eleve', 'critique')
+
+# Pondération des événements dans le score d'érosion : une colonne par type
+# pondéré, la dernière regroupant tous les autres types (poids 1)
+COLONNE_TYPE_EVENEMENT = {
+    'tempete': 0, 'ouragan': 0, 'cyclone': 0,
+    'vent_fort': 1, 'houle': 1,
+    'pluie': 2
+}
+POIDS_TYPE_EVENEMENT = np.array([3.0, 2.0, 1.5, 1.0])
+
+# Recommandations de base par niveau de risque
+RECOMMANDATIONS_NIVEAU = {
+    'critique': (
+        "🚨 ALERTE CRITIQUE - Surveillance renforcée requise",
+        "📞 Contacter les autorités locales immédiatement",
+        "🚧 Mettre en place des mesures de protection d'urgence"
+    ),
+    'eleve': (
+        "⚠️ Risque élevé détecté - Surveillance accrue",
+        "📊 Analyser les tendances des dernières heures",
+        "🛡️ Préparer des mesures de protection"
+    ),
+    'modere': (
+        "📈 Risque modéré - Continuer la surveillance",
+        "📋 Documenter les conditions actuelles",
+        "🔍 Surveiller l'évolution des paramètres"
+    ),
+    'faible': (
+        "✅ Conditions normales - Surveillance de routine",
+        "📊 Maintenir la collecte de données",
+        "🔄 Continuer le monitoring régulier"
+    )
+}
+
 
 class AnalyseAutomatiqueService:
     """Service d'analyse automatique des données capteurs"""
@@ -42,15 +90,39 @@ class AnalyseAutomatiqueService:
             if not donnees_recentes:
                 return {"success": False, "message": "Aucune donnée récente trouvée"}
             
-            # Analyser chaque zone
-            resultats = []
-            for zone, donnees in donnees_recentes.items():
-                analyse = self._analyser_zone(zone, donnees)
+            # Analyser chaque zone (objets construits sans être enregistrés)
+            maintenant = timezone.now()
+            evenements_virtuels = self._charger_evenements_virtuels(list(donnees_recentes), maintenant)
+            
+            # Zones ayant des données récentes, avec les statistiques de leurs événements
+            zones_analysees = [
+                (zone_id, donnees, self._analyser_evenements(donnees['evenements']))
+                for zone_id, donnees in donnees_recentes.items()
+                if donnees['nb_mesures'] or donnees['evenements']
+            ]
+            
+            # Scores d'érosion de toutes les zones en une passe vectorisée
+            scores = self._calculer_scores_erosion(
+                [donnees['stats_mesures'] for _, donnees, _ in zones_analysees],
+                [stats_evenements for _, _, stats_evenements in zones_analysees]
+            )
+            
+            analyses = []
+            for (zone_id, donnees, stats_evenements), score_erosion in zip(zones_analysees, scores):
+                analyse = self._analyser_zone(
+                    zone_id, donnees, stats_evenements, float(score_erosion),
+                    maintenant, evenements_virtuels.get(zone_id)
+                )
                 if analyse:
-                    resultats.append(analyse)
+                    analyses.append(analyse)
             
-            # Générer des alertes si nécessaire
-            alertes_generees = self._generer_alertes_automatiques(resultats)
+            # Enregistrer toutes les analyses (une insertion par table) et les
+            # alertes dans une seule transaction : tout ou rien pour ce passage
+            with transaction.atomic():
+                resultats = self._enregistrer_analyses(analyses)
+                
+                # Générer des alertes si nécessaire
+                alertes_generees = self._generer_alertes_automatiques(resultats)
             
             self.logger.info(f"✅ Analyse terminée: {len(resultats)} zones analysées, {len(alertes_generees)} alertes générées")
             
@@ -66,56 +138,52 @@ class AnalyseAutomatiqueService:
             self.logger.error(f"❌ Erreur lors de l'analyse automatique: {e}")
             return {"success": False, "message": f"Erreur: {str(e)}"}
     
-    def _recuperer_donnees_recentes(self, capteur_id: int = None) -> Dict:
-        """Récupère les données récentes des capteurs (dernières 2 heures)"""
+    def _recuperer_donnees_recentes(self, capteur_id: int = None) -> Dict[int, Dict]:
+        """
+        Récupère les données récentes des capteurs (dernières 2 heures), par
+        identifiant de zone : {zone_id: {nom, capteurs, stats_mesures,
+        nb_mesures, evenements}}. Seuls les identifiants des capteurs et les
+        lignes brutes des événements sont conservés, sans instance de modèle.
+        """
         try:
             # Période de 2 heures
             depuis = timezone.now() - timedelta(hours=2)
             
-            # Filtrer les capteurs
+            # Filtrer les capteurs (identifiant, zone et nom de la zone en une requête)
+            capteurs = CapteurArduino.objects.filter(actif=True)
             if capteur_id:
-                capteurs = CapteurArduino.objects.filter(id=capteur_id, actif=True)
-            else:
-                capteurs = CapteurArduino.objects.filter(actif=True)
+                capteurs = capteurs.filter(id=capteur_id)
             
             donnees_par_zone = {}
             
-            for capteur in capteurs:
-                zone = capteur.zone
-                if zone not in donnees_par_zone:
-                    donnees_par_zone[zone] = {
-                        'capteurs': [],
-                        'mesures': [],
-                        'evenements': []
-                    }
+            for id_capteur, zone_id, zone_nom in capteurs.values_list('id', 'zone_id', 'zone__nom'):
+                if zone_id not in donnees_par_zone:
+                    donnees_par_zone[zone_id] = self._nouvelle_zone(zone_nom)
                 
                 # Ajouter le capteur
-                donnees_par_zone[zone]['capteurs'].append(capteur)
-                
-                # Récupérer les mesures récentes
-                mesures = MesureArduino.objects.filter(
-                    capteur=capteur,
-                    timestamp__gte=depuis,
-                    est_valide=True
-                ).order_by('-timestamp')
-                
-                donnees_par_zone[zone]['mesures'].extend(mesures)
+                donnees_par_zone[zone_id]['capteurs'].append(id_capteur)
+            
+            # Statistiques des mesures récentes calculées par la base, par zone et par unité
+            capteur_ids = [cid for donnees in donnees_par_zone.values() for cid in donnees['capteurs']]
+            for zone_id, stats_mesures in self._calculer_statistiques_mesures(capteur_ids, depuis).items():
+                donnees = donnees_par_zone[zone_id]
+                donnees['stats_mesures'] = stats_mesures
+                donnees['nb_mesures'] = sum(stats['count'] for stats in stats_mesures.values())
             
-            # Récupérer les événements externes récents
+            # Récupérer les événements externes récents (lignes brutes)
             evenements = EvenementExterne.objects.filter(
                 date_evenement__gte=depuis,
-                is_valide=True
+                is_valide=True,
+                zone__isnull=False
+            ).values(
+                'zone_id', 'zone__nom', 'type_evenement', 'intensite', 'niveau_risque'
             ).order_by('-date_evenement')
             
             for evenement in evenements:
-                if evenement.zone:
-                    if evenement.zone not in donnees_par_zone:
-                        donnees_par_zone[evenement.zone] = {
-                            'capteurs': [],
-                            'mesures': [],
-                            'evenements': []
-                        }
-                    donnees_par_zone[evenement.zone]['evenements'].append(evenement)
+                zone_id = evenement['zone_id']
+                if zone_id not in donnees_par_zone:
+                    donnees_par_zone[zone_id] = self._nouvelle_zone(evenement['zone__nom'])
+                donnees_par_zone[zone_id]['evenements'].append(evenement)
             
             return donnees_par_zone
             
@@ -123,156 +191,224 @@ class AnalyseAutomatiqueService:
             self.logger.error(f"Erreur lors de la récupération des données: {e}")
             return {}
     
-    def _analyser_zone(self, zone: Zone, donnees: Dict) -> Optional[Dict]:
-        """Analyse les données d'une zone spécifique"""
+    @staticmethod
+    def _nouvelle_zone(nom: str) -> Dict:
+        """Structure vide des données récentes d'une zone"""
+        return {
+            'nom': nom,
+            'capteurs': [],
+            'stats_mesures': {},
+            'nb_mesures': 0,
+            'evenements': []
+        }
+    
+    def _charger_evenements_virtuels(self, zone_ids: List[int], maintenant: datetime) -> Dict[int, EvenementExterne]:
+        """
+        Événements virtuels d'analyse automatique déjà créés dans l'heure
+        courante, par zone (le plus récent), chargés en une requête
+        """
+        debut_heure = maintenant.replace(minute=0, second=0, microsecond=0)
+        return {
+            evenement.zone_id: evenement
+            for evenement in EvenementExterne.objects.filter(
+                type_evenement='autre',
+                source='api',
+                zone_id__in=zone_ids,
+                date_evenement__gte=debut_heure,
+                date_evenement__lte=maintenant
+            ).only('id', 'zone', 'date_evenement').order_by('date_evenement')
+        }
+    
+    def _analyser_zone(self, zone_id: int, donnees: Dict, stats_evenements: Dict, score_erosion: float,
+                       maintenant: datetime, evenement_virtuel: Optional[EvenementExterne] = None) -> Optional[Tuple]:
+        """
+        Analyse les données d'une zone spécifique à partir de son score d'érosion.
+        Retourne le résultat et les objets (événement virtuel, fusion,
+        prédiction) à enregistrer par _enregistrer_analyses.
+        evenement_virtuel : événement virtuel existant à réutiliser.
+        """
         try:
-            mesures = donnees['mesures']
+            stats_mesures = donnees['stats_mesures']
             evenements = donnees['evenements']
             
-            if not mesures and not evenements:
+            # Zone au repos : rien à enregistrer (ni fusion ni prédiction)
+            if score_erosion == 0 and not evenements:
                 return None
             
-            # Calculer les statistiques des mesures
-            stats_mesures = self._calculer_statistiques_mesures(mesures)
-            
-            # Analyser les événements
-            stats_evenements = self._analyser_evenements(evenements)
-            
-            # Calculer le score d'érosion
-            score_erosion = self._calculer_score_erosion(stats_mesures, stats_evenements)
-            
             # Déterminer le niveau de risque
             niveau_risque = self._determiner_niveau_risque(score_erosion)
             
-            # Créer une fusion de données
-            fusion = self._creer_fusion_donnees(zone, stats_mesures, stats_evenements, score_erosion)
+            # Construire une fusion de données
+            evenement_virtuel, fusion = self._creer_fusion_donnees(
+                zone_id, stats_mesures, stats_evenements, score_erosion, niveau_risque, maintenant,
+                donnees['nb_mesures'], len(evenements), evenement_virtuel
+            )
             
             # Générer une prédiction
-            prediction = self._generer_prediction_automatique(fusion, niveau_risque)
+            prediction = self._generer_prediction_automatique(fusion, niveau_risque, zone_id) if fusion else None
             
-            return {
-                "zone_id": zone.id,
-                "zone_nom": zone.nom,
+            resultat = {
+                "zone_id": zone_id,
+                "zone_nom": donnees['nom'],
                 "score_erosion": score_erosion,
                 "niveau_risque": niveau_risque,
-                "nb_mesures": len(mesures),
+                "nb_mesures": donnees['nb_mesures'],
                 "nb_evenements": len(evenements),
-                "fusion_id": fusion.id if fusion else None,
-                "prediction_id": prediction.id if prediction else None,
+                "fusion_id": None,
+                "prediction_id": None,
                 "stats_mesures": stats_mesures,
                 "stats_evenements": stats_evenements
             }
+            return resultat, evenement_virtuel, fusion, prediction
             
         except Exception as e:
-            self.logger.error(f"Erreur lors de l'analyse de la zone {zone.nom}: {e}")
+            self.logger.error(f"Erreur lors de l'analyse de la zone {donnees['nom']}: {e}")
             return None
     
-    def _calculer_statistiques_mesures(self, mesures: List[MesureArduino]) -> Dict:
-        """Calcule les statistiques des mesures"""
-        if not mesures:
-            return {}
+    def _calculer_statistiques_mesures(self, capteur_ids: List[int], depuis: datetime) -> Dict[int, Dict]:
+        """
+        Calcule en base les statistiques des mesures récentes valides, par zone
+        puis par unité : {zone_id: {unite: {moyenne, min, max, count, derniere_valeur}}}
+        """
+        mesures = MesureArduino.objects.filter(
+            capteur_id__in=capteur_ids,
+            timestamp__gte=depuis,
+            est_valide=True
+        )
+        
+        # Agrégats par (zone, unité)
+        agregats = mesures.order_by().values('capteur__zone_id', 'unite').annotate(
+            moyenne=Avg('valeur'),
+            min=Min('valeur'),
+            max=Max('valeur'),
+            count=Count('id')
+        )
         
-        # Grouper par type de mesure
-        mesures_par_type = {}
-        for mesure in mesures:
-            unite = mesure.unite
-            if unite not in mesures_par_type:
-                mesures_par_type[unite] = []
-            mesures_par_type[unite].append(mesure.valeur)
+        # Valeur la plus récente de chaque (zone, unité) (DISTINCT ON PostgreSQL)
+        dernieres_valeurs = {
+            (zone_id, unite): valeur
+            for zone_id, unite, valeur in mesures.order_by(
+                'capteur__zone_id', 'unite', '-timestamp'
+            ).distinct('capteur__zone_id', 'unite').values_list('capteur__zone_id', 'unite', 'valeur')
+        }
         
         stats = {}
-        for unite, valeurs in mesures_par_type.items():
-            if valeurs:
-                stats[unite] = {
-                    'moyenne': sum(valeurs) / len(valeurs),
-                    'min': min(valeurs),
-                    'max': max(valeurs),
-                    'count': len(valeurs),
-                    'derniere_valeur': valeurs[0]  # Première = plus récente (trié par -timestamp)
-                }
+        for agregat in agregats:
+            cle = (agregat['capteur__zone_id'], agregat['unite'])
+            stats.setdefault(cle[0], {})[cle[1]] = {
+                'moyenne': agregat['moyenne'],
+                'min': agregat['min'],
+                'max': agregat['max'],
+                'count': agregat['count'],
+                'derniere_valeur': dernieres_valeurs.get(cle)
+            }
         
         return stats
     
-    def _analyser_evenements(self, evenements: List[EvenementExterne]) -> Dict:
-        """Analyse les événements externes"""
+    def _analyser_evenements(self, evenements: List[Dict]) -> Dict:
+        """Analyse les événements externes (lignes brutes de _recuperer_donnees_recentes)"""
         if not evenements:
             return {}
         
         # Compter par type d'événement
         types_evenements = {}
+        rangs_max = {}
         for event in evenements:
-            type_event = event.type_evenement
+            type_event = event['type_evenement']
             if type_event not in types_evenements:
                 types_evenements[type_event] = {
                     'count': 0,
                     'intensite_moyenne': 0,
                     'niveau_risque_max': 'faible'
                 }
+                rangs_max[type_event] = 0
             
             types_evenements[type_event]['count'] += 1
-            types_evenements[type_event]['intensite_moyenne'] += event.intensite
-            
-            # Déterminer le niveau de risque max
-            if event.niveau_risque == 'critique':
-                types_evenements[type_event]['niveau_risque_max'] = 'critique'
-            elif event.niveau_risque == 'eleve' and types_evenements[type_event]['niveau_risque_max'] != 'critique':
-                types_evenements[type_event]['niveau_risque_max'] = 'eleve'
-            elif event.niveau_risque == 'modere' and types_evenements[type_event]['niveau_risque_max'] not in ['critique', 'eleve']:
-                types_evenements[type_event]['niveau_risque_max'] = 'modere'
+            types_evenements[type_event]['intensite_moyenne'] += event['intensite']
+            
+            # Niveau de risque max, suivi par rang
+            rang = RANG_NIVEAU_RISQUE.get(event['niveau_risque'], 0)
+            if rang > rangs_max[type_event]:
+                rangs_max[type_event] = rang
         
-        # Calculer les moyennes
-        for type_event in types_evenements:
-            count = types_evenements[type_event]['count']
-            types_evenements[type_event]['intensite_moyenne'] /= count
+        # Calculer les moyennes et traduire le rang max en niveau de risque
+        for type_event, stats in types_evenements.items():
+            stats['intensite_moyenne'] /= stats['count']
+            stats['niveau_risque_max'] = NIVEAU_RISQUE_PAR_RANG[rangs_max[type_event]]
         
         return types_evenements
     
-    def _calculer_score_erosion(self, stats_mesures: Dict, stats_evenements: Dict) -> float:
-        """Calcule un score d'érosion basé sur les données"""
-        score = 0.0
+    def _calculer_scores_erosion(self, stats_mesures_zones: List[Dict], stats_evenements_zones: List[Dict]) -> np.ndarray:
+        """Calcule en une passe vectorisée le score d'érosion de chaque zone"""
+        nombre = len(stats_mesures_zones)
         
-        # Facteur température (si disponible)
-        if '°C' in stats_mesures:
-            temp = stats_mesures['°C']['moyenne']
-            if temp > 30:  # Température élevée = risque accru
-                score += (temp - 30) * 2
+        # Température et humidité moyennes (valeur neutre si non disponible)
+        temperatures = np.fromiter(
+            (s['°C']['moyenne'] if '°C' in s else 30.0 for s in stats_mesures_zones), dtype=np.float64, count=nombre
+        )
+        humidites = np.fromiter(
+            (s['%']['moyenne'] if '%' in s else 80.0 for s in stats_mesures_zones), dtype=np.float64, count=nombre
+        )
         
-        # Facteur humidité (si disponible)
-        if '%' in stats_mesures:
-            hum = stats_mesures['%']['moyenne']
-            if hum > 80:  # Humidité élevée = risque accru
-                score += (hum - 80) * 0.5
+        # Intensité cumulée (intensité moyenne × nombre) des événements, par zone et par colonne de type
+        autres = len(POIDS_TYPE_EVENEMENT) - 1
+        intensites = np.zeros((nombre, len(POIDS_TYPE_EVENEMENT)))
+        for i, stats_evenements in enumerate(stats_evenements_zones):
+            for type_event, stats in stats_evenements.items():
+                intensites[i, COLONNE_TYPE_EVENEMENT.get(type_event, autres)] += stats['intensite_moyenne'] * stats['count']
         
-        # Facteur événements
-        for type_event, stats in stats_evenements.items():
-            intensite = stats['intensite_moyenne']
-            count = stats['count']
-            
-            # Pondération selon le type d'événement
-            if type_event in ['tempete', 'ouragan', 'cyclone']:
-                score += intensite * count * 3
-            elif type_event in ['vent_fort', 'houle']:
-                score += intensite * count * 2
-            elif type_event == 'pluie':
-                score += intensite * count * 1.5
-            else:
-                score += intensite * count * 1
+        # Température > 30 et humidité > 80 = risque accru, plus les événements pondérés
+        scores = (np.maximum(temperatures - 30, 0) * 2
+                  + np.maximum(humidites - 80, 0) * 0.5
+                  + intensites @ POIDS_TYPE_EVENEMENT)
         
-        return min(score, 100.0)  # Limiter à 100
+        return np.minimum(scores, 100.0)  # Limiter à 100
     
     def _determiner_niveau_risque(self, score_erosion: float) -> str:
-        """Détermine le niveau de risque basé sur le score"""
-        if score_erosion >= 80:
-            return 'critique'
-        elif score_erosion >= 60:
-            return 'eleve'
-        elif score_erosion >= 30:
-            return 'modere'
-        else:
-            return 'faible'
+        """Détermine le niveau de risque basé sur le score (seuils inclus)"""
+        return NIVEAUX_RISQUE[bisect_right(SEUILS_NIVEAU_RISQUE, score_erosion)]
     
-    def _creer_fusion_donnees(self, zone: Zone, stats_mesures: Dict, stats_evenements: Dict, score_erosion: float) -> Optional[FusionDonnees]:
-        """Crée une fusion de données pour la zone"""
+    def _enregistrer_analyses(self, analyses: List[Tuple]) -> List[Dict]:
+        """
+        Enregistrer en lot les événements virtuels, fusions et prédictions
+        construits par _analyser_zone, puis compléter les résultats avec leurs ids
+        """
+        # Seuls les événements virtuels qui n'existent pas encore sont insérés
+        evenements = [evenement for _, evenement, fusion, _ in analyses if fusion and evenement.pk is None]
+        fusions = [fusion for _, _, fusion, _ in analyses if fusion]
+        predictions = [prediction for _, _, _, prediction in analyses if prediction]
+        
+        # Champs calculés habituellement par save(), que bulk_create n'appelle pas
+        for evenement in evenements:
+            evenement._calculer_risque_erosion()
+        for prediction in predictions:
+            prediction.niveau_confiance = PredictionEnrichie.calculer_niveau_confiance(
+                prediction.confiance_pourcentage
+            )
+        
+        # Les clés primaires sont renseignées par bulk_create avant l'insertion
+        # des objets qui les référencent
+        EvenementExterne.objects.bulk_create(evenements, batch_size=TAILLE_LOT)
+        FusionDonnees.objects.bulk_create(fusions, batch_size=TAILLE_LOT)
+        PredictionEnrichie.objects.bulk_create(predictions, batch_size=TAILLE_LOT)
+        
+        resultats = []
+        for resultat, _, fusion, prediction in analyses:
+            resultat['fusion_id'] = fusion.id if fusion else None
+            resultat['prediction_id'] = prediction.id if prediction else None
+            resultats.append(resultat)
+        return resultats
+    
+    def _creer_fusion_donnees(self, zone_id: int, stats_mesures: Dict, stats_evenements: Dict,
+                              score_erosion: float, niveau_risque: str, maintenant: datetime,
+                              nb_mesures: int, nb_evenements: int,
+                              evenement_virtuel: Optional[EvenementExterne] = None) -> Tuple[Optional[EvenementExterne], Optional[FusionDonnees]]:
+        """
+        Construit (sans les enregistrer) l'événement virtuel et la fusion de
+        données de la zone ; un événement virtuel existant est réutilisé.
+        nb_mesures : nombre de mesures de la zone compté par la base
+        (agrégat Count), nb_evenements : nombre d'événements récents chargés
+        """
         try:
             # Calculer la probabilité d'érosion
             probabilite_erosion = min(score_erosion / 100.0, 1.0)
@@ -288,49 +424,46 @@ class AnalyseAutomatiqueService:
                 if stats_evenements[type_event]['count'] > 0:
                     facteurs_dominants.append(f'evenement_{type_event}')
             
-            # Déterminer le niveau de risque
-            niveau_risque = self._determiner_niveau_risque(score_erosion)
-            
-            # Créer un événement virtuel pour l'analyse automatique
-            evenement_virtuel, _ = EvenementExterne.objects.get_or_create(
-                type_evenement='autre',  # Utiliser 'autre' au lieu de 'analyse_automatique'
-                zone=zone,
-                date_evenement=timezone.now(),
-                defaults={
-                    'intensite': score_erosion / 10,  # Intensité basée sur le score
-                    'niveau_risque': niveau_risque,
-                    'duree': '2h',  # Durée par défaut
-                    'statut': 'recu',
-                    'source': 'api',
-                    'is_valide': True,
-                    'is_traite': True
-                }
-            )
-            
-            # Créer la fusion
-            fusion = FusionDonnees.objects.create(
-                zone=zone,
+            # Événement virtuel pour l'analyse automatique
+            if evenement_virtuel is None:
+                evenement_virtuel = EvenementExterne(
+                    type_evenement='autre',  # Utiliser 'autre' au lieu de 'analyse_automatique'
+                    zone_id=zone_id,
+                    date_evenement=maintenant,
+                    intensite=score_erosion / 10,  # Intensité basée sur le score
+                    niveau_risque=niveau_risque,
+                    duree='2h',  # Durée par défaut
+                    statut='recu',
+                    source='api',
+                    is_valide=True,
+                    is_traite=True
+                )
+            
+            # Construire la fusion
+            fusion = FusionDonnees(
+                zone_id=zone_id,
                 evenement_externe=evenement_virtuel,
-                periode_debut=timezone.now() - timedelta(hours=2),
-                periode_fin=timezone.now(),
-                mesures_arduino_count=sum(len(valeurs) for valeurs in stats_mesures.values() if isinstance(valeurs, dict) and 'count' in valeurs),
-                evenements_externes_count=sum(stats['count'] for stats in stats_evenements.values()),
+                periode_debut=maintenant - timedelta(hours=2),
+                periode_fin=maintenant,
+                mesures_arduino_count=nb_mesures,
+                evenements_externes_count=nb_evenements,
                 score_erosion=score_erosion,
                 probabilite_erosion=probabilite_erosion,
                 facteurs_dominants=facteurs_dominants,
                 statut='terminee',
-                date_fin=timezone.now(),
+                date_fin=maintenant,
                 commentaires=f"Analyse automatique - Score: {score_erosion:.1f}"
             )
             
-            return fusion
+            return evenement_virtuel, fusion
             
         except Exception as e:
             self.logger.error(f"Erreur lors de la création de la fusion: {e}")
-            return None
+            return None, None
     
-    def _generer_prediction_automatique(self, fusion: FusionDonnees, niveau_risque: str) -> Optional[PredictionEnrichie]:
-        """Génère une prédiction automatique basée sur la fusion"""
+    def _generer_prediction_automatique(self, fusion: FusionDonnees, niveau_risque: str,
+                                        zone_id: int) -> Optional[PredictionEnrichie]:
+        """Construit (sans l'enregistrer) une prédiction automatique basée sur la fusion"""
         try:
             # Déterminer si érosion prédite
             erosion_predite = fusion.probabilite_erosion > 0.5
@@ -344,9 +477,9 @@ class AnalyseAutomatiqueService:
             # Générer des recommandations
             recommandations = self._generer_recommandations(niveau_risque, fusion.facteurs_dominants)
             
-            # Créer la prédiction
-            prediction = PredictionEnrichie.objects.create(
-                zone=fusion.zone,
+            # Construire la prédiction
+            prediction = PredictionEnrichie(
+                zone_id=zone_id,
                 fusion_donnees=fusion,
                 erosion_predite=erosion_predite,
                 niveau_erosion=niveau_risque,
@@ -375,32 +508,7 @@ class AnalyseAutomatiqueService:
     
     def _generer_recommandations(self, niveau_risque: str, facteurs_dominants: List[str]) -> List[str]:
         """Génère des recommandations basées sur le niveau de risque et les facteurs"""
-        recommandations = []
-        
-        if niveau_risque == 'critique':
-            recommandations.extend([
-                "🚨 ALERTE CRITIQUE - Surveillance renforcée requise",
-                "📞 Contacter les autorités locales immédiatement",
-                "🚧 Mettre en place des mesures de protection d'urgence"
-            ])
-        elif niveau_risque == 'eleve':
-            recommandations.extend([
-                "⚠️ Risque élevé détecté - Surveillance accrue",
-                "📊 Analyser les tendances des dernières heures",
-                "🛡️ Préparer des mesures de protection"
-            ])
-        elif niveau_risque == 'modere':
-            recommandations.extend([
-                "📈 Risque modéré - Continuer la surveillance",
-                "📋 Documenter les conditions actuelles",
-                "🔍 Surveiller l'évolution des paramètres"
-            ])
-        else:
-            recommandations.extend([
-                "✅ Conditions normales - Surveillance de routine",
-                "📊 Maintenir la collecte de données",
-                "🔄 Continuer le monitoring régulier"
-            ])
+        recommandations = list(RECOMMANDATIONS_NIVEAU.get(niveau_risque, RECOMMANDATIONS_NIVEAU['faible']))
         
         # Recommandations spécifiques aux facteurs
         if 'temperature_elevee' in facteurs_dominants:
@@ -416,46 +524,46 @@ class AnalyseAutomatiqueService:
     
     def _generer_alertes_automatiques(self, resultats: List[Dict]) -> List[Dict]:
         """Génère des alertes automatiques si nécessaire"""
-        alertes_generees = []
+        resultats_alerte = [r for r in resultats if r['niveau_risque'] in ['eleve', 'critique']]
         
-        for resultat in resultats:
-            if resultat['niveau_risque'] in ['eleve', 'critique']:
-                try:
-                    zone = Zone.objects.get(id=resultat['zone_id'])
-                    
-                    # Créer une alerte enrichie
-                    alerte = AlerteEnrichie.objects.create(
-                        zone=zone,
-                        prediction_enrichie_id=resultat.get('prediction_id'),
-                        type='erosion_predite',
-                        niveau=resultat['niveau_risque'],
-                        titre=f"🚨 Alerte érosion - {zone.nom}",
-                        description=f"Risque d'érosion {resultat['niveau_risque']} détecté. Score: {resultat['score_erosion']:.1f}",
-                        est_active=True,
-                        actions_requises=[
-                            "Surveillance renforcée",
-                            "Analyse des données en temps réel",
-                            "Préparation des mesures de protection"
-                        ],
-                        donnees_contexte={
-                            'score_erosion': resultat['score_erosion'],
-                            'nb_mesures': resultat['nb_mesures'],
-                            'nb_evenements': resultat['nb_evenements'],
-                            'facteurs_dominants': resultat['stats_evenements']
-                        }
-                    )
-                    
-                    alertes_generees.append({
-                        'alerte_id': alerte.id,
-                        'zone': zone.nom,
-                        'niveau': resultat['niveau_risque'],
-                        'titre': alerte.titre
-                    })
-                    
-                except Exception as e:
-                    self.logger.error(f"Erreur lors de la création de l'alerte: {e}")
+        # L'identifiant et le nom de la zone sont déjà dans le résultat de
+        # l'analyse : aucune relecture de la zone n'est nécessaire
+        alertes = []
+        for resultat in resultats_alerte:
+            # Construire une alerte enrichie
+            alertes.append(AlerteEnrichie(
+                zone_id=resultat['zone_id'],
+                prediction_enrichie_id=resultat.get('prediction_id'),
+                type='erosion_predite',
+                niveau=resultat['niveau_risque'],
+                titre=f"🚨 Alerte érosion - {resultat['zone_nom']}",
+                description=f"Risque d'érosion {resultat['niveau_risque']} détecté. Score: {resultat['score_erosion']:.1f}",
+                est_active=True,
+                actions_requises=[
+                    "Surveillance renforcée",
+                    "Analyse des données en temps réel",
+                    "Préparation des mesures de protection"
+                ],
+                donnees_contexte={
+                    'score_erosion': resultat['score_erosion'],
+                    'nb_mesures': resultat['nb_mesures'],
+                    'nb_evenements': resultat['nb_evenements'],
+                    'facteurs_dominants': resultat['stats_evenements']
+                }
+            ))
+        
+        # Enregistrer toutes les alertes en une insertion (dans la transaction de l'analyse)
+        AlerteEnrichie.objects.bulk_create(alertes, batch_size=TAILLE_LOT)
         
-        return alertes_generees
+        return [
+            {
+                'alerte_id': alerte.id,
+                'zone': resultat['zone_nom'],
+                'niveau': alerte.niveau,
+                'titre': alerte.titre
+            }
+            for alerte, resultat in zip(alertes, resultats_alerte)
+        ]
 
 
 # Instance globale du service
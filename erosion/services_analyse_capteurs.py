@@ -4,8 +4,14 @@ Service d'analyse simplifié pour les mesures des capteurs Arduino
 Se déclenche automatiquement quand de nouvelles données arrivent
 """
 import logging
+import numpy as np
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import groupby
+from operator import attrgetter
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 
@@ -16,6 +22,33 @@ from .models import (
 
 logger = logging.getLogger(__name__)
 
+# Taille des lots pour les insertions groupées
+TAILLE_LOT = getattr(settings, 'BULK_CREATE_BATCH_SIZE', 500)
+
+# Seuils de score d'érosion et niveaux de risque correspondants
+SEUILS_NIVEAU_RISQUE = (30, 60, 80)
+NIVEAUX_RISQUE = ('faible', 'modere', 'eleve', 'critique')
+
+
+# Règles du score d'érosion par unité de mesure : au-dessus du seuil haut
+# (risque accru) ou sous le seuil bas (risque modéré), chaque écart est pondéré
+UNITES_SCORE = ('°C', '%', 'pluie', 'eau')
+SEUILS_HAUTS = np.array([30.0, 80.0, 50.0, 80.0])
+POIDS_HAUTS = np.array([2.0, 0.5, 0.3, 0.4])
+SEUILS_BAS = np.array([15.0, 30.0, -np.inf, -np.inf])
+POIDS_BAS = np.array([0.5, 0.2, 0.0, 0.0])
+
+
+def _score_erosion_mesures(moyennes):
+    """
+    Score d'érosion à partir des moyennes des mesures, dans l'ordre de
+    UNITES_SCORE (NaN si non disponible). Accepte un vecteur de 4 moyennes
+    ou un tableau (zones, 4) et retourne un score par zone.
+    """
+    ecarts = (np.maximum(moyennes - SEUILS_HAUTS, 0) * POIDS_HAUTS
+              + np.maximum(SEUILS_BAS - moyennes, 0) * POIDS_BAS)
+    return np.minimum(np.nansum(ecarts, axis=-1), 100.0)  # Limiter à 100
+
 
 class AnalyseCapteursService:
     """Service d'analyse simplifié pour les capteurs Arduino"""
@@ -23,12 +56,13 @@ class AnalyseCapteursService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def analyser_mesures_capteurs(self, capteur_id: int = None) -> Dict:
+    def analyser_mesures_capteurs(self, capteur_id: int = None, zone_ids: List[int] = None) -> Dict:
         """
         Analyse les mesures des capteurs Arduino et génère des prédictions
         
         Args:
             capteur_id: ID du capteur spécifique (optionnel)
+            zone_ids: IDs des zones à analyser (optionnel, toutes par défaut)
             
         Returns:
             Dict avec les résultats de l'analyse
@@ -37,22 +71,40 @@ class AnalyseCapteursService:
             self.logger.info("🔍 Début de l'analyse des mesures capteurs")
             
             # Récupérer les dernières mesures
-            mesures_recentes = self._recuperer_mesures_recentes(capteur_id)
+            maintenant = timezone.now()
+            mesures_recentes = self._recuperer_mesures_recentes(maintenant, capteur_id, zone_ids)
             
             if not mesures_recentes:
                 return {"success": False, "message": "Aucune mesure récente trouvée"}
             
-            # Analyser chaque zone
-            resultats = []
-            for zone, mesures in mesures_recentes.items():
-                analyse = self._analyser_zone_mesures(zone, mesures)
+            # Zones concernées, chargées en une requête (sans la géométrie)
+            zones = Zone.objects.only('id', 'nom').in_bulk(list(mesures_recentes))
+            
+            # Statistiques des mesures de chaque zone
+            zones_analysees = [
+                (zones[zone_id], mesures, self._calculer_statistiques_mesures(mesures))
+                for zone_id, mesures in mesures_recentes.items()
+            ]
+            
+            # Scores d'érosion de toutes les zones en un seul calcul vectorisé
+            scores = self._calculer_scores_erosion_mesures([stats for _, _, stats in zones_analysees])
+            
+            # Analyser chaque zone (prédictions construites sans être enregistrées)
+            analyses = []
+            for (zone, mesures, stats_mesures), score_erosion in zip(zones_analysees, scores):
+                analyse = self._analyser_zone_mesures(zone, mesures, stats_mesures, float(score_erosion))
                 if analyse:
-                    resultats.append(analyse)
+                    analyses.append(analyse)
             
-            # Générer des alertes si nécessaire
-            alertes_generees = self._generer_alertes_simples(resultats)
+            # Enregistrer les prédictions puis les alertes (une insertion par
+            # table) dans une seule transaction
+            with transaction.atomic():
+                resultats = self._enregistrer_predictions(analyses)
+                
+                # Générer des alertes si nécessaire
+                alertes_generees = self._generer_alertes_simples(resultats)
             
-            self.logger.info(f"✅ Analyse terminée: {len(resultats)} zones analysées, {len(alertes_generees)} alertes générées")
+            self.logger.info("✅ Analyse terminée: %s zones analysées, %s alertes générées", len(resultats), len(alertes_generees))
             
             return {
                 "success": True,
@@ -63,149 +115,141 @@ class AnalyseCapteursService:
             }
             
         except Exception as e:
-            self.logger.error(f"❌ Erreur lors de l'analyse: {e}")
+            self.logger.error("❌ Erreur lors de l'analyse: %s", e)
             return {"success": False, "message": f"Erreur: {str(e)}"}
     
-    def _recuperer_mesures_recentes(self, capteur_id: int = None) -> Dict:
-        """Récupère les mesures récentes des capteurs (dernières 2 heures)"""
+    def _recuperer_mesures_recentes(self, maintenant: datetime, capteur_id: int = None,
+                                    zone_ids: List[int] = None) -> Dict:
+        """
+        Récupère les mesures récentes des capteurs (dernières 2 heures), par
+        identifiant de zone : {zone_id: [(zone_id, unite, valeur, timestamp), ...]}
+        Les mesures sont des tuples nommés, sans instance de modèle, regroupées
+        par unité (sans ordre chronologique).
+        """
         try:
             # Période de 2 heures
-            depuis = timezone.now() - timedelta(hours=2)
+            depuis = maintenant - timedelta(hours=2)
             
-            # Filtrer les capteurs
+            # Mesures récentes de tous les capteurs actifs en une seule requête,
+            # réduites aux colonnes analysées (regroupées par unité)
+            mesures = MesureArduino.objects.filter(
+                capteur__actif=True,
+                timestamp__gte=depuis,
+                est_valide=True
+            )
             if capteur_id:
-                capteurs = CapteurArduino.objects.filter(id=capteur_id, actif=True)
-            else:
-                capteurs = CapteurArduino.objects.filter(actif=True)
+                mesures = mesures.filter(capteur_id=capteur_id)
+            if zone_ids is not None:
+                mesures = mesures.filter(capteur__zone_id__in=zone_ids)
+            mesures = mesures.order_by('capteur__zone_id', 'unite').values_list(
+                'capteur__zone_id', 'unite', 'valeur', 'timestamp', named=True
+            )
             
-            mesures_par_zone = {}
+            mesures_par_zone = defaultdict(list)
             
-            for capteur in capteurs:
-                zone = capteur.zone
-                if zone not in mesures_par_zone:
-                    mesures_par_zone[zone] = []
-                
-                # Récupérer les mesures récentes
-                mesures = MesureArduino.objects.filter(
-                    capteur=capteur,
-                    timestamp__gte=depuis,
-                    est_valide=True
-                ).order_by('-timestamp')
-                
-                mesures_par_zone[zone].extend(mesures)
+            for mesure in mesures:
+                mesures_par_zone[mesure.capteur__zone_id].append(mesure)
             
-            return mesures_par_zone
+            return dict(mesures_par_zone)
             
         except Exception as e:
-            self.logger.error(f"Erreur lors de la récupération des mesures: {e}")
+            self.logger.error("Erreur lors de la récupération des mesures: %s", e)
             return {}
     
-    def _analyser_zone_mesures(self, zone: Zone, mesures: List[MesureArduino]) -> Optional[Dict]:
-        """Analyse les mesures d'une zone spécifique"""
+    def _analyser_zone_mesures(self, zone: Zone, mesures: List[Tuple], stats_mesures: Dict,
+                               score_erosion: float) -> Optional[Tuple]:
+        """
+        Analyse les mesures d'une zone spécifique à partir de leurs statistiques
+        et du score d'érosion de la zone.
+        Retourne le résultat et la prédiction (non enregistrée) de la zone.
+        """
         try:
             if not mesures:
                 return None
             
-            # Calculer les statistiques des mesures
-            stats_mesures = self._calculer_statistiques_mesures(mesures)
-            
-            # Calculer le score d'érosion basé sur les mesures
-            score_erosion = self._calculer_score_erosion_mesures(stats_mesures)
-            
             # Déterminer le niveau de risque
             niveau_risque = self._determiner_niveau_risque(score_erosion)
             
             # Générer une prédiction simple
             prediction = self._generer_prediction_simple(zone, stats_mesures, score_erosion, niveau_risque)
             
-            return {
+            resultat = {
                 "zone_id": zone.id,
                 "zone_nom": zone.nom,
                 "score_erosion": score_erosion,
                 "niveau_risque": niveau_risque,
                 "nb_mesures": len(mesures),
-                "prediction_id": prediction.id if prediction else None,
+                "prediction_id": None,
                 "stats_mesures": stats_mesures,
-                "derniere_mesure": mesures[0].timestamp if mesures else None
+                "derniere_mesure": max(map(attrgetter('timestamp'), mesures))
             }
+            return resultat, prediction
             
         except Exception as e:
-            self.logger.error(f"Erreur lors de l'analyse de la zone {zone.nom}: {e}")
+            self.logger.error("Erreur lors de l'analyse de la zone %s: %s", zone.nom, e)
             return None
     
-    def _calculer_statistiques_mesures(self, mesures: List[MesureArduino]) -> Dict:
-        """Calcule les statistiques des mesures"""
+    def _enregistrer_predictions(self, analyses: List[Tuple]) -> List[Dict]:
+        """
+        Enregistrer en lot les prédictions construites par _analyser_zone_mesures,
+        puis compléter les résultats avec leurs ids
+        """
+        predictions = [prediction for _, prediction in analyses if prediction]
+        Prediction.objects.bulk_create(predictions, batch_size=TAILLE_LOT)
+        
+        resultats = []
+        for resultat, prediction in analyses:
+            resultat['prediction_id'] = prediction.id if prediction else None
+            resultats.append(resultat)
+        return resultats
+    
+    def _calculer_statistiques_mesures(self, mesures: List[Tuple]) -> Dict:
+        """
+        Calcule les statistiques des mesures, déjà regroupées par unité
+        (la dernière valeur est celle du timestamp le plus récent de l'unité)
+        """
         if not mesures:
             return {}
         
-        # Grouper par type de mesure
-        mesures_par_type = {}
-        for mesure in mesures:
-            unite = mesure.unite
-            if unite not in mesures_par_type:
-                mesures_par_type[unite] = []
-            mesures_par_type[unite].append(mesure.valeur)
+        # Valeurs dans l'ordre des mesures, et groupe de chaque unité
+        valeurs = np.fromiter(map(attrgetter('valeur'), mesures), dtype=np.float64, count=len(mesures))
+        groupes = [(unite, list(groupe)) for unite, groupe in groupby(mesures, key=attrgetter('unite'))]
+        comptes = np.array([len(groupe) for _, groupe in groupes])
+        debuts = np.concatenate(([0], np.cumsum(comptes)[:-1]))
+        
+        sommes = np.add.reduceat(valeurs, debuts)
+        minimums = np.minimum.reduceat(valeurs, debuts)
+        maximums = np.maximum.reduceat(valeurs, debuts)
         
         stats = {}
-        for unite, valeurs in mesures_par_type.items():
-            if valeurs:
-                stats[unite] = {
-                    'moyenne': sum(valeurs) / len(valeurs),
-                    'min': min(valeurs),
-                    'max': max(valeurs),
-                    'count': len(valeurs),
-                    'derniere_valeur': valeurs[0]  # Première = plus récente (trié par -timestamp)
-                }
+        for i, (unite, groupe) in enumerate(groupes):
+            stats[unite] = {
+                'moyenne': float(sommes[i] / comptes[i]),
+                'min': float(minimums[i]),
+                'max': float(maximums[i]),
+                'count': int(comptes[i]),
+                'derniere_valeur': max(groupe, key=attrgetter('timestamp')).valeur
+            }
         
         return stats
     
-    def _calculer_score_erosion_mesures(self, stats_mesures: Dict) -> float:
-        """Calcule un score d'érosion basé uniquement sur les mesures des capteurs"""
-        score = 0.0
-        
-        # Facteur température (si disponible)
-        if '°C' in stats_mesures:
-            temp = stats_mesures['°C']['moyenne']
-            if temp > 30:  # Température élevée = risque accru
-                score += (temp - 30) * 2
-            elif temp < 15:  # Température basse = risque modéré
-                score += (15 - temp) * 0.5
-        
-        # Facteur humidité (si disponible)
-        if '%' in stats_mesures:
-            hum = stats_mesures['%']['moyenne']
-            if hum > 80:  # Humidité élevée = risque accru
-                score += (hum - 80) * 0.5
-            elif hum < 30:  # Humidité basse = risque modéré
-                score += (30 - hum) * 0.2
-        
-        # Facteur pluie (si disponible)
-        if 'pluie' in stats_mesures:
-            pluie = stats_mesures['pluie']['moyenne']
-            if pluie > 50:  # Pluie importante = risque accru
-                score += (pluie - 50) * 0.3
-        
-        # Facteur niveau d'eau (si disponible)
-        if 'eau' in stats_mesures:
-            eau = stats_mesures['eau']['moyenne']
-            if eau > 80:  # Niveau d'eau élevé = risque accru
-                score += (eau - 80) * 0.4
-        
-        return min(score, 100.0)  # Limiter à 100
+    def _calculer_scores_erosion_mesures(self, stats_mesures_zones: List[Dict]) -> np.ndarray:
+        """
+        Calcule le score d'érosion de chaque zone, basé uniquement sur les
+        mesures des capteurs, en un seul appel vectorisé
+        """
+        moyennes = np.array([
+            [stats_mesures[unite]['moyenne'] if unite in stats_mesures else np.nan for unite in UNITES_SCORE]
+            for stats_mesures in stats_mesures_zones
+        ]).reshape(-1, len(UNITES_SCORE))
+        return _score_erosion_mesures(moyennes)
     
     def _determiner_niveau_risque(self, score_erosion: float) -> str:
-        """Détermine le niveau de risque basé sur le score"""
-        if score_erosion >= 80:
-            return 'critique'
-        elif score_erosion >= 60:
-            return 'eleve'
-        elif score_erosion >= 30:
-            return 'modere'
-        else:
-            return 'faible'
+        """Détermine le niveau de risque basé sur le score (seuils inclus)"""
+        return NIVEAUX_RISQUE[bisect_right(SEUILS_NIVEAU_RISQUE, score_erosion)]
     
     def _generer_prediction_simple(self, zone: Zone, stats_mesures: Dict, score_erosion: float, niveau_risque: str) -> Optional[Prediction]:
-        """Génère une prédiction simple basée sur les mesures"""
+        """Construit (sans l'enregistrer) une prédiction simple basée sur les mesures"""
         try:
             # Calculer la confiance basée sur le nombre de mesures
             nb_mesures_total = sum(stats['count'] for stats in stats_mesures.values())
@@ -214,8 +258,8 @@ class AnalyseCapteursService:
             # Calculer le taux d'érosion prédit
             taux_erosion_pred = score_erosion * 0.01  # Convertir en m/an
             
-            # Créer une prédiction simple avec le modèle Prediction
-            prediction = Prediction.objects.create(
+            # Construire une prédiction simple avec le modèle Prediction
+            prediction = Prediction(
                 zone=zone,
                 taux_erosion_pred_m_an=taux_erosion_pred,
                 taux_erosion_min_m_an=max(0, taux_erosion_pred - taux_erosion_pred * 0.2),
@@ -227,7 +271,7 @@ class AnalyseCapteursService:
             return prediction
             
         except Exception as e:
-            self.logger.error(f"Erreur lors de la génération de la prédiction: {e}")
+            self.logger.error("Erreur lors de la génération de la prédiction: %s", e)
             return None
     
     def _generer_recommandations_simples(self, niveau_risque: str, stats_mesures: Dict) -> List[str]:
@@ -288,45 +332,46 @@ class AnalyseCapteursService:
     
     def _generer_alertes_simples(self, resultats: List[Dict]) -> List[Dict]:
         """Génère des alertes simples si nécessaire"""
-        alertes_generees = []
+        resultats_alerte = [r for r in resultats if r['niveau_risque'] in ['eleve', 'critique']]
         
-        for resultat in resultats:
-            if resultat['niveau_risque'] in ['eleve', 'critique']:
-                try:
-                    zone = Zone.objects.get(id=resultat['zone_id'])
-                    
-                    # Créer une alerte enrichie
-                    alerte = AlerteEnrichie.objects.create(
-                        zone=zone,
-                        prediction_enrichie_id=resultat.get('prediction_id'),
-                        type='erosion_predite',
-                        niveau=resultat['niveau_risque'],
-                        titre=f"🚨 Alerte érosion - {zone.nom}",
-                        description=f"Risque d'érosion {resultat['niveau_risque']} détecté par les capteurs. Score: {resultat['score_erosion']:.1f}",
-                        est_active=True,
-                        actions_requises=[
-                            "Surveillance renforcée des capteurs",
-                            "Analyse des données en temps réel",
-                            "Préparation des mesures de protection"
-                        ],
-                        donnees_contexte={
-                            'score_erosion': resultat['score_erosion'],
-                            'nb_mesures': resultat['nb_mesures'],
-                            'stats_mesures': resultat['stats_mesures']
-                        }
-                    )
-                    
-                    alertes_generees.append({
-                        'alerte_id': alerte.id,
-                        'zone': zone.nom,
-                        'niveau': resultat['niveau_risque'],
-                        'titre': alerte.titre
-                    })
-                    
-                except Exception as e:
-                    self.logger.error(f"Erreur lors de la création de l'alerte: {e}")
+        # L'identifiant et le nom de la zone sont déjà dans le résultat de
+        # l'analyse : aucune relecture de la zone n'est nécessaire
+        alertes = []
+        for resultat in resultats_alerte:
+            # Construire une alerte enrichie (la prédiction simple n'est
+            # pas une PredictionEnrichie : son id est gardé dans le contexte)
+            alertes.append(AlerteEnrichie(
+                zone_id=resultat['zone_id'],
+                type='erosion_predite',
+                niveau=resultat['niveau_risque'],
+                titre=f"🚨 Alerte érosion - {resultat['zone_nom']}",
+                description=f"Risque d'érosion {resultat['niveau_risque']} détecté par les capteurs. Score: {resultat['score_erosion']:.1f}",
+                est_active=True,
+                actions_requises=[
+                    "Surveillance renforcée des capteurs",
+                    "Analyse des données en temps réel",
+                    "Préparation des mesures de protection"
+                ],
+                donnees_contexte={
+                    'score_erosion': resultat['score_erosion'],
+                    'nb_mesures': resultat['nb_mesures'],
+                    'stats_mesures': resultat['stats_mesures'],
+                    'prediction_id': resultat.get('prediction_id')
+                }
+            ))
+        
+        # Enregistrer toutes les alertes en une insertion (dans la transaction de l'analyse)
+        AlerteEnrichie.objects.bulk_create(alertes, batch_size=TAILLE_LOT)
         
-        return alertes_generees
+        return [
+            {
+                'alerte_id': alerte.id,
+                'zone': resultat['zone_nom'],
+                'niveau': alerte.niveau,
+                'titre': alerte.titre
+            }
+            for alerte, resultat in zip(alertes, resultats_alerte)
+        ]
 
 
 # Instance globale du service
@@ -1,78 +1,253 @@
-from celery import shared_task
+from celery import shared_task, group
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta, datetime
-import random
+from datetime import timedelta, datetime, time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+import inspect
+import json
 import logging
+import os
+import tempfile
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, StdDev, Value
+from django.contrib.gis.db.models.functions import Centroid
+from django.db.models.functions import Concat
 from .models import (
     Capteur, Mesure, Zone, DonneesEnvironnementales, AnalyseErosion,
     CapteurArduino, MesureArduino, DonneesManquantes, LogCapteurArduino,
-    EvenementExterne, FusionDonnees, PredictionEnrichie, AlerteEnrichie, ArchiveDonnees
+    EvenementExterne, FusionDonnees, PredictionEnrichie, AlerteEnrichie, ArchiveDonnees,
+    HistoriqueErosion, ModeleML, Prediction
 )
 # Imports supprimés - fichiers de services inutilisés supprimés
 from .services.analyse_fusion_service import AnalyseFusionService, ArchiveService
+from .services_analyse_capteurs import analyse_capteurs_service
 
 logger = logging.getLogger(__name__)
 
+# Taille des lots pour les insertions groupées
+TAILLE_LOT = getattr(settings, 'BULK_CREATE_BATCH_SIZE', 500)
+
+# Plage réaliste (min, max, décimales) des valeurs générées par type de capteur
+PLAGES_VALEURS_MESURE = {
+    'temperature': (24, 34, 1),
+    'salinite': (30, 40, 2),
+    'houle': (0.5, 3.5, 2),
+    'vent': (5, 60, 1),
+    'pluviometrie': (0, 100, 1),
+    'niveau_mer': (-2, 4, 2),
+    'ph': (7.5, 8.5, 2),
+    'turbidite': (0.1, 50, 1)
+}
+PLAGE_VALEURS_DEFAUT = (0, 100, 2)
+
+# Nombre de zones analysées par sous-tâche d'analyse des mesures capteurs
+ZONES_PAR_LOT_ANALYSE = 20
+
+# Nombre maximal d'événements externes réclamés par passage du traitement
+EVENEMENTS_RECLAMES_PAR_PASSAGE = 500
+
+# Nombre de lignes lues par page lors des exports en flux
+TAILLE_LOT_EXPORT = 2000
+
+# Encodeur partagé des exports JSON (json.dumps avec options en recrée un à
+# chaque appel)
+ENCODEUR_JSON_EXPORT = json.JSONEncoder(ensure_ascii=False)
+
+# Nombre de fichiers d'archives supprimés en parallèle lors des purges
+ARCHIVES_PURGEES_EN_PARALLELE = 16
+
+# Nombre de lignes supprimées par requête DELETE lors des nettoyages
+TAILLE_LOT_SUPPRESSION = 1000
+
+# Compteurs du rapport quotidien de fusion (bornes [début, fin) répétées par table)
+SQL_RAPPORT_FUSION_QUOTIDIEN = """
+    WITH ev AS (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE is_traite) AS traites,
+               COUNT(*) FILTER (WHERE NOT is_traite) AS non_traites,
+               COUNT(*) FILTER (WHERE is_simulation) AS simulations
+        FROM {evenements}
+        WHERE date_evenement >= %s AND date_evenement < %s
+    ), fu AS (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE statut = 'terminee') AS terminees,
+               COUNT(*) FILTER (WHERE statut = 'en_cours') AS en_cours,
+               COUNT(*) FILTER (WHERE statut = 'erreur') AS erreurs
+        FROM {fusions}
+        WHERE date_creation >= %s AND date_creation < %s
+    ), pr AS (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE erosion_predite) AS erosion_predite,
+               COUNT(*) FILTER (WHERE NOT erosion_predite) AS erosion_non_predite
+        FROM {predictions}
+        WHERE date_prediction >= %s AND date_prediction < %s
+    ), al AS (
+        SELECT COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE est_active) AS actives,
+               COUNT(*) FILTER (WHERE est_resolue) AS resolues
+        FROM {alertes}
+        WHERE date_creation >= %s AND date_creation < %s
+    )
+    SELECT ev.total, ev.traites, ev.non_traites, ev.simulations,
+           fu.total, fu.terminees, fu.en_cours, fu.erreurs,
+           pr.total, pr.erosion_predite, pr.erosion_non_predite,
+           al.total, al.actives, al.resolues
+    FROM ev, fu, pr, al
+"""
+
+
+def _supprimer_lignes(queryset, taille_lot=TAILLE_LOT_SUPPRESSION, brut=False):
+    """
+    Supprimer les lignes du queryset par lots de taille_lot (transactions
+    courtes, verrous brefs) et retourner leur nombre, compté par les
+    suppressions elles-mêmes (hors suppressions en cascade)
+
+    brut=True émet directement le DELETE SQL (_raw_delete), sans collecteur
+    ni signaux : réservé aux modèles feuilles, qu'aucune clé étrangère ne
+    référence et sans receiver pre_delete/post_delete. C'est le cas de
+    Mesure, AnalyseErosion, Prediction et AlerteEnrichie ; pas de
+    PredictionEnrichie (AlerteEnrichie en CASCADE) ni d'EvenementExterne
+    (FusionDonnees et AlerteEnrichie en CASCADE). Toute nouvelle FK vers un
+    modèle feuille impose de repasser ses nettoyages en brut=False.
+    """
+    modele = queryset.model
+    total = 0
+    while True:
+        pks = list(queryset.order_by().values_list('pk', flat=True)[:taille_lot])
+        if not pks:
+            return total
+        lot = modele.objects.filter(pk__in=pks)
+        if brut:
+            total += lot._raw_delete(lot.db)
+        else:
+            _, suppressions_par_modele = lot.delete()
+            total += suppressions_par_modele.get(modele._meta.label, 0)
+
+
+def _ecrire_tableau_json(fichier, lignes, convertir):
+    """Écrire les éléments d'un tableau JSON un par un et retourner leur nombre"""
+    nombre = 0
+    for ligne in lignes:
+        fichier.write(',\n    ' if nombre else '\n    ')
+        fichier.write(ENCODEUR_JSON_EXPORT.encode(convertir(ligne)))
+        nombre += 1
+    return nombre
+
+
+def _supprimer_fichier(chemin):
+    """Supprimer un fichier ; un fichier déjà absent compte comme supprimé"""
+    try:
+        os.unlink(chemin)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(f"Erreur suppression fichier {chemin}: {e}")
+        return False
+    return True
+
+
+def _compter_par(queryset, champ):
+    """Nombre de lignes du queryset par valeur de champ, en un GROUP BY"""
+    return {
+        ligne[champ]: ligne['nombre']
+        for ligne in queryset.order_by().values(champ).annotate(nombre=Count('id'))
+    }
+
+
+def _journaliser_erreurs(libelle):
+    """
+    Décorer une tâche : toute exception est journalisée (« Erreur lors
+    <libelle> ») et convertie en message de retour « Erreur: ... ».
+    libelle peut référencer les arguments de la tâche, ex. {zone_id}
+    """
+    def decorateur(fonction):
+        signature = inspect.signature(fonction)
+        
+        @wraps(fonction)
+        def tache(*args, **kwargs):
+            try:
+                return fonction(*args, **kwargs)
+            except Exception as e:
+                arguments = signature.bind(*args, **kwargs)
+                arguments.apply_defaults()
+                logger.error("Erreur lors %s: %s", libelle.format(**arguments.arguments), e)
+                return f"Erreur: {str(e)}"
+        return tache
+    return decorateur
+
+
+def _dernieres_mesures_capteurs_actifs():
+    """Timestamp de la dernière mesure de chaque capteur actif, en une requête"""
+    return dict(
+        Mesure.objects.filter(capteur__etat='actif').order_by().values('capteur_id').annotate(
+            derniere=Max('timestamp')
+        ).values_list('capteur_id', 'derniere')
+    )
+
 
 @shared_task
+@transaction.atomic
 def generer_mesures_automatiques():
     """
     Tâche Celery pour générer automatiquement des mesures
-    Exécutée toutes les X minutes selon la fréquence des capteurs
+    Exécutée toutes les X minutes selon la fréquence des capteurs.
+    Les capteurs traités sont verrouillés : un autre worker lancé en même
+    temps ignore ceux-ci au lieu de générer leurs mesures en double.
     """
-    print("🔄 Génération automatique de mesures...")
+    logger.info("🔄 Génération automatique de mesures...")
     
-    capteurs_actifs = Capteur.objects.filter(etat='actif')
-    mesures_creees = 0
+    capteurs_actifs = Capteur.objects.select_for_update(skip_locked=True).filter(
+        etat='actif'
+    ).only('id', 'type', 'frequence_mesure_min')
+    dernieres_mesures = _dernieres_mesures_capteurs_actifs()
+    maintenant = timezone.now()
+    capteurs_par_type = defaultdict(list)
     
     for capteur in capteurs_actifs:
         # Vérifier si le capteur doit prendre une mesure maintenant
-        derniere_mesure = capteur.mesures.first()
+        derniere_mesure = dernieres_mesures.get(capteur.id)
         if derniere_mesure:
-            temps_ecoule = timezone.now() - derniere_mesure.timestamp
+            temps_ecoule = maintenant - derniere_mesure
             frequence_minutes = timedelta(minutes=capteur.frequence_mesure_min)
             
             if temps_ecoule < frequence_minutes:
                 continue  # Pas encore le moment de prendre une mesure
         
-        # Générer une nouvelle mesure
-        valeur = generer_valeur_mesure(capteur.type)
-        unite = get_unite_mesure(capteur.type)
-        
-        Mesure.objects.create(
-            capteur=capteur,
-            valeur=valeur,
-            unite=unite,
-            timestamp=timezone.now(),
-            qualite_donnee='bonne',
-            commentaires="Mesure automatique générée"
-        )
-        mesures_creees += 1
+        capteurs_par_type[capteur.type].append(capteur)
+    
+    # Générer les nouvelles mesures : un tirage par type de capteur
+    generateur = np.random.default_rng()
+    nouvelles_mesures = []
+    for type_capteur, capteurs in capteurs_par_type.items():
+        valeurs = generer_valeurs_mesure(type_capteur, len(capteurs), generateur)
+        unite = get_unite_mesure(type_capteur)
+        
+        for capteur, valeur in zip(capteurs, valeurs.tolist()):
+            nouvelles_mesures.append(Mesure(
+                capteur=capteur,
+                valeur=valeur,
+                unite=unite,
+                timestamp=maintenant,
+                qualite_donnee='bonne',
+                commentaires="Mesure automatique générée"
+            ))
+    
+    # Enregistrer toutes les mesures en une insertion groupée
+    Mesure.objects.bulk_create(nouvelles_mesures, batch_size=TAILLE_LOT)
+    mesures_creees = len(nouvelles_mesures)
     
-    print(f"✅ {mesures_creees} mesures générées automatiquement")
+    logger.info("✅ %s mesures générées automatiquement", mesures_creees)
     return f"{mesures_creees} mesures créées"
 
 
-def generer_valeur_mesure(type_capteur):
-    """Génère une valeur réaliste selon le type de capteur"""
-    if type_capteur == "temperature":
-        return round(random.uniform(24, 34), 1)
-    elif type_capteur == "salinite":
-        return round(random.uniform(30, 40), 2)
-    elif type_capteur == "houle":
-        return round(random.uniform(0.5, 3.5), 2)
-    elif type_capteur == "vent":
-        return round(random.uniform(5, 60), 1)
-    elif type_capteur == "pluviometrie":
-        return round(random.uniform(0, 100), 1)
-    elif type_capteur == "niveau_mer":
-        return round(random.uniform(-2, 4), 2)
-    elif type_capteur == "ph":
-        return round(random.uniform(7.5, 8.5), 2)
-    elif type_capteur == "turbidite":
-        return round(random.uniform(0.1, 50), 1)
-    else:
-        return round(random.uniform(0, 100), 2)
+def generer_valeurs_mesure(type_capteur, nombre, generateur=None):
+    """Génère nombre valeurs réalistes selon le type de capteur (tableau NumPy)"""
+    generateur = generateur or np.random.default_rng()
+    minimum, maximum, decimales = PLAGES_VALEURS_MESURE.get(type_capteur, PLAGE_VALEURS_DEFAUT)
+    return generateur.uniform(minimum, maximum, size=nombre).round(decimales)
 
 
 def get_unite_mesure(type_capteur):
@@ -95,41 +270,49 @@ def nettoyer_anciennes_mesures():
     """
     Tâche pour nettoyer les anciennes mesures (plus de 1 an)
     """
-    print("🧹 Nettoyage des anciennes mesures...")
+    logger.info("🧹 Nettoyage des anciennes mesures...")
     
     date_limite = timezone.now() - timedelta(days=365)
     anciennes_mesures = Mesure.objects.filter(timestamp__lt=date_limite)
-    nombre_supprimees = anciennes_mesures.count()
-    
-    anciennes_mesures.delete()
+    nombre_supprimees = _supprimer_lignes(anciennes_mesures, brut=True)
     
-    print(f"✅ {nombre_supprimees} anciennes mesures supprimées")
+    logger.info("✅ %s anciennes mesures supprimées", nombre_supprimees)
     return f"{nombre_supprimees} mesures supprimées"
 
 
 @shared_task
+@transaction.atomic
 def verifier_etat_capteurs():
     """
     Tâche pour vérifier l'état des capteurs et générer des alertes
+    (capteurs verrouillés, ceux déjà pris par un autre worker sont ignorés)
     """
-    print("🔍 Vérification de l'état des capteurs...")
+    logger.info("🔍 Vérification de l'état des capteurs...")
+    
+    maintenant = timezone.now()
     
     capteurs_defaillants = []
+    dernieres_mesures = _dernieres_mesures_capteurs_actifs()
     
-    for capteur in Capteur.objects.filter(etat='actif'):
+    capteurs_actifs = Capteur.objects.select_for_update(skip_locked=True).filter(
+        etat='actif'
+    ).only('id', 'nom', 'frequence_mesure_min')
+    
+    for capteur in capteurs_actifs:
         # Vérifier si le capteur n'a pas envoyé de données récemment
-        derniere_mesure = capteur.mesures.first()
+        derniere_mesure = dernieres_mesures.get(capteur.id)
         if derniere_mesure:
-            temps_ecoule = timezone.now() - derniere_mesure.timestamp
+            temps_ecoule = maintenant - derniere_mesure
             # Si pas de mesure depuis plus de 2x la fréquence normale
             frequence_max = timedelta(minutes=capteur.frequence_mesure_min * 2)
             
             if temps_ecoule > frequence_max:
-                capteur.etat = 'defaillant'
-                capteur.save()
-                capteurs_defaillants.append(capteur.nom)
+                capteurs_defaillants.append(capteur)
     
-    print(f"⚠️ {len(capteurs_defaillants)} capteurs marqués comme défaillants")
+    # Marquer les capteurs défaillants en une seule mise à jour
+    Capteur.objects.filter(id__in=[capteur.id for capteur in capteurs_defaillants]).update(etat='defaillant')
+    
+    logger.warning("⚠️ %s capteurs marqués comme défaillants", len(capteurs_defaillants))
     return f"{len(capteurs_defaillants)} capteurs défaillants détectés"
 
 
@@ -143,15 +326,20 @@ def collecter_donnees_environnementales():
     Tâche pour collecter automatiquement les données environnementales
     de toutes les zones actives
     """
-    print("🌍 Collecte automatique des données environnementales...")
+    from .ml_services import DataConsolidationService
     
-    zones_actives = Zone.objects.all()
-    donnees_collectees = 0
+    logger.info("🌍 Collecte automatique des données environnementales...")
+    
+    maintenant = timezone.now()
+    
+    zones_actives = Zone.objects.annotate(centroide=Centroid('geometrie'))
+    consolidation_service = DataConsolidationService()
+    donnees_a_sauvegarder = []
     
     for zone in zones_actives:
         try:
             # Définir la période de collecte (dernières 24h)
-            end_date = datetime.now()
+            end_date = maintenant
             start_date = end_date - timedelta(days=1)
             
             # Formater les dates pour les APIs
@@ -159,21 +347,23 @@ def collecter_donnees_environnementales():
             end_date_str = end_date.strftime('%Y-%m-%d')
             
             # Collecter les données
-            consolidation_service = DataConsolidationService()
             consolidated_data = consolidation_service.collect_all_data(
                 zone, start_date_str, end_date_str
             )
+            # Construire la ligne ici : une zone aux données invalides est écartée seule
+            donnees_a_sauvegarder.append(
+                consolidation_service.build_donnees_env(zone, consolidated_data)
+            )
             
-            # Sauvegarder les données
-            donnees_env = consolidation_service.save_consolidated_data(zone, consolidated_data)
-            donnees_collectees += 1
-            
-            print(f"✅ Données collectées pour {zone.nom}")
+            logger.info("✅ Données collectées pour %s", zone.nom)
             
         except Exception as e:
-            print(f"❌ Erreur collecte {zone.nom}: {e}")
+            logger.error("❌ Erreur collecte %s: %s", zone.nom, e)
+    
+    # Sauvegarder toutes les zones en une seule insertion groupée
+    donnees_collectees = len(consolidation_service.save_donnees_env_bulk(donnees_a_sauvegarder))
     
-    print(f"📊 {donnees_collectees} zones traitées")
+    logger.info("📊 %s zones traitées", donnees_collectees)
     return f"{donnees_collectees} zones traitées"
 
 
@@ -183,11 +373,13 @@ def generer_analyses_erosion_automatiques():
     Tâche pour générer automatiquement des analyses d'érosion
     pour toutes les zones avec des données environnementales récentes
     """
-    print("🔬 Génération automatique d'analyses d'érosion...")
+    logger.info("🔬 Génération automatique d'analyses d'érosion...")
+    
+    maintenant = timezone.now()
     
     # Récupérer les zones avec des données environnementales récentes
     zones_avec_donnees = Zone.objects.filter(
-        donnees_environnementales__date_collecte__gte=timezone.now() - timedelta(days=1)
+        donnees_environnementales__date_collecte__gte=maintenant - timedelta(days=1)
     ).distinct()
     
     analyses_creees = 0
@@ -204,7 +396,7 @@ def generer_analyses_erosion_automatiques():
                 analyse_recente = AnalyseErosion.objects.filter(
                     zone=zone,
                     donnees_environnementales=donnees_env,
-                    date_analyse__gte=timezone.now() - timedelta(hours=6)
+                    date_analyse__gte=maintenant - timedelta(hours=6)
                 ).exists()
                 
                 if not analyse_recente:
@@ -213,12 +405,12 @@ def generer_analyses_erosion_automatiques():
                     analyse = analyse_view._calculer_analyse_erosion(zone, donnees_env, 30)
                     analyses_creees += 1
                     
-                    print(f"✅ Analyse créée pour {zone.nom}")
+                    logger.info("✅ Analyse créée pour %s", zone.nom)
             
         except Exception as e:
-            print(f"❌ Erreur analyse {zone.nom}: {e}")
+            logger.error("❌ Erreur analyse %s: %s", zone.nom, e)
     
-    print(f"📈 {analyses_creees} analyses créées")
+    logger.info("📈 %s analyses créées", analyses_creees)
     return f"{analyses_creees} analyses créées"
 
 
@@ -227,26 +419,26 @@ def nettoyer_donnees_anciennes():
     """
     Tâche pour nettoyer les anciennes données environnementales et analyses
     """
-    print("🧹 Nettoyage des anciennes données...")
+    logger.info("🧹 Nettoyage des anciennes données...")
+    
+    maintenant = timezone.now()
     
     # Nettoyer les données environnementales anciennes (plus de 3 mois)
-    date_limite_env = timezone.now() - timedelta(days=90)
+    date_limite_env = maintenant - timedelta(days=90)
     anciennes_donnees_env = DonneesEnvironnementales.objects.filter(
         date_collecte__lt=date_limite_env
     )
-    nb_env_supprimees = anciennes_donnees_env.count()
-    anciennes_donnees_env.delete()
+    nb_env_supprimees = _supprimer_lignes(anciennes_donnees_env)
     
     # Nettoyer les analyses anciennes (plus de 6 mois)
-    date_limite_analyses = timezone.now() - timedelta(days=180)
+    date_limite_analyses = maintenant - timedelta(days=180)
     anciennes_analyses = AnalyseErosion.objects.filter(
         date_analyse__lt=date_limite_analyses
     )
-    nb_analyses_supprimees = anciennes_analyses.count()
-    anciennes_analyses.delete()
+    nb_analyses_supprimees = _supprimer_lignes(anciennes_analyses, brut=True)
     
-    print(f"✅ {nb_env_supprimees} données environnementales supprimées")
-    print(f"✅ {nb_analyses_supprimees} analyses supprimées")
+    logger.info("✅ %s données environnementales supprimées", nb_env_supprimees)
+    logger.info("✅ %s analyses supprimées", nb_analyses_supprimees)
     
     return f"{nb_env_supprimees} données env et {nb_analyses_supprimees} analyses supprimées"
 
@@ -256,7 +448,7 @@ def synchroniser_donnees_cartographiques():
     """
     Tâche pour synchroniser les données cartographiques avec les APIs externes
     """
-    print("🗺️ Synchronisation des données cartographiques...")
+    logger.info("🗺️ Synchronisation des données cartographiques...")
     
     # Cette tâche pourrait être étendue pour télécharger automatiquement
     # les nouvelles images satellites, données de substrat, etc.
@@ -271,13 +463,13 @@ def synchroniser_donnees_cartographiques():
             # - Mettre à jour les données de substrat
             # - Synchroniser les données hydrographiques
             
-            print(f"✅ Données cartographiques synchronisées pour {zone.nom}")
+            logger.info("✅ Données cartographiques synchronisées pour %s", zone.nom)
             donnees_synchronisees += 1
             
         except Exception as e:
-            print(f"❌ Erreur synchronisation {zone.nom}: {e}")
+            logger.error("❌ Erreur synchronisation %s: %s", zone.nom, e)
     
-    print(f"🗺️ {donnees_synchronisees} zones synchronisées")
+    logger.info("🗺️ %s zones synchronisées", donnees_synchronisees)
     return f"{donnees_synchronisees} zones synchronisées"
 
 
@@ -286,24 +478,27 @@ def generer_rapport_quotidien():
     """
     Tâche pour générer un rapport quotidien des activités du système
     """
-    print("📊 Génération du rapport quotidien...")
+    logger.info("📊 Génération du rapport quotidien...")
     
-    # Statistiques du jour
-    aujourd_hui = timezone.now().date()
+    # Statistiques du jour, bornées par un intervalle [début, fin[ plutôt
+    # qu'un filtre __date, afin que les index sur les dates restent utilisables
+    aujourd_hui = timezone.localdate()
+    debut_jour = timezone.make_aware(datetime.combine(aujourd_hui, time.min))
+    fin_jour = debut_jour + timedelta(days=1)
     
     # Nombre de mesures générées
     mesures_aujourd_hui = Mesure.objects.filter(
-        timestamp__date=aujourd_hui
+        timestamp__gte=debut_jour, timestamp__lt=fin_jour
     ).count()
     
     # Nombre de données environnementales collectées
     donnees_env_aujourd_hui = DonneesEnvironnementales.objects.filter(
-        date_collecte__date=aujourd_hui
+        date_collecte__gte=debut_jour, date_collecte__lt=fin_jour
     ).count()
     
     # Nombre d'analyses créées
     analyses_aujourd_hui = AnalyseErosion.objects.filter(
-        date_analyse__date=aujourd_hui
+        date_analyse__gte=debut_jour, date_analyse__lt=fin_jour
     ).count()
     
     # Zones actives
@@ -318,7 +513,7 @@ def generer_rapport_quotidien():
         'statut_systeme': 'opérationnel'
     }
     
-    print(f"📈 Rapport quotidien généré: {rapport}")
+    logger.info("📈 Rapport quotidien généré: %s", rapport)
     return rapport
 
 
@@ -326,6 +521,37 @@ def generer_rapport_quotidien():
 # NOUVELLES TÂCHES POUR LES CAPTEURS ARDUINO
 # ============================================================================
 
+@shared_task
+def analyser_mesures_capteurs():
+    """
+    Tâche pour analyser les mesures récentes des capteurs Arduino : les zones
+    équipées de capteurs actifs sont réparties par lots entre les workers
+    """
+    logger.info("🔍 Répartition de l'analyse des mesures capteurs")
+    
+    zone_ids = list(
+        CapteurArduino.objects.filter(actif=True).order_by('zone_id').values_list('zone_id', flat=True).distinct()
+    )
+    lots = [zone_ids[i:i + ZONES_PAR_LOT_ANALYSE] for i in range(0, len(zone_ids), ZONES_PAR_LOT_ANALYSE)]
+    
+    group(analyser_mesures_zones.s(lot) for lot in lots).apply_async()
+    
+    logger.info("✅ %s lots de zones envoyés pour analyse", len(lots))
+    return f"{len(lots)} lots de zones envoyés"
+
+
+@shared_task
+def analyser_mesures_zones(zone_ids: list):
+    """
+    Tâche pour analyser les mesures récentes des capteurs d'un lot de zones
+    """
+    resultat = analyse_capteurs_service.analyser_mesures_capteurs(zone_ids=zone_ids)
+    
+    if resultat['success']:
+        return f"{resultat['zones_analysees']} zones analysées, {resultat['alertes_generees']} alertes générées"
+    return f"Échec: {resultat['message']}"
+
+
 # Tâches supprimées - services Arduino inutilisés supprimés
 # @shared_task
 # def monitorer_capteurs_arduino():
@@ -362,478 +588,474 @@ def generer_rapport_quotidien():
 # NOUVELLES TÂCHES POUR ÉVÉNEMENTS EXTERNES ET FUSION DE DONNÉES
 # ============================================================================
 
-@shared_task
+@shared_task(acks_late=True)
+@_journaliser_erreurs("de l'analyse de l'événement {evenement_id}")
 def analyser_fusion_evenement(evenement_id: int):
     """
     Tâche pour analyser un événement externe et créer une fusion de données
     """
-    logger.info(f"Analyse de fusion pour l'événement {evenement_id}")
+    logger.info("Analyse de fusion pour l'événement %s", evenement_id)
     
-    try:
-        service = AnalyseFusionService()
-        resultat = service.analyser_evenement(evenement_id)
-        
-        if resultat['success']:
-            logger.info(f"Analyse terminée pour l'événement {evenement_id}: {resultat['message']}")
-            return f"Analyse réussie: {resultat['message']}"
-        else:
-            logger.error(f"Échec analyse événement {evenement_id}: {resultat['message']}")
-            return f"Échec: {resultat['message']}"
-            
-    except Exception as e:
-        logger.error(f"Erreur lors de l'analyse de l'événement {evenement_id}: {e}")
-        return f"Erreur: {str(e)}"
+    service = AnalyseFusionService()
+    resultat = service.analyser_evenement(evenement_id)
+    
+    if resultat['success']:
+        logger.info("Analyse terminée pour l'événement %s: %s", evenement_id, resultat['message'])
+        return f"Analyse réussie: {resultat['message']}"
+    else:
+        logger.error("Échec analyse événement %s: %s", evenement_id, resultat['message'])
+        return f"Échec: {resultat['message']}"
 
 
-@shared_task
+@shared_task(acks_late=True)
+@_journaliser_erreurs("de l'analyse de la zone {zone_id}")
 def analyser_fusion_zone(zone_id: int, periode_jours: int = 30):
     """
     Tâche pour analyser une zone complète et créer des fusions de données
     """
-    logger.info(f"Analyse de fusion pour la zone {zone_id} sur {periode_jours} jours")
+    logger.info("Analyse de fusion pour la zone %s sur %s jours", zone_id, periode_jours)
     
-    try:
-        service = AnalyseFusionService()
-        resultat = service.analyser_zone(zone_id, periode_jours)
-        
-        if resultat['success']:
-            logger.info(f"Analyse de zone terminée: {resultat['message']}")
-            return f"Analyse réussie: {resultat['message']}"
-        else:
-            logger.error(f"Échec analyse zone {zone_id}: {resultat['message']}")
-            return f"Échec: {resultat['message']}"
-            
-    except Exception as e:
-        logger.error(f"Erreur lors de l'analyse de la zone {zone_id}: {e}")
-        return f"Erreur: {str(e)}"
+    service = AnalyseFusionService()
+    resultat = service.analyser_zone(zone_id, periode_jours)
+    
+    if resultat['success']:
+        logger.info("Analyse de zone terminée: %s", resultat['message'])
+        return f"Analyse réussie: {resultat['message']}"
+    else:
+        logger.error("Échec analyse zone %s: %s", zone_id, resultat['message'])
+        return f"Échec: {resultat['message']}"
+
+
+@shared_task
+@_journaliser_erreurs("de la répartition des analyses de zones")
+def analyser_fusion_zones(periode_jours: int = 30):
+    """
+    Tâche pour analyser toutes les zones : une analyse de fusion par zone,
+    exécutées en parallèle par les workers
+    """
+    zone_ids = list(Zone.objects.order_by('id').values_list('id', flat=True))
+    
+    group(analyser_fusion_zone.s(zone_id, periode_jours) for zone_id in zone_ids).apply_async()
+    
+    logger.info("%s analyses de zones envoyées", len(zone_ids))
+    return f"{len(zone_ids)} analyses de zones envoyées"
 
 
 @shared_task
+@_journaliser_erreurs("du traitement des événements en attente")
 def traiter_evenements_en_attente():
     """
     Tâche pour traiter les événements externes en attente de traitement
     """
     logger.info("Traitement des événements en attente")
     
-    try:
-        # Récupérer les événements non traités des dernières 24h
-        date_limite = timezone.now() - timedelta(hours=24)
-        evenements_en_attente = EvenementExterne.objects.filter(
-            is_traite=False,
-            is_valide=True,
-            date_evenement__gte=date_limite
-        ).order_by('date_evenement')
-        
-        evenements_traites = 0
-        
-        for evenement in evenements_en_attente:
-            try:
-                # Marquer comme traité et déclencher l'analyse
-                evenement.is_traite = True
-                evenement.save()
-                
-                # Déclencher l'analyse
-                analyser_fusion_evenement.delay(evenement.id)
-                evenements_traites += 1
-                
-            except Exception as e:
-                logger.error(f"Erreur traitement événement {evenement.id}: {e}")
-        
-        logger.info(f"Traitement terminé: {evenements_traites} événements traités")
-        return f"{evenements_traites} événements traités"
-        
-    except Exception as e:
-        logger.error(f"Erreur lors du traitement des événements en attente: {e}")
-        return f"Erreur: {str(e)}"
+    # Réclamer un lot d'événements non traités des dernières 24h : les
+    # lignes verrouillées par un autre worker sont sautées, chaque worker
+    # obtient donc un lot disjoint
+    date_limite = timezone.now() - timedelta(hours=24)
+    with transaction.atomic():
+        ids = list(
+            EvenementExterne.objects.select_for_update(skip_locked=True).filter(
+                is_traite=False,
+                is_valide=True,
+                date_evenement__gte=date_limite
+            ).order_by('date_evenement').values_list('id', flat=True)[:EVENEMENTS_RECLAMES_PAR_PASSAGE]
+        )
+        EvenementExterne.objects.filter(pk__in=ids).update(is_traite=True)
+    evenements_traites = len(ids)
+    
+    # Publier les analyses hors transaction, un message par événement : chaque
+    # analyse est acquittée après exécution (acks_late) et rejouée si le
+    # worker tombe, et va au prochain worker libre
+    if ids:
+        group(analyser_fusion_evenement.s(evenement_id) for evenement_id in ids).apply_async()
+    
+    logger.info("Traitement terminé: %s événements traités", evenements_traites)
+    return f"{evenements_traites} événements traités"
 
 
 @shared_task
+@_journaliser_erreurs("du nettoyage des événements")
 def nettoyer_anciens_evenements():
     """
     Tâche pour nettoyer les anciens événements externes
     """
     logger.info("Nettoyage des anciens événements externes")
     
-    try:
-        # Supprimer les événements de simulation de plus de 30 jours
-        date_limite_simulation = timezone.now() - timedelta(days=30)
-        anciens_simulations = EvenementExterne.objects.filter(
-            is_simulation=True,
-            date_evenement__lt=date_limite_simulation
-        )
-        nb_simulations_supprimees = anciens_simulations.count()
-        anciens_simulations.delete()
-        
-        # Supprimer les événements invalides de plus de 7 jours
-        date_limite_invalides = timezone.now() - timedelta(days=7)
-        anciens_invalides = EvenementExterne.objects.filter(
-            is_valide=False,
-            date_evenement__lt=date_limite_invalides
-        )
-        nb_invalides_supprimees = anciens_invalides.count()
-        anciens_invalides.delete()
-        
-        # Supprimer les événements traités de plus de 90 jours
-        date_limite_traites = timezone.now() - timedelta(days=90)
-        anciens_traites = EvenementExterne.objects.filter(
-            is_traite=True,
-            date_evenement__lt=date_limite_traites
-        )
-        nb_traites_supprimees = anciens_traites.count()
-        anciens_traites.delete()
-        
-        logger.info(f"Nettoyage terminé: {nb_simulations_supprimees} simulations, "
-                   f"{nb_invalides_supprimees} invalides, {nb_traites_supprimees} traités supprimés")
-        
-        return f"{nb_simulations_supprimees + nb_invalides_supprimees + nb_traites_supprimees} événements supprimés"
-        
-    except Exception as e:
-        logger.error(f"Erreur lors du nettoyage des événements: {e}")
-        return f"Erreur: {str(e)}"
+    maintenant = timezone.now()
+    
+    # Supprimer les événements de simulation de plus de 30 jours
+    date_limite_simulation = maintenant - timedelta(days=30)
+    anciens_simulations = EvenementExterne.objects.filter(
+        is_simulation=True,
+        date_evenement__lt=date_limite_simulation
+    )
+    nb_simulations_supprimees = _supprimer_lignes(anciens_simulations)
+    
+    # Supprimer les événements invalides de plus de 7 jours
+    date_limite_invalides = maintenant - timedelta(days=7)
+    anciens_invalides = EvenementExterne.objects.filter(
+        is_valide=False,
+        date_evenement__lt=date_limite_invalides
+    )
+    nb_invalides_supprimees = _supprimer_lignes(anciens_invalides)
+    
+    # Supprimer les événements traités de plus de 90 jours
+    date_limite_traites = maintenant - timedelta(days=90)
+    anciens_traites = EvenementExterne.objects.filter(
+        is_traite=True,
+        date_evenement__lt=date_limite_traites
+    )
+    nb_traites_supprimees = _supprimer_lignes(anciens_traites)
+    
+    logger.info("Nettoyage terminé: %s simulations, %s invalides, %s traités supprimés",
+                nb_simulations_supprimees, nb_invalides_supprimees, nb_traites_supprimees)
+    
+    return f"{nb_simulations_supprimees + nb_invalides_supprimees + nb_traites_supprimees} événements supprimés"
 
 
 @shared_task
+@_journaliser_erreurs("du nettoyage des fusions")
 def nettoyer_anciennes_fusions():
     """
     Tâche pour nettoyer les anciennes fusions de données
     """
     logger.info("Nettoyage des anciennes fusions de données")
     
-    try:
-        # Supprimer les fusions terminées de plus de 6 mois
-        date_limite = timezone.now() - timedelta(days=180)
-        anciennes_fusions = FusionDonnees.objects.filter(
-            statut='terminee',
-            date_creation__lt=date_limite
-        )
-        nb_fusions_supprimees = anciennes_fusions.count()
-        anciennes_fusions.delete()
-        
-        # Supprimer les fusions en erreur de plus de 30 jours
-        date_limite_erreurs = timezone.now() - timedelta(days=30)
-        anciennes_erreurs = FusionDonnees.objects.filter(
-            statut='erreur',
-            date_creation__lt=date_limite_erreurs
-        )
-        nb_erreurs_supprimees = anciennes_erreurs.count()
-        anciennes_erreurs.delete()
-        
-        logger.info(f"Nettoyage fusions terminé: {nb_fusions_supprimees} fusions, "
-                   f"{nb_erreurs_supprimees} erreurs supprimées")
-        
-        return f"{nb_fusions_supprimees + nb_erreurs_supprimees} fusions supprimées"
-        
-    except Exception as e:
-        logger.error(f"Erreur lors du nettoyage des fusions: {e}")
-        return f"Erreur: {str(e)}"
+    maintenant = timezone.now()
+    
+    # Supprimer les fusions terminées de plus de 6 mois
+    date_limite = maintenant - timedelta(days=180)
+    anciennes_fusions = FusionDonnees.objects.filter(
+        statut='terminee',
+        date_creation__lt=date_limite
+    )
+    nb_fusions_supprimees = _supprimer_lignes(anciennes_fusions)
+    
+    # Supprimer les fusions en erreur de plus de 30 jours
+    date_limite_erreurs = maintenant - timedelta(days=30)
+    anciennes_erreurs = FusionDonnees.objects.filter(
+        statut='erreur',
+        date_creation__lt=date_limite_erreurs
+    )
+    nb_erreurs_supprimees = _supprimer_lignes(anciennes_erreurs)
+    
+    logger.info("Nettoyage fusions terminé: %s fusions, %s erreurs supprimées",
+                nb_fusions_supprimees, nb_erreurs_supprimees)
+    
+    return f"{nb_fusions_supprimees + nb_erreurs_supprimees} fusions supprimées"
 
 
 @shared_task
+@_journaliser_erreurs("du nettoyage des prédictions")
 def nettoyer_anciennes_predictions():
     """
     Tâche pour nettoyer les anciennes prédictions enrichies
     """
     logger.info("Nettoyage des anciennes prédictions enrichies")
     
-    try:
-        # Supprimer les prédictions de plus de 1 an
-        date_limite = timezone.now() - timedelta(days=365)
-        anciennes_predictions = PredictionEnrichie.objects.filter(
-            date_prediction__lt=date_limite
-        )
-        nb_predictions_supprimees = anciennes_predictions.count()
-        anciennes_predictions.delete()
-        
-        logger.info(f"Nettoyage prédictions terminé: {nb_predictions_supprimees} prédictions supprimées")
-        return f"{nb_predictions_supprimees} prédictions supprimées"
-        
-    except Exception as e:
-        logger.error(f"Erreur lors du nettoyage des prédictions: {e}")
-        return f"Erreur: {str(e)}"
+    # Supprimer les prédictions de plus de 1 an
+    date_limite = timezone.now() - timedelta(days=365)
+    anciennes_predictions = PredictionEnrichie.objects.filter(
+        date_prediction__lt=date_limite
+    )
+    nb_predictions_supprimees = _supprimer_lignes(anciennes_predictions)
+    
+    logger.info("Nettoyage prédictions terminé: %s prédictions supprimées", nb_predictions_supprimees)
+    return f"{nb_predictions_supprimees} prédictions supprimées"
 
 
 @shared_task
+@_journaliser_erreurs("du nettoyage des alertes")
 def nettoyer_anciennes_alertes():
     """
     Tâche pour nettoyer les anciennes alertes enrichies
     """
     logger.info("Nettoyage des anciennes alertes enrichies")
     
-    try:
-        # Résoudre les alertes anciennes non résolues
-        date_limite_resolution = timezone.now() - timedelta(days=30)
-        alertes_anciennes = AlerteEnrichie.objects.filter(
-            est_resolue=False,
-            date_creation__lt=date_limite_resolution
-        )
-        nb_alertes_resolues = alertes_anciennes.count()
-        
-        for alerte in alertes_anciennes:
-            alerte.est_resolue = True
-            alerte.est_active = False
-            alerte.date_resolution = timezone.now()
-            alerte.commentaires += " Résolue automatiquement par nettoyage."
-            alerte.save()
-        
-        # Supprimer les alertes résolues de plus de 6 mois
-        date_limite_suppression = timezone.now() - timedelta(days=180)
-        anciennes_alertes = AlerteEnrichie.objects.filter(
-            est_resolue=True,
-            date_resolution__lt=date_limite_suppression
-        )
-        nb_alertes_supprimees = anciennes_alertes.count()
-        anciennes_alertes.delete()
-        
-        logger.info(f"Nettoyage alertes terminé: {nb_alertes_resolues} résolues, "
-                   f"{nb_alertes_supprimees} supprimées")
-        
-        return f"{nb_alertes_resolues} alertes résolues, {nb_alertes_supprimees} supprimées"
-        
-    except Exception as e:
-        logger.error(f"Erreur lors du nettoyage des alertes: {e}")
-        return f"Erreur: {str(e)}"
+    maintenant = timezone.now()
+    
+    # Résoudre les alertes anciennes non résolues
+    date_limite_resolution = maintenant - timedelta(days=30)
+    alertes_anciennes = AlerteEnrichie.objects.filter(
+        est_resolue=False,
+        date_creation__lt=date_limite_resolution
+    )
+    
+    # Une seule requête UPDATE (le commentaire est complété en SQL)
+    nb_alertes_resolues = alertes_anciennes.update(
+        est_resolue=True,
+        est_active=False,
+        date_resolution=maintenant,
+        commentaires=Concat('commentaires', Value(" Résolue automatiquement par nettoyage."))
+    )
+    
+    # Supprimer les alertes résolues de plus de 6 mois
+    date_limite_suppression = maintenant - timedelta(days=180)
+    anciennes_alertes = AlerteEnrichie.objects.filter(
+        est_resolue=True,
+        date_resolution__lt=date_limite_suppression
+    )
+    nb_alertes_supprimees = _supprimer_lignes(anciennes_alertes, brut=True)
+    
+    logger.info("Nettoyage alertes terminé: %s résolues, %s supprimées",
+                nb_alertes_resolues, nb_alertes_supprimees)
+    
+    return f"{nb_alertes_resolues} alertes résolues, {nb_alertes_supprimees} supprimées"
 
 
 @shared_task
+@_journaliser_erreurs("de la création de l'archive")
 def creer_archive_donnees(type_donnees: str, zone_id: int, periode_jours: int):
     """
     Tâche pour créer une archive de données
     """
-    logger.info(f"Création d'archive {type_donnees} pour la zone {zone_id}")
+    logger.info("Création d'archive %s pour la zone %s", type_donnees, zone_id)
     
-    try:
-        service = ArchiveService()
-        resultat = service.creer_archive(type_donnees, zone_id, periode_jours)
-        
-        if resultat['success']:
-            logger.info(f"Archive créée: {resultat['archive_id']}")
-            return f"Archive créée: {resultat['nombre_elements']} éléments"
-        else:
-            logger.error(f"Échec création archive: {resultat['message']}")
-            return f"Échec: {resultat['message']}"
-            
-    except Exception as e:
-        logger.error(f"Erreur lors de la création de l'archive: {e}")
-        return f"Erreur: {str(e)}"
+    service = ArchiveService()
+    resultat = service.creer_archive(type_donnees, zone_id, periode_jours)
+    
+    if resultat['success']:
+        logger.info("Archive créée: %s", resultat['archive_id'])
+        return f"Archive créée: {resultat['nombre_elements']} éléments"
+    else:
+        logger.error("Échec création archive: %s", resultat['message'])
+        return f"Échec: {resultat['message']}"
+
+
+@shared_task
+@_journaliser_erreurs("de la création des archives")
+def creer_archives_zone(zone_id: int, periode_jours: int):
+    """
+    Tâche pour créer en parallèle les archives de tous les types de données d'une zone
+    """
+    logger.info("Création des archives de la zone %s", zone_id)
+    
+    service = ArchiveService()
+    resultats = service.creer_archives_zone(zone_id, periode_jours)
+    
+    nb_archives = sum(1 for resultat in resultats.values() if resultat['success'])
+    for type_donnees, resultat in resultats.items():
+        if not resultat['success']:
+            logger.error("Échec création archive %s: %s", type_donnees, resultat['message'])
+    
+    logger.info("Archives créées: %s/%s", nb_archives, len(resultats))
+    return f"{nb_archives} archives créées sur {len(resultats)}"
 
 
 @shared_task
+@_journaliser_erreurs("de la purge des archives")
 def purger_anciennes_archives(periode_jours: int = 365):
     """
     Tâche pour purger les anciennes archives
     """
-    logger.info(f"Purge des archives de plus de {periode_jours} jours")
+    logger.info("Purge des archives de plus de %s jours", periode_jours)
     
-    try:
-        date_limite = timezone.now() - timedelta(days=periode_jours)
-        anciennes_archives = ArchiveDonnees.objects.filter(
-            date_archivage__lt=date_limite,
-            est_disponible=True
-        )
-        
-        nb_archives_supprimees = 0
-        
-        for archive in anciennes_archives:
-            try:
-                # Supprimer le fichier physique
-                import os
-                if os.path.exists(archive.chemin_fichier):
-                    os.remove(archive.chemin_fichier)
-                
-                # Marquer comme supprimée
-                archive.est_disponible = False
-                archive.date_suppression = timezone.now()
-                archive.save()
-                
-                nb_archives_supprimees += 1
-                
-            except Exception as e:
-                logger.error(f"Erreur suppression archive {archive.id}: {e}")
-        
-        logger.info(f"Purge terminée: {nb_archives_supprimees} archives supprimées")
-        return f"{nb_archives_supprimees} archives supprimées"
-        
-    except Exception as e:
-        logger.error(f"Erreur lors de la purge des archives: {e}")
-        return f"Erreur: {str(e)}"
+    maintenant = timezone.now()
+    
+    date_limite = maintenant - timedelta(days=periode_jours)
+    anciennes_archives = ArchiveDonnees.objects.filter(
+        date_archivage__lt=date_limite,
+        est_disponible=True
+    )
+    
+    archives = list(anciennes_archives.values_list('id', 'chemin_fichier'))
+    
+    # Supprimer les fichiers physiques en parallèle (E/S disque)
+    with ThreadPoolExecutor(max_workers=ARCHIVES_PURGEES_EN_PARALLELE) as executeur:
+        supprimes = list(executeur.map(_supprimer_fichier, (chemin for _, chemin in archives)))
+    
+    # Marquer comme supprimées, en un UPDATE, les archives dont le fichier a disparu
+    ids_supprimes = [archive_id for (archive_id, _), ok in zip(archives, supprimes) if ok]
+    nb_archives_supprimees = ArchiveDonnees.objects.filter(id__in=ids_supprimes).update(
+        est_disponible=False,
+        date_suppression=maintenant
+    )
+    
+    logger.info("Purge terminée: %s archives supprimées", nb_archives_supprimees)
+    return f"{nb_archives_supprimees} archives supprimées"
 
 
 @shared_task
+@_journaliser_erreurs("de la génération du rapport quotidien")
 def generer_rapport_fusion_quotidien():
     """
     Tâche pour générer un rapport quotidien de fusion des données
     """
     logger.info("Génération du rapport quotidien de fusion")
     
-    try:
-        aujourd_hui = timezone.now().date()
-        hier = aujourd_hui - timedelta(days=1)
-        
-        # Statistiques des événements
-        evenements_hier = EvenementExterne.objects.filter(
-            date_evenement__date=hier
-        )
-        
-        # Statistiques des fusions
-        fusions_hier = FusionDonnees.objects.filter(
-            date_creation__date=hier
-        )
-        
-        # Statistiques des prédictions
-        predictions_hier = PredictionEnrichie.objects.filter(
-            date_prediction__date=hier
-        )
-        
-        # Statistiques des alertes
-        alertes_hier = AlerteEnrichie.objects.filter(
-            date_creation__date=hier
-        )
-        
-        rapport = {
-            'date': hier.isoformat(),
-            'evenements': {
-                'total': evenements_hier.count(),
-                'traites': evenements_hier.filter(is_traite=True).count(),
-                'non_traites': evenements_hier.filter(is_traite=False).count(),
-                'simulations': evenements_hier.filter(is_simulation=True).count(),
-                'par_type': dict(evenements_hier.values_list('type_evenement').annotate(count=Count('id')))
-            },
-            'fusions': {
-                'total': fusions_hier.count(),
-                'terminees': fusions_hier.filter(statut='terminee').count(),
-                'en_cours': fusions_hier.filter(statut='en_cours').count(),
-                'erreurs': fusions_hier.filter(statut='erreur').count()
-            },
-            'predictions': {
-                'total': predictions_hier.count(),
-                'erosion_predite': predictions_hier.filter(erosion_predite=True).count(),
-                'erosion_non_predite': predictions_hier.filter(erosion_predite=False).count(),
-                'par_niveau': dict(predictions_hier.values_list('niveau_erosion').annotate(count=Count('id')))
-            },
-            'alertes': {
-                'total': alertes_hier.count(),
-                'actives': alertes_hier.filter(est_active=True).count(),
-                'resolues': alertes_hier.filter(est_resolue=True).count(),
-                'par_niveau': dict(alertes_hier.values_list('niveau').annotate(count=Count('id')))
-            },
-            'statut_systeme': 'opérationnel'
-        }
-        
-        logger.info(f"Rapport quotidien généré: {rapport}")
-        return rapport
-        
-    except Exception as e:
-        logger.error(f"Erreur lors de la génération du rapport quotidien: {e}")
-        return f"Erreur: {str(e)}"
+    hier = timezone.localdate() - timedelta(days=1)
+    debut = timezone.make_aware(datetime.combine(hier, time.min))
+    fin = debut + timedelta(days=1)
+    
+    # Compteurs par drapeau/statut des quatre tables, en un aller-retour
+    sql = SQL_RAPPORT_FUSION_QUOTIDIEN.format(
+        evenements=EvenementExterne._meta.db_table,
+        fusions=FusionDonnees._meta.db_table,
+        predictions=PredictionEnrichie._meta.db_table,
+        alertes=AlerteEnrichie._meta.db_table
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [debut, fin] * 4)
+        (ev_total, ev_traites, ev_non_traites, ev_simulations,
+         fu_total, fu_terminees, fu_en_cours, fu_erreurs,
+         pr_total, pr_erosion_predite, pr_erosion_non_predite,
+         al_total, al_actives, al_resolues) = cursor.fetchone()
+    
+    # Répartitions : une petite requête GROUP BY chacune
+    evenements_hier = EvenementExterne.objects.filter(
+        date_evenement__gte=debut, date_evenement__lt=fin
+    )
+    predictions_hier = PredictionEnrichie.objects.filter(
+        date_prediction__gte=debut, date_prediction__lt=fin
+    )
+    alertes_hier = AlerteEnrichie.objects.filter(
+        date_creation__gte=debut, date_creation__lt=fin
+    )
+    
+    rapport = {
+        'date': hier.isoformat(),
+        'evenements': {
+            'total': ev_total,
+            'traites': ev_traites,
+            'non_traites': ev_non_traites,
+            'simulations': ev_simulations,
+            'par_type': _compter_par(evenements_hier, 'type_evenement')
+        },
+        'fusions': {
+            'total': fu_total,
+            'terminees': fu_terminees,
+            'en_cours': fu_en_cours,
+            'erreurs': fu_erreurs
+        },
+        'predictions': {
+            'total': pr_total,
+            'erosion_predite': pr_erosion_predite,
+            'erosion_non_predite': pr_erosion_non_predite,
+            'par_niveau': _compter_par(predictions_hier, 'niveau_erosion')
+        },
+        'alertes': {
+            'total': al_total,
+            'actives': al_actives,
+            'resolues': al_resolues,
+            'par_niveau': _compter_par(alertes_hier, 'niveau')
+        },
+        'statut_systeme': 'opérationnel'
+    }
+    
+    logger.info("Rapport quotidien généré: %s", rapport)
+    return rapport
 
 
 @shared_task
+@_journaliser_erreurs("de l'export IA")
 def exporter_donnees_ia():
     """
     Tâche pour exporter les données pour l'IA (format ML)
     """
     logger.info("Export des données pour l'IA")
     
-    try:
-        # Récupérer les données des 6 derniers mois
-        date_limite = timezone.now() - timedelta(days=180)
-        
-        # Données d'entraînement
-        donnees_entrainement = {
-            'evenements': [],
-            'mesures_arduino': [],
-            'fusions': [],
-            'predictions': []
-        }
-        
-        # Événements
-        evenements = EvenementExterne.objects.filter(
+    maintenant = timezone.now()
+    
+    # Récupérer les données des 6 derniers mois
+    date_limite = maintenant - timedelta(days=180)
+    
+    # Chaque section est lue en flux (values + iterator) et convertie ligne
+    # à ligne : seule une page de TAILLE_LOT_EXPORT lignes réside en mémoire
+    sections = (
+        ('evenements', EvenementExterne.objects.filter(
             date_evenement__gte=date_limite,
             is_valide=True
-        )
-        
-        for e in evenements:
-            donnees_entrainement['evenements'].append({
-                'type_evenement': e.type_evenement,
-                'intensite': e.intensite,
-                'zone_id': e.zone.id,
-                'date_evenement': e.date_evenement.isoformat(),
-                'duree_minutes': e.duree_minutes or 0,
-                'rayon_impact_km': e.rayon_impact_km or 0
-            })
-        
-        # Mesures Arduino
-        mesures = MesureArduino.objects.filter(
+        ).values(
+            'type_evenement', 'intensite', 'zone_id', 'date_evenement',
+            'duree_minutes', 'rayon_impact_km'
+        ), lambda e: {
+            'type_evenement': e['type_evenement'],
+            'intensite': e['intensite'],
+            'zone_id': e['zone_id'],
+            'date_evenement': e['date_evenement'].isoformat(),
+            'duree_minutes': e['duree_minutes'] or 0,
+            'rayon_impact_km': e['rayon_impact_km'] or 0
+        }),
+        ('mesures_arduino', MesureArduino.objects.filter(
             timestamp__gte=date_limite,
             est_valide=True
-        ).select_related('capteur')
-        
-        for m in mesures:
-            donnees_entrainement['mesures_arduino'].append({
-                'capteur_type': m.capteur.type_capteur,
-                'valeur': m.valeur,
-                'zone_id': m.capteur.zone.id,
-                'timestamp': m.timestamp.isoformat(),
-                'qualite_donnee': m.qualite_donnee
-            })
-        
-        # Fusions
-        fusions = FusionDonnees.objects.filter(
+        ).values(
+            'capteur__type_capteur', 'valeur', 'capteur__zone_id',
+            'timestamp', 'qualite_donnee'
+        ), lambda m: {
+            'capteur_type': m['capteur__type_capteur'],
+            'valeur': m['valeur'],
+            'zone_id': m['capteur__zone_id'],
+            'timestamp': m['timestamp'].isoformat(),
+            'qualite_donnee': m['qualite_donnee']
+        }),
+        ('fusions', FusionDonnees.objects.filter(
             date_creation__gte=date_limite,
             statut='terminee'
-        )
-        
-        for f in fusions:
-            donnees_entrainement['fusions'].append({
-                'zone_id': f.zone.id,
-                'score_erosion': f.score_erosion,
-                'probabilite_erosion': f.probabilite_erosion,
-                'mesures_count': f.mesures_arduino_count,
-                'evenements_count': f.evenements_externes_count,
-                'facteurs_dominants': f.facteurs_dominants
-            })
-        
-        # Prédictions
-        predictions = PredictionEnrichie.objects.filter(
+        ).values(
+            'zone_id', 'score_erosion', 'probabilite_erosion',
+            'mesures_arduino_count', 'evenements_externes_count', 'facteurs_dominants'
+        ), lambda f: {
+            'zone_id': f['zone_id'],
+            'score_erosion': f['score_erosion'],
+            'probabilite_erosion': f['probabilite_erosion'],
+            'mesures_count': f['mesures_arduino_count'],
+            'evenements_count': f['evenements_externes_count'],
+            'facteurs_dominants': f['facteurs_dominants']
+        }),
+        ('predictions', PredictionEnrichie.objects.filter(
             date_prediction__gte=date_limite
-        )
-        
-        for p in predictions:
-            donnees_entrainement['predictions'].append({
-                'zone_id': p.zone.id,
-                'erosion_predite': p.erosion_predite,
-                'niveau_erosion': p.niveau_erosion,
-                'confiance_pourcentage': p.confiance_pourcentage,
-                'taux_erosion_pred': p.taux_erosion_pred_m_an,
-                'horizon_jours': p.horizon_jours
-            })
-        
-        # Sauvegarder le fichier d'export
-        import json
-        import os
-        
-        chemin_export = f"exports/ia/donnees_entrainement_{timezone.now().strftime('%Y%m%d')}.json"
-        os.makedirs(os.path.dirname(chemin_export), exist_ok=True)
-        
-        with open(chemin_export, 'w', encoding='utf-8') as f:
-            json.dump(donnees_entrainement, f, ensure_ascii=False, indent=2)
-        
-        # Statistiques
-        stats = {
-            'evenements': len(donnees_entrainement['evenements']),
-            'mesures': len(donnees_entrainement['mesures_arduino']),
-            'fusions': len(donnees_entrainement['fusions']),
-            'predictions': len(donnees_entrainement['predictions']),
-            'chemin_fichier': chemin_export,
-            'date_export': timezone.now().isoformat()
-        }
-        
-        logger.info(f"Export IA terminé: {stats}")
-        return f"Export réussi: {stats['evenements']} événements, {stats['mesures']} mesures, {stats['fusions']} fusions, {stats['predictions']} prédictions"
-        
-    except Exception as e:
-        logger.error(f"Erreur lors de l'export IA: {e}")
-        return f"Erreur: {str(e)}"
+        ).values(
+            'zone_id', 'erosion_predite', 'niveau_erosion', 'confiance_pourcentage',
+            'taux_erosion_pred_m_an', 'horizon_jours'
+        ), lambda p: {
+            'zone_id': p['zone_id'],
+            'erosion_predite': p['erosion_predite'],
+            'niveau_erosion': p['niveau_erosion'],
+            'confiance_pourcentage': p['confiance_pourcentage'],
+            'taux_erosion_pred': p['taux_erosion_pred_m_an'],
+            'horizon_jours': p['horizon_jours']
+        }),
+    )
+    
+    # Sauvegarder le fichier d'export : écrit dans un fichier temporaire propre
+    # à cette exécution puis renommé atomiquement, de sorte qu'un lecteur ne
+    # voie jamais de fichier partiel, même si deux workers exportent le même jour
+    chemin_export = f"exports/ia/donnees_entrainement_{maintenant.strftime('%Y%m%d')}.json"
+    os.makedirs(os.path.dirname(chemin_export), exist_ok=True)
+    
+    compteurs = {}
+    with tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=os.path.dirname(chemin_export), suffix='.tmp', delete=False
+    ) as f:
+        try:
+            f.write('{')
+            for i, (cle, lignes, convertir) in enumerate(sections):
+                f.write(f'{"," if i else ""}\n  "{cle}": [')
+                compteurs[cle] = _ecrire_tableau_json(
+                    f, lignes.iterator(chunk_size=TAILLE_LOT_EXPORT), convertir
+                )
+                f.write('\n  ]')
+            f.write('\n}\n')
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, chemin_export)
+    
+    # Statistiques
+    stats = {
+        'evenements': compteurs['evenements'],
+        'mesures': compteurs['mesures_arduino'],
+        'fusions': compteurs['fusions'],
+        'predictions': compteurs['predictions'],
+        'chemin_fichier': chemin_export,
+        'date_export': maintenant.isoformat()
+    }
+    
+    logger.info("Export IA terminé: %s", stats)
+    return f"Export réussi: {stats['evenements']} événements, {stats['mesures']} mesures, {stats['fusions']} fusions, {stats['predictions']} prédictions"
 
 
 # ============================================================================
@@ -848,58 +1070,72 @@ def calculer_predictions_automatiques():
     """
     logger.info("🤖 Calcul automatique des prédictions d'érosion")
     
+    maintenant = timezone.now()
+    
     try:
-        from .models import Zone, ModeleML
         from .ml_services import MLPredictionService
         
         # Vérifier qu'il y a un modèle actif
-        active_model = ModeleML.objects.filter(statut='actif').first()
+        active_model = ModeleML.objects.filter(statut='actif').only('id').first()
         if not active_model:
             logger.warning("Aucun modèle ML actif trouvé pour les prédictions automatiques")
             return "Aucun modèle ML actif - prédictions ignorées"
         
         # Récupérer toutes les zones actives
-        zones_actives = Zone.objects.all()
-        predictions_creees = 0
+        zones_actives = Zone.objects.only('id', 'nom')
         erreurs = 0
         
+        # Zones ayant déjà une prédiction récente (dernières 24h), en une requête
+        zones_predites_recemment = set(
+            Prediction.objects.filter(
+                date_prediction__gte=maintenant - timedelta(hours=24)
+            ).order_by().values_list('zone_id', flat=True).distinct()
+        )
+        
         ml_service = MLPredictionService()
+        commentaire = f"Prédiction automatique générée le {maintenant.strftime('%Y-%m-%d %H:%M')}"
+        predictions = []
         
         for zone in zones_actives:
             try:
                 # Vérifier si une prédiction récente existe déjà (dernières 24h)
-                from django.utils import timezone
-                from datetime import timedelta
-                
-                derniere_prediction = zone.predictions.filter(
-                    date_prediction__gte=timezone.now() - timedelta(hours=24)
-                ).first()
-                
-                if derniere_prediction:
+                if zone.id in zones_predites_recemment:
                     logger.info(f"Prédiction récente existante pour {zone.nom} - ignorée")
                     continue
                 
                 # Calculer la prédiction pour différents horizons
                 horizons = [7, 30, 90]  # 1 semaine, 1 mois, 3 mois
                 
+                predictions_zone = []
                 for horizon in horizons:
                     prediction = ml_service.predire_erosion(
                         zone_id=zone.id,
                         features={},  # Pas de features supplémentaires pour les prédictions automatiques
-                        horizon_jours=horizon
+                        horizon_jours=horizon,
+                        enregistrer=False
                     )
                     
                     # Ajouter un commentaire pour identifier les prédictions automatiques
-                    prediction.commentaires = f"Prédiction automatique générée le {timezone.now().strftime('%Y-%m-%d %H:%M')}"
-                    prediction.save()
-                    
-                    predictions_creees += 1
-                    logger.info(f"✅ Prédiction créée pour {zone.nom} (horizon: {horizon}j)")
+                    prediction.commentaires = commentaire
+                    predictions_zone.append(prediction)
+                
+                predictions.extend(predictions_zone)
+                logger.info(f"✅ Prédictions calculées pour {zone.nom} (horizons: {horizons})")
                 
             except Exception as e:
                 logger.error(f"❌ Erreur prédiction {zone.nom}: {e}")
                 erreurs += 1
         
+        # Enregistrer toutes les prédictions et les statistiques du modèle en une transaction
+        with transaction.atomic():
+            Prediction.objects.bulk_create(predictions, batch_size=TAILLE_LOT)
+            if predictions:
+                ModeleML.objects.filter(pk=active_model.pk).update(
+                    nombre_predictions=F('nombre_predictions') + len(predictions),
+                    date_derniere_utilisation=timezone.now()
+                )
+        predictions_creees = len(predictions)
+        
         resultat = f"Prédictions automatiques terminées: {predictions_creees} créées, {erreurs} erreurs"
         logger.info(resultat)
         return resultat
@@ -922,12 +1158,11 @@ def calculer_prediction_zone(zone_id: int, horizon_jours: int = 30, features: di
     logger.info(f"🎯 Calcul de prédiction pour la zone {zone_id} (horizon: {horizon_jours}j)")
     
     try:
-        from .models import Zone
         from .ml_services import MLPredictionService
         
         # Vérifier que la zone existe
         try:
-            zone = Zone.objects.get(id=zone_id)
+            zone = Zone.objects.only('id', 'nom').get(id=zone_id)
         except Zone.DoesNotExist:
             logger.error(f"Zone {zone_id} non trouvée")
             return f"Zone {zone_id} non trouvée"
@@ -965,8 +1200,6 @@ def entrainer_modeles_ml():
         from .ml_services import MLTrainingService
         
         # Vérifier les prérequis
-        from .models import HistoriqueErosion, Zone
-        
         total_zones = Zone.objects.count()
         total_historique = HistoriqueErosion.objects.count()
         
@@ -996,8 +1229,7 @@ def entrainer_modeles_ml():
             models_created += 1
         
         # Trouver le modèle actif
-        from .models import ModeleML
-        active_model = ModeleML.objects.filter(statut='actif').first()
+        active_model = ModeleML.objects.filter(statut='actif').only('nom', 'version').first()
         
         resultat = f"Entraînement terminé: {models_created} modèles créés"
         if active_model:
@@ -1018,68 +1250,63 @@ def evaluer_performance_modeles():
     """
     logger.info("📊 Évaluation de la performance des modèles ML")
     
+    maintenant = timezone.now()
+    
     try:
-        from .models import ModeleML, Prediction
-        
         models_evalues = 0
         rapport_performance = []
         
-        for model in ModeleML.objects.filter(statut__in=['actif', 'inactif']):
-            try:
-                # Récupérer les prédictions récentes (derniers 30 jours)
-                date_limite = timezone.now() - timedelta(days=30)
-                predictions_recentes = Prediction.objects.filter(
-                    modele_ml=model,
-                    date_prediction__gte=date_limite
-                )
-                
-                if predictions_recentes.count() < 5:
-                    logger.info(f"Pas assez de prédictions récentes pour {model.nom} - ignoré")
-                    continue
-                
-                # Calculer les métriques de performance
-                from django.db.models import Avg, StdDev
-                
-                stats = predictions_recentes.aggregate(
-                    confiance_moyenne=Avg('confiance_pourcentage'),
-                    confiance_ecart_type=StdDev('confiance_pourcentage'),
-                    taux_moyen=Avg('taux_erosion_pred_m_an'),
-                    nombre_predictions=Count('id')
-                )
-                
-                performance_data = {
-                    'model_id': model.id,
-                    'model_name': model.nom,
-                    'model_version': model.version,
-                    'confiance_moyenne': stats['confiance_moyenne'] or 0,
-                    'confiance_ecart_type': stats['confiance_ecart_type'] or 0,
-                    'taux_moyen': stats['taux_moyen'] or 0,
-                    'nombre_predictions': stats['nombre_predictions'],
-                    'score_original': model.precision_score or 0
-                }
-                
-                rapport_performance.append(performance_data)
-                models_evalues += 1
-                
-                logger.info(f"✅ Performance évaluée pour {model.nom}: confiance {performance_data['confiance_moyenne']:.1f}%")
-                
-            except Exception as e:
-                logger.error(f"Erreur évaluation {model.nom}: {e}")
+        # Métriques des prédictions récentes (derniers 30 jours) de tous les
+        # modèles, en une requête GROUP BY
+        date_limite = maintenant - timedelta(days=30)
+        stats_par_modele = {
+            stats['modele_ml_id']: stats
+            for stats in Prediction.objects.filter(
+                modele_ml__isnull=False,
+                date_prediction__gte=date_limite
+            ).order_by().values('modele_ml_id').annotate(
+                confiance_moyenne=Avg('confiance_pourcentage'),
+                confiance_ecart_type=StdDev('confiance_pourcentage'),
+                taux_moyen=Avg('taux_erosion_pred_m_an'),
+                nombre_predictions=Count('id')
+            )
+        }
+        
+        for model in ModeleML.objects.filter(statut__in=['actif', 'inactif']).only(
+            'id', 'nom', 'version', 'precision_score'
+        ):
+            stats = stats_par_modele.get(model.id)
+            if not stats or stats['nombre_predictions'] < 5:
+                logger.info(f"Pas assez de prédictions récentes pour {model.nom} - ignoré")
+                continue
+            
+            performance_data = {
+                'model_id': model.id,
+                'model_name': model.nom,
+                'model_version': model.version,
+                'confiance_moyenne': stats['confiance_moyenne'] or 0,
+                'confiance_ecart_type': stats['confiance_ecart_type'] or 0,
+                'taux_moyen': stats['taux_moyen'] or 0,
+                'nombre_predictions': stats['nombre_predictions'],
+                'score_original': model.precision_score or 0
+            }
+            
+            rapport_performance.append(performance_data)
+            models_evalues += 1
+            
+            logger.info(f"✅ Performance évaluée pour {model.nom}: confiance {performance_data['confiance_moyenne']:.1f}%")
         
         resultat = f"Évaluation terminée: {models_evalues} modèles évalués"
         logger.info(resultat)
         
         # Optionnel: sauvegarder le rapport de performance
         if rapport_performance:
-            import json
-            import os
-            
-            chemin_rapport = f"reports/ml_performance_{timezone.now().strftime('%Y%m%d')}.json"
+            chemin_rapport = f"reports/ml_performance_{maintenant.strftime('%Y%m%d')}.json"
             os.makedirs(os.path.dirname(chemin_rapport), exist_ok=True)
             
             with open(chemin_rapport, 'w', encoding='utf-8') as f:
                 json.dump({
-                    'date_evaluation': timezone.now().isoformat(),
+                    'date_evaluation': maintenant.isoformat(),
                     'models_evalues': models_evalues,
                     'performance_data': rapport_performance
                 }, f, ensure_ascii=False, indent=2)
@@ -1100,38 +1327,33 @@ def nettoyer_anciennes_predictions_ml():
     """
     logger.info("🧹 Nettoyage des anciennes prédictions ML")
     
+    maintenant = timezone.now()
+    
     try:
-        from .models import Prediction
-        
         # Supprimer les prédictions de plus de 6 mois
-        date_limite = timezone.now() - timedelta(days=180)
+        date_limite = maintenant - timedelta(days=180)
         anciennes_predictions = Prediction.objects.filter(
             date_prediction__lt=date_limite
         )
         
-        nb_predictions_supprimees = anciennes_predictions.count()
-        anciennes_predictions.delete()
+        nb_predictions_supprimees = _supprimer_lignes(anciennes_predictions, brut=True)
         
         # Supprimer les modèles inactifs de plus de 1 an
-        from .models import ModeleML
-        date_limite_modeles = timezone.now() - timedelta(days=365)
+        date_limite_modeles = maintenant - timedelta(days=365)
         anciens_modeles = ModeleML.objects.filter(
             statut='inactif',
             date_creation__lt=date_limite_modeles
         )
         
-        nb_modeles_supprimees = anciens_modeles.count()
-        
         # Supprimer les fichiers de modèles associés
-        import os
-        for model in anciens_modeles:
+        for model in anciens_modeles.only('chemin_fichier'):
             try:
                 if os.path.exists(model.chemin_fichier):
                     os.remove(model.chemin_fichier)
             except Exception as e:
                 logger.warning(f"Impossible de supprimer le fichier {model.chemin_fichier}: {e}")
         
-        anciens_modeles.delete()
+        nb_modeles_supprimees = _supprimer_lignes(anciens_modeles)
         
         resultat = f"Nettoyage terminé: {nb_predictions_supprimees} prédictions, {nb_modeles_supprimees} modèles supprimés"
         logger.info(resultat)
@@ -1150,8 +1372,6 @@ def generer_rapport_ml_quotidien():
     logger.info("📈 Génération du rapport quotidien ML")
     
     try:
-        from .models import ModeleML, Prediction
-        
         aujourd_hui = timezone.now().date()
         hier = aujourd_hui - timedelta(days=1)
         
@@ -1161,31 +1381,47 @@ def generer_rapport_ml_quotidien():
         )
         
         # Statistiques des modèles
-        modeles_actifs = ModeleML.objects.filter(statut='actif').count()
+        modeles_actifs = list(ModeleML.objects.filter(statut='actif').only('id', 'nom', 'version'))
         modeles_total = ModeleML.objects.count()
         
-        # Statistiques par modèle
+        # Statistiques par modèle actif, en une requête GROUP BY
+        stats_predictions = {
+            stats['modele_ml_id']: stats
+            for stats in predictions_hier.filter(
+                modele_ml_id__in=[model.id for model in modeles_actifs]
+            ).order_by().values('modele_ml_id').annotate(
+                nombre=Count('id'),
+                confiance_moyenne=Avg('confiance_pourcentage'),
+                taux_moyen=Avg('taux_erosion_pred_m_an')
+            )
+        }
         stats_par_modele = []
-        for model in ModeleML.objects.filter(statut='actif'):
-            pred_model = predictions_hier.filter(modele_ml=model)
+        for model in modeles_actifs:
+            stats = stats_predictions.get(model.id, {})
             stats_par_modele.append({
                 'model_name': model.nom,
                 'model_version': model.version,
-                'predictions_count': pred_model.count(),
-                'confiance_moyenne': pred_model.aggregate(avg=Avg('confiance_pourcentage'))['avg'] or 0,
-                'taux_moyen': pred_model.aggregate(avg=Avg('taux_erosion_pred_m_an'))['avg'] or 0
+                'predictions_count': stats.get('nombre', 0),
+                'confiance_moyenne': stats.get('confiance_moyenne') or 0,
+                'taux_moyen': stats.get('taux_moyen') or 0
             })
         
+        stats_hier = predictions_hier.aggregate(
+            total=Count('id'),
+            confiance_moyenne=Avg('confiance_pourcentage'),
+            taux_moyen=Avg('taux_erosion_pred_m_an')
+        )
+        
         rapport = {
             'date': hier.isoformat(),
             'predictions': {
-                'total': predictions_hier.count(),
-                'par_horizon': dict(predictions_hier.values_list('horizon_jours').annotate(count=Count('id'))),
-                'confiance_moyenne': predictions_hier.aggregate(avg=Avg('confiance_pourcentage'))['avg'] or 0,
-                'taux_moyen': predictions_hier.aggregate(avg=Avg('taux_erosion_pred_m_an'))['avg'] or 0
+                'total': stats_hier['total'],
+                'par_horizon': _compter_par(predictions_hier, 'horizon_jours'),
+                'confiance_moyenne': stats_hier['confiance_moyenne'] or 0,
+                'taux_moyen': stats_hier['taux_moyen'] or 0
             },
             'modeles': {
-                'actifs': modeles_actifs,
+                'actifs': len(modeles_actifs),
                 'total': modeles_total,
                 'stats_par_modele': stats_par_modele
             },
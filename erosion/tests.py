@@ -1,9 +1,20 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Point, Polygon
 from django.utils import timezone
-from datetime import timedelta
-from .models import Zone, Capteur, Mesure, Alerte, HistoriqueErosion
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+from .models import (
+    Zone, Capteur, Mesure, Alerte, HistoriqueErosion, CapteurArduino, MesureArduino,
+    EvenementExterne, FusionDonnees, PredictionEnrichie, AlerteEnrichie, Prediction, ModeleML
+)
+from .ml_services import MLPredictionService
+from .tasks import _journaliser_erreurs
+from .services.analyse_fusion_service import AnalyseFusionService, FENETRE_ANALYSE
+from .services_analyse_auto import AnalyseAutomatiqueService
+from .services_analyse_capteurs import AnalyseCapteursService
 
 User = get_user_model()
 
@@ -157,4 +168,470 @@ class HistoriqueErosionModelTest(TestCase):
     def test_historique_str(self):
         """Test de la représentation string d'un historique"""
         expected = f"Zone de test - {self.historique.date_mesure.strftime('%Y-%m-%d')}"
-        self.assertEqual(str(self.historique), expected)
\ No newline at end of file
+        self.assertEqual(str(self.historique), expected)
+
+
+def _creer_capteur_arduino(zone, nom, adresse_mac, type_capteur='temperature', unite='°C'):
+    """Capteur Arduino minimal rattaché à une zone"""
+    return CapteurArduino.objects.create(
+        nom=nom,
+        type_capteur=type_capteur,
+        zone=zone,
+        adresse_mac=adresse_mac,
+        ssid_wifi="reseau-test",
+        mot_de_passe_wifi="secret",
+        precision=0.1,
+        unite_mesure=unite
+    )
+
+
+class StatistiquesGlissantesTest(TestCase):
+    """Tests des statistiques par capteur sur la fenêtre de ±7 jours des événements"""
+    
+    def setUp(self):
+        self.zone = Zone.objects.create(
+            nom="Zone de test",
+            geometrie=Polygon.from_bbox((-1.2, 44.6, -1.0, 44.8)),
+            superficie_km2=50.0
+        )
+        self.debut = datetime(2024, 3, 1, tzinfo=dt_timezone.utc)
+        self.fin = self.debut + timedelta(days=29)
+        
+        self.capteur_temperature = _creer_capteur_arduino(self.zone, "Capteur température", "AA:BB:CC:DD:EE:01")
+        self.capteur_humidite = _creer_capteur_arduino(
+            self.zone, "Capteur humidité", "AA:BB:CC:DD:EE:02", type_capteur='humidite', unite='%'
+        )
+        
+        # Une mesure de température par jour sur toute la période
+        for jour in range(30):
+            MesureArduino.objects.create(
+                capteur=self.capteur_temperature,
+                valeur=10 + (jour % 5) * 1.5 + jour * 0.1,
+                unite="°C",
+                timestamp=self.debut + timedelta(days=jour)
+            )
+        
+        # Deux mesures d'humidité isolées
+        for jour, valeur in ((3, 62.0), (20, 85.0)):
+            MesureArduino.objects.create(
+                capteur=self.capteur_humidite,
+                valeur=valeur,
+                unite="%",
+                timestamp=self.debut + timedelta(days=jour)
+            )
+        
+        # Mesure invalide et mesure d'une autre zone : ignorées
+        invalide = MesureArduino.objects.create(
+            capteur=self.capteur_temperature,
+            valeur=99.0,
+            unite="°C",
+            timestamp=self.debut + timedelta(days=10, hours=6)
+        )
+        MesureArduino.objects.filter(pk=invalide.pk).update(est_valide=False)
+        
+        autre_zone = Zone.objects.create(
+            nom="Autre zone",
+            geometrie=Polygon.from_bbox((-1.0, 44.6, -0.8, 44.8)),
+            superficie_km2=20.0
+        )
+        MesureArduino.objects.create(
+            capteur=_creer_capteur_arduino(autre_zone, "Capteur voisin", "AA:BB:CC:DD:EE:03"),
+            valeur=50.0,
+            unite="°C",
+            timestamp=self.debut + timedelta(days=10)
+        )
+        
+        self.service = AnalyseFusionService()
+        self.mesures_zone = self.service._charger_mesures_zone(self.zone, self.debut, self.fin)
+    
+    def _verifier_evenement(self, date_evenement, statistiques):
+        """Compare les statistiques d'un événement au calcul direct sur sa fenêtre"""
+        attendues = {}
+        for capteur_id, valeur, timestamp in MesureArduino.objects.filter(
+            capteur__zone=self.zone, est_valide=True
+        ).values_list('capteur_id', 'valeur', 'timestamp'):
+            if abs(timestamp - date_evenement) <= FENETRE_ANALYSE:
+                attendues.setdefault(capteur_id, []).append((timestamp, valeur))
+        
+        self.assertEqual({stats['capteur_id'] for stats in statistiques}, set(attendues))
+        for stats in statistiques:
+            mesures = sorted(attendues[stats['capteur_id']])
+            valeurs = np.array([valeur for _, valeur in mesures])
+            self.assertEqual(stats['nombre_mesures'], len(valeurs))
+            self.assertAlmostEqual(stats['valeur_moyenne'], np.mean(valeurs), places=9)
+            self.assertAlmostEqual(stats['valeur_min'], np.min(valeurs), places=9)
+            self.assertAlmostEqual(stats['valeur_max'], np.max(valeurs), places=9)
+            self.assertAlmostEqual(stats['valeur_std'], np.std(valeurs), places=9)
+            self.assertEqual(stats['periode_debut'], mesures[0][0])
+            self.assertEqual(stats['periode_fin'], mesures[-1][0])
+    
+    def _statistiques_par_capteur(self, statistiques):
+        return {stats['capteur_id']: stats for stats in statistiques}
+    
+    def test_chargement_mesures_zone(self):
+        """Test du chargement des mesures valides de la zone, triées par capteur puis par date"""
+        lignes = self.mesures_zone['lignes']
+        self.assertEqual(len(lignes), 32)
+        self.assertEqual(lignes, sorted(lignes, key=lambda ligne: (ligne[0], ligne[2])))
+        self.assertNotIn(99.0, [valeur for _, valeur, _ in lignes])
+        
+        capteurs = self.mesures_zone['capteurs']
+        self.assertEqual(
+            [(c['capteur_id'], c['capteur_nom'], c['capteur_type']) for c in capteurs],
+            [
+                (self.capteur_temperature.id, "Capteur température", 'temperature'),
+                (self.capteur_humidite.id, "Capteur humidité", 'humidite'),
+            ]
+        )
+    
+    def test_bornes_fenetre_incluses(self):
+        """Test des mesures situées exactement à ±7 jours de l'événement"""
+        date_evenement = self.debut + timedelta(days=10)
+        statistiques = self.service._statistiques_glissantes(self.mesures_zone, [date_evenement])[0]
+        self._verifier_evenement(date_evenement, statistiques)
+        
+        par_capteur = self._statistiques_par_capteur(statistiques)
+        temperature = par_capteur[self.capteur_temperature.id]
+        self.assertEqual(temperature['nombre_mesures'], 15)
+        self.assertEqual(temperature['periode_debut'], self.debut + timedelta(days=3))
+        self.assertEqual(temperature['periode_fin'], self.debut + timedelta(days=17))
+        # La mesure d'humidité du jour 3 est sur la borne basse
+        self.assertEqual(par_capteur[self.capteur_humidite.id]['nombre_mesures'], 1)
+    
+    def test_fenetre_une_seule_mesure(self):
+        """Test d'une fenêtre ne contenant qu'une mesure pour un capteur"""
+        date_evenement = self.debut + timedelta(days=24)
+        statistiques = self.service._statistiques_glissantes(self.mesures_zone, [date_evenement])[0]
+        self._verifier_evenement(date_evenement, statistiques)
+        
+        humidite = self._statistiques_par_capteur(statistiques)[self.capteur_humidite.id]
+        self.assertEqual(humidite['nombre_mesures'], 1)
+        self.assertEqual(humidite['valeur_moyenne'], 85.0)
+        self.assertEqual(humidite['valeur_min'], 85.0)
+        self.assertEqual(humidite['valeur_max'], 85.0)
+        self.assertEqual(humidite['valeur_std'], 0.0)
+        self.assertEqual(humidite['periode_debut'], humidite['periode_fin'])
+    
+    def test_evenements_en_bord_de_periode(self):
+        """Test des événements dont la fenêtre dépasse la période chargée"""
+        dates_evenements = [self.debut, self.fin, self.fin + timedelta(days=30)]
+        statistiques = self.service._statistiques_glissantes(self.mesures_zone, dates_evenements)
+        self.assertEqual(len(statistiques), 3)
+        for date_evenement, statistiques_evenement in zip(dates_evenements, statistiques):
+            self._verifier_evenement(date_evenement, statistiques_evenement)
+        
+        # Fenêtres tronquées à la période : 8 mesures de température de chaque côté
+        self.assertEqual(self._statistiques_par_capteur(statistiques[0])[self.capteur_temperature.id]['nombre_mesures'], 8)
+        self.assertEqual(self._statistiques_par_capteur(statistiques[1])[self.capteur_temperature.id]['nombre_mesures'], 8)
+        self.assertNotIn(self.capteur_humidite.id, self._statistiques_par_capteur(statistiques[1]))
+        # Aucune mesure dans la fenêtre
+        self.assertEqual(statistiques[2], [])
+    
+    def test_plusieurs_evenements(self):
+        """Test de plusieurs événements calculés en un seul appel"""
+        dates_evenements = [self.debut + timedelta(days=jour, hours=12) for jour in range(0, 30, 4)]
+        statistiques = self.service._statistiques_glissantes(self.mesures_zone, dates_evenements)
+        self.assertEqual(len(statistiques), len(dates_evenements))
+        for date_evenement, statistiques_evenement in zip(dates_evenements, statistiques):
+            self._verifier_evenement(date_evenement, statistiques_evenement)
+
+
+def _creer_mesures_recentes(capteur, valeurs, unite='°C'):
+    """Mesures Arduino des dernières minutes (une par minute, de la plus ancienne à la plus récente)"""
+    maintenant = timezone.now()
+    for rang, valeur in enumerate(valeurs):
+        MesureArduino.objects.create(
+            capteur=capteur,
+            valeur=valeur,
+            unite=unite,
+            timestamp=maintenant - timedelta(minutes=30 - rang)
+        )
+
+
+class AnalyseAutomatiqueServiceTest(TestCase):
+    """Tests de l'analyse automatique des données récentes et de ses insertions groupées"""
+    
+    def setUp(self):
+        self.zone_eleve = Zone.objects.create(
+            nom="Zone élevée",
+            geometrie=Polygon.from_bbox((-1.2, 44.6, -1.0, 44.8)),
+            superficie_km2=50.0
+        )
+        self.zone_critique = Zone.objects.create(
+            nom="Zone critique",
+            geometrie=Polygon.from_bbox((-1.0, 44.6, -0.8, 44.8)),
+            superficie_km2=30.0
+        )
+        self.zone_calme = Zone.objects.create(
+            nom="Zone calme",
+            geometrie=Polygon.from_bbox((-0.8, 44.6, -0.6, 44.8)),
+            superficie_km2=10.0
+        )
+        
+        # 35 °C : 10 points de score, plus 3 points par unité d'intensité de tempête
+        _creer_mesures_recentes(_creer_capteur_arduino(self.zone_eleve, "Capteur 1", "AA:BB:CC:DD:EE:11"), [34.0, 36.0])
+        _creer_mesures_recentes(_creer_capteur_arduino(self.zone_critique, "Capteur 2", "AA:BB:CC:DD:EE:12"), [35.0, 35.0])
+        _creer_mesures_recentes(_creer_capteur_arduino(self.zone_calme, "Capteur 3", "AA:BB:CC:DD:EE:13"), [20.0, 21.0])
+        
+        for zone, intensite in ((self.zone_eleve, 20.0), (self.zone_critique, 30.0)):
+            EvenementExterne.objects.create(
+                type_evenement='tempete',
+                intensite=intensite,
+                date_evenement=timezone.now() - timedelta(hours=1),
+                zone=zone
+            )
+    
+    def test_analyse_enregistre_fusions_predictions_alertes(self):
+        """Test des événements virtuels, fusions, prédictions et alertes créés en lot"""
+        resultat = AnalyseAutomatiqueService().analyser_nouvelles_donnees()
+        
+        self.assertTrue(resultat['success'])
+        self.assertEqual(resultat['zones_analysees'], 2)
+        self.assertEqual(resultat['alertes_generees'], 2)
+        
+        # Zone au repos : ni fusion, ni prédiction, ni alerte
+        self.assertFalse(FusionDonnees.objects.filter(zone=self.zone_calme).exists())
+        self.assertFalse(PredictionEnrichie.objects.filter(zone=self.zone_calme).exists())
+        self.assertFalse(AlerteEnrichie.objects.filter(zone=self.zone_calme).exists())
+        
+        resultats = {r['zone_id']: r for r in resultat['resultats']}
+        for zone, score, niveau_risque, niveau_confiance in (
+            (self.zone_eleve, 70.0, 'eleve', 'moyenne'),
+            (self.zone_critique, 100.0, 'critique', 'tres_elevee'),
+        ):
+            evenement = EvenementExterne.objects.get(zone=zone, type_evenement='autre', source='api')
+            self.assertEqual(evenement.intensite, score / 10)
+            self.assertTrue(evenement.is_traite)
+            # Niveau recalculé comme par save() : un événement 'autre' est de risque faible
+            self.assertEqual(evenement.niveau_risque, 'faible')
+            self.assertEqual(evenement.zone_erosion, 'non_determinee')
+            
+            fusion = FusionDonnees.objects.get(zone=zone)
+            self.assertEqual(fusion.evenement_externe_id, evenement.id)
+            self.assertEqual(fusion.score_erosion, score)
+            self.assertEqual(fusion.probabilite_erosion, score / 100)
+            self.assertEqual(fusion.mesures_arduino_count, 2)
+            self.assertEqual(fusion.evenements_externes_count, 1)
+            self.assertIn('temperature_elevee', fusion.facteurs_dominants)
+            self.assertIn('evenement_tempete', fusion.facteurs_dominants)
+            
+            prediction = PredictionEnrichie.objects.get(zone=zone)
+            self.assertEqual(prediction.fusion_donnees_id, fusion.id)
+            self.assertTrue(prediction.erosion_predite)
+            self.assertEqual(prediction.niveau_erosion, niveau_risque)
+            self.assertEqual(prediction.confiance_pourcentage, min(score, 95.0))
+            self.assertEqual(prediction.niveau_confiance, niveau_confiance)
+            
+            alerte = AlerteEnrichie.objects.get(zone=zone)
+            self.assertEqual(alerte.prediction_enrichie_id, prediction.id)
+            self.assertEqual(alerte.type, 'erosion_predite')
+            self.assertEqual(alerte.niveau, niveau_risque)
+            
+            self.assertEqual(resultats[zone.id]['niveau_risque'], niveau_risque)
+            self.assertEqual(resultats[zone.id]['fusion_id'], fusion.id)
+            self.assertEqual(resultats[zone.id]['prediction_id'], prediction.id)
+    
+    def test_analyse_capteur_unique(self):
+        """Test de l'analyse limitée à un capteur : seuls les événements restent pour les autres zones"""
+        capteur = CapteurArduino.objects.get(zone=self.zone_calme)
+        resultat = AnalyseAutomatiqueService().analyser_nouvelles_donnees(capteur_id=capteur.id)
+        
+        self.assertTrue(resultat['success'])
+        self.assertFalse(FusionDonnees.objects.filter(zone=self.zone_calme).exists())
+        # Sans mesure de température, seule la tempête compte (60 points)
+        fusion = FusionDonnees.objects.get(zone=self.zone_eleve)
+        self.assertEqual(fusion.score_erosion, 60.0)
+        self.assertEqual(fusion.mesures_arduino_count, 0)
+        self.assertEqual(PredictionEnrichie.objects.get(zone=self.zone_eleve).niveau_erosion, 'eleve')
+
+
+class AnalyseCapteursServiceTest(TestCase):
+    """Tests de l'analyse des mesures capteurs et de ses insertions groupées"""
+    
+    def setUp(self):
+        self.zone_eleve = Zone.objects.create(
+            nom="Zone élevée",
+            geometrie=Polygon.from_bbox((-1.2, 44.6, -1.0, 44.8)),
+            superficie_km2=50.0
+        )
+        self.zone_critique = Zone.objects.create(
+            nom="Zone critique",
+            geometrie=Polygon.from_bbox((-1.0, 44.6, -0.8, 44.8)),
+            superficie_km2=30.0
+        )
+        self.zone_calme = Zone.objects.create(
+            nom="Zone calme",
+            geometrie=Polygon.from_bbox((-0.8, 44.6, -0.6, 44.8)),
+            superficie_km2=10.0
+        )
+        
+        # Au-dessus de 30 °C, chaque degré compte pour 2 points de score
+        _creer_mesures_recentes(_creer_capteur_arduino(self.zone_eleve, "Capteur 1", "AA:BB:CC:DD:EE:21"), [59.0, 61.0])
+        _creer_mesures_recentes(_creer_capteur_arduino(self.zone_critique, "Capteur 2", "AA:BB:CC:DD:EE:22"), [70.0, 70.0, 70.0])
+        _creer_mesures_recentes(_creer_capteur_arduino(self.zone_calme, "Capteur 3", "AA:BB:CC:DD:EE:23"), [20.0, 21.0])
+    
+    def test_analyse_enregistre_predictions_et_alertes(self):
+        """Test des prédictions et alertes créées en lot pour chaque zone"""
+        resultat = AnalyseCapteursService().analyser_mesures_capteurs()
+        
+        self.assertTrue(resultat['success'])
+        self.assertEqual(resultat['zones_analysees'], 3)
+        self.assertEqual(resultat['alertes_generees'], 2)
+        
+        resultats = {r['zone_id']: r for r in resultat['resultats']}
+        for zone, score, niveau_risque, nb_mesures in (
+            (self.zone_eleve, 60.0, 'eleve', 2),
+            (self.zone_critique, 80.0, 'critique', 3),
+            (self.zone_calme, 0.0, 'faible', 2),
+        ):
+            prediction = Prediction.objects.get(zone=zone)
+            self.assertIsNone(prediction.modele_ml)
+            self.assertEqual(prediction.horizon_jours, 7)
+            self.assertAlmostEqual(prediction.taux_erosion_pred_m_an, score * 0.01)
+            self.assertEqual(prediction.confiance_pourcentage, 50 + nb_mesures * 2)
+            self.assertEqual(resultats[zone.id]['niveau_risque'], niveau_risque)
+            self.assertEqual(resultats[zone.id]['prediction_id'], prediction.id)
+            
+            if niveau_risque == 'faible':
+                self.assertFalse(AlerteEnrichie.objects.filter(zone=zone).exists())
+                continue
+            
+            # La prédiction simple n'est pas une PredictionEnrichie : son id
+            # est conservé dans le contexte de l'alerte
+            alerte = AlerteEnrichie.objects.get(zone=zone)
+            self.assertIsNone(alerte.prediction_enrichie_id)
+            self.assertEqual(alerte.type, 'erosion_predite')
+            self.assertEqual(alerte.niveau, niveau_risque)
+            self.assertEqual(alerte.donnees_contexte['prediction_id'], prediction.id)
+            self.assertEqual(alerte.donnees_contexte['nb_mesures'], nb_mesures)
+    
+    def test_analyse_zones_filtrees(self):
+        """Test de l'analyse limitée à certaines zones"""
+        resultat = AnalyseCapteursService().analyser_mesures_capteurs(zone_ids=[self.zone_calme.id])
+        
+        self.assertTrue(resultat['success'])
+        self.assertEqual(resultat['zones_analysees'], 1)
+        self.assertEqual(resultat['alertes_generees'], 0)
+        self.assertEqual(list(Prediction.objects.values_list('zone_id', flat=True)), [self.zone_calme.id])
+        self.assertFalse(AlerteEnrichie.objects.exists())
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'predictions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'predictions-tests'},
+})
+class CachePredictionsTest(TestCase):
+    """Tests du cache des résultats de prédiction ML"""
+    
+    def setUp(self):
+        caches['predictions'].clear()
+        self.zone = Zone.objects.create(
+            nom="Zone de test",
+            geometrie=Polygon.from_bbox((-1.2, 44.6, -1.0, 44.8)),
+            superficie_km2=50.0
+        )
+        self.modele_ml = ModeleML.objects.create(
+            nom="Modèle test",
+            version="1.0",
+            type_modele='random_forest',
+            statut='actif',
+            chemin_fichier="modele_test.joblib"
+        )
+        self.service = MLPredictionService()
+        self.features = {'altitude_moyenne': 5.0, 'pente_moyenne': 2.0}
+        self.resultat = {'prediction': 1.2, 'min': 0.9, 'max': 1.5, 'confidence': 82.0, 'score': 0.82}
+    
+    def test_cache_manque_puis_succes(self):
+        """Test d'un calcul mis en cache puis réutilisé, chaque appel enregistrant sa prédiction"""
+        with mock.patch.object(self.service, '_load_model', return_value=object()) as load_model, \
+                mock.patch.object(self.service, '_prepare_features', return_value=self.features) as prepare_features, \
+                mock.patch.object(self.service, '_calculate_prediction', return_value=self.resultat) as calculate_prediction:
+            premiere = self.service.predire_erosion(self.zone.id)
+            seconde = self.service.predire_erosion(self.zone.id)
+        
+        # Les features sont préparées à chaque appel, mais le second est
+        # servi par le cache : ni chargement du modèle, ni calcul
+        self.assertEqual(prepare_features.call_count, 2)
+        load_model.assert_called_once()
+        calculate_prediction.assert_called_once()
+        
+        # Mais il enregistre quand même sa prédiction
+        self.assertEqual(Prediction.objects.filter(zone=self.zone).count(), 2)
+        self.assertIsNotNone(seconde.pk)
+        self.assertNotEqual(premiere.pk, seconde.pk)
+        seconde.refresh_from_db()
+        self.assertEqual(seconde.modele_ml_id, self.modele_ml.id)
+        self.assertEqual(seconde.taux_erosion_pred_m_an, 1.2)
+        self.assertEqual(seconde.confiance_pourcentage, 82.0)
+        self.assertEqual(seconde.features_entree, self.features)
+        
+        self.modele_ml.refresh_from_db()
+        self.assertEqual(self.modele_ml.nombre_predictions, 2)
+    
+    def test_cache_par_horizon(self):
+        """Test d'un horizon différent : clé de cache distincte, résultat recalculé"""
+        with mock.patch.object(self.service, '_load_model', return_value=object()), \
+                mock.patch.object(self.service, '_prepare_features', return_value=self.features), \
+                mock.patch.object(self.service, '_calculate_prediction', return_value=self.resultat) as calculate_prediction:
+            self.service.predire_erosion(self.zone.id, horizon_jours=30)
+            self.service.predire_erosion(self.zone.id, horizon_jours=90)
+        
+        self.assertEqual(calculate_prediction.call_count, 2)
+        self.assertEqual(Prediction.objects.filter(zone=self.zone).count(), 2)
+    
+    def test_cache_features_modifiees(self):
+        """Test de features préparées différentes (nouvelle mesure) : résultat recalculé"""
+        features_modifiees = dict(self.features, temperature_actuelle=31.5)
+        with mock.patch.object(self.service, '_load_model', return_value=object()), \
+                mock.patch.object(self.service, '_prepare_features', side_effect=[self.features, features_modifiees, features_modifiees]), \
+                mock.patch.object(self.service, '_calculate_prediction', return_value=self.resultat) as calculate_prediction:
+            self.service.predire_erosion(self.zone.id)
+            derniere = self.service.predire_erosion(self.zone.id)
+            self.assertEqual(calculate_prediction.call_count, 2)
+            
+            # Mêmes features que l'appel précédent : résultat réutilisé
+            self.service.predire_erosion(self.zone.id)
+            self.assertEqual(calculate_prediction.call_count, 2)
+        
+        self.assertEqual(derniere.features_entree, features_modifiees)
+
+
+class JournaliserErreursTest(SimpleTestCase):
+    """Tests du décorateur de gestion d'erreurs des tâches"""
+    
+    def setUp(self):
+        @_journaliser_erreurs("de l'analyse de la zone {zone_id} ({mode})")
+        def analyser_zone(zone_id, mode='rapide'):
+            """Tâche de test"""
+            if zone_id < 0:
+                raise ValueError("zone inconnue")
+            return f"Zone {zone_id} analysée ({mode})"
+        
+        self.tache = analyser_zone
+    
+    def test_erreur_arguments_positionnels(self):
+        """Test d'une exception avec arguments positionnels (valeur par défaut incluse dans le libellé)"""
+        with self.assertLogs('erosion.tasks', level='ERROR') as journal:
+            resultat = self.tache(-1)
+        
+        self.assertEqual(resultat, "Erreur: zone inconnue")
+        self.assertEqual(journal.output, [
+            "ERROR:erosion.tasks:Erreur lors de l'analyse de la zone -1 (rapide): zone inconnue"
+        ])
+    
+    def test_erreur_arguments_nommes(self):
+        """Test d'une exception avec arguments nommés"""
+        with self.assertLogs('erosion.tasks', level='ERROR') as journal:
+            resultat = self.tache(mode='complet', zone_id=-2)
+        
+        self.assertEqual(resultat, "Erreur: zone inconnue")
+        self.assertEqual(journal.output, [
+            "ERROR:erosion.tasks:Erreur lors de l'analyse de la zone -2 (complet): zone inconnue"
+        ])
+    
+    def test_retour_inchange(self):
+        """Test du retour normal de la tâche, transmis tel quel"""
+        self.assertEqual(self.tache(3), "Zone 3 analysée (rapide)")
+        self.assertEqual(self.tache(zone_id=4, mode='complet'), "Zone 4 analysée (complet)")
+        self.assertEqual(self.tache.__name__, 'analyser_zone')
+        self.assertEqual(self.tache.__doc__, "Tâche de test")
@@ -69,11 +69,11 @@ def obtenir_resultats_analyse(request):
     GET /api/analyse-auto/resultats/
     """
     try:
-        # Récupérer les dernières fusions de données
+        # Récupérer les dernières fusions de données (avec leur zone, en une requête)
         fusions_recentes = FusionDonnees.objects.filter(
             statut='terminee',
             date_creation__gte=timezone.now() - timedelta(hours=24)
-        ).order_by('-date_creation')[:10]
+        ).select_related('zone').order_by('-date_creation')[:10]
         
         # Récupérer les dernières prédictions enrichies
         predictions_recentes = PredictionEnrichie.objects.filter(
@@ -103,7 +103,7 @@ def obtenir_resultats_analyse(request):
                     break
             
             resultats.append({
-                'zone_id': fusion.zone.id,
+                'zone_id': fusion.zone_id,
                 'zone_nom': fusion.zone.nom,
                 'fusion_id': fusion.id,
                 'score_erosion': fusion.score_erosion,
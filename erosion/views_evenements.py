@@ -162,6 +162,8 @@ class EvenementExterneViewSet(viewsets.ModelViewSet):
         
         evenements_crees = []
         erreurs = []
+        fusion_service = AnalyseFusionService()
+        historique_cache = {}  # Historique d'érosion chargé une fois par zone
         
         for i, evenement_data in enumerate(evenements_data):
             serializer = EvenementExterneReceptionSerializer(data=evenement_data)
@@ -176,8 +178,7 @@ class EvenementExterneViewSet(viewsets.ModelViewSet):
                     # Déclenchement synchrone: analyse et (si dispo) prédiction ML
                     try:
                         if evenement.zone_id:
-                            fusion_service = AnalyseFusionService()
-                            fusion_service.analyser_evenement(evenement.id)
+                            fusion_service.analyser_evenement(evenement.id, historique_cache=historique_cache)
                             try:
                                 ml_service = MLPredictionService()
                                 ml_service.predire_erosion(zone_id=evenement.zone_id, features={}, horizon_jours=30)